@@ -0,0 +1,5 @@
+import config
+config.set_env_vars_from_dot_env()
+
+from totalimpact import extra_schema
+extra_schema.create_schema()
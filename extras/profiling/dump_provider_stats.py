@@ -0,0 +1,33 @@
+# prints cache, bandwidth and latency counters per provider and method, summed over all workers
+# heroku run python extras/profiling/dump_provider_stats.py --app total-impact-core
+
+import argparse
+import json
+
+from totalimpact import provider_stats
+
+
+def main(provider_name=None, clear=False):
+    all_stats = provider_stats.get_aggregated_stats()
+    if provider_name:
+        all_stats = {provider_name: all_stats.get(provider_name, {})}
+    print json.dumps(all_stats, sort_keys=True, indent=4)
+
+    if clear:
+        print "clearing provider stats"
+        provider_stats.clear_aggregated_stats()
+
+
+if __name__ == "__main__":
+    # get args from the command line:
+    parser = argparse.ArgumentParser(description="dump provider cache and http stats")
+    parser.add_argument('--provider',
+        default=None,
+        type=str,
+        help="only show stats for this provider")
+    parser.add_argument('--clear',
+        default=False,
+        action='store_true',
+        help="reset the totals after printing them")
+    args = vars(parser.parse_args())
+    main(args["provider"], args["clear"])
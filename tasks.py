@@ -17,8 +17,12 @@ from eventlet import timeout
 from totalimpact import item as item_module
 from totalimpact import db
 from totalimpact import REDIS_MAIN_DATABASE_NUMBER
-from totalimpact import tiredis, default_settings
+from totalimpact import tiredis, default_settings, provider_stats, circuit_breaker, adaptive_timeouts
+from totalimpact.providers import provider as provider_module
+from totalimpact.providers import fanout
 from totalimpact.providers.provider import ProviderFactory, ProviderError, ProviderTimeout
+from totalimpact.providers.provider import ProviderServerError, ProviderHttpError
+from totalimpact.providers.provider import ProviderRateLimitError, ProviderResponseTooLargeError
 import rate_limit
 
 logger = logging.getLogger("core.tasks")
@@ -27,6 +31,13 @@ myredis = tiredis.from_url(os.getenv("REDIS_URL"), db=REDIS_MAIN_DATABASE_NUMBER
 rate = rate_limit.RateLimiter(redis_url=os.getenv("REDIS_URL"), redis_db=REDIS_MAIN_DATABASE_NUMBER)
 rate.add_condition({'requests':25, 'seconds':1})
 
+# stops a provider that keeps timing out or erroring from tying up workers
+breaker = circuit_breaker.CircuitBreaker()
+
+# run all the metrics providers for an item in one refresh_metrics_fanout task
+# rather than a provider_run task each.  Wants workers started with --pool=eventlet.
+METRICS_FANOUT = os.getenv("METRICS_FANOUT", "False")=="True"
+
 
 # from https://github.com/celery/celery/issues/1671#issuecomment-47247074
 # pending this being fixed in useful celery version
@@ -66,6 +77,13 @@ def task_failure_handler(sender=None, task_id=None, args=None, kwargs=None, exce
 
 
 def provider_method_wrapper(tiid, input_aliases_dict, provider, method_name):
+    (method_response, full_aliases_dict) = call_provider_method(tiid, input_aliases_dict, provider, method_name)
+    add_to_database_if_nonzero(tiid, method_response, method_name, provider.provider_name)
+    return full_aliases_dict
+
+
+# returns (method_response, full_aliases_dict) without saving anything
+def call_provider_method(tiid, input_aliases_dict, provider, method_name):
 
     # logger.info(u"{:20}: in provider_method_wrapper with {tiid} {provider_name} {method_name} with {aliases}".format(
     #    "wrapper", tiid=tiid, provider_name=provider.provider_name, method_name=method_name, aliases=input_aliases_dict))
@@ -78,11 +96,24 @@ def provider_method_wrapper(tiid, input_aliases_dict, provider, method_name):
 
     input_alias_tuples = item_module.alias_tuples_from_dict(input_aliases_dict)
     method = getattr(provider, method_name)
+    provider_stats.set_method_name(method_name)
 
     try:
-        method_response = method(input_alias_tuples)
+        try:
+            method_response = method(input_alias_tuples)
+        finally:
+            provider_module.clear_parsed_pages()
+        breaker.record_success(provider_name)
     except ProviderError, e:
         method_response = None
+        # client errors are about the item, not the health of the provider.  Too 
+        # large a page is about the item too, and being rate limited isn't about the item.
+        if isinstance(e, ProviderResponseTooLargeError):
+            breaker.record_success(provider_name)
+        elif isinstance(e, (ProviderServerError, ProviderHttpError, ProviderRateLimitError)):
+            breaker.record_failure(provider_name)
+        else:
+            breaker.record_success(provider_name)
 
         logger.info(u"{:20}: **ProviderError {tiid} {method_name} {provider_name}, Exception type {exception_type} {exception_arguments}".format(
             worker_name, 
@@ -103,9 +134,7 @@ def provider_method_wrapper(tiid, input_aliases_dict, provider, method_name):
     else:
         full_aliases_dict = input_aliases_dict
 
-    add_to_database_if_nonzero(tiid, method_response, method_name, provider_name)
-
-    return full_aliases_dict
+    return (method_response, full_aliases_dict)
 
 
 
@@ -176,8 +205,26 @@ def chain_dummy(first_arg, **kwargs):
     return response
 
 
+@task(priority=0)
+def refresh_cached_page(provider_name, url, headers, allow_redirects):
+    provider = ProviderFactory.get_provider(provider_name)
+    try:
+        provider.http_get(url, headers=headers, allow_redirects=allow_redirects, allow_stale=False)
+    except ProviderError, e:
+        logger.info(u"{:20}: **ProviderError refreshing cached page {url}, Exception type {exception_type}".format(
+            provider_name+"_worker", url=url, exception_type=type(e).__name__))
+
+
+def enqueue_cached_page_refresh(provider_name, url, headers, allow_redirects):
+    refresh_cached_page.apply_async(args=(provider_name, url, headers, allow_redirects), 
+                                    priority=9, queue="core_low")
+
+# lets providers serve stale pages while these refresh them
+provider_module.stale_page_refresher = enqueue_cached_page_refresh
+
+
 @task()
-def provider_run(aliases_dict, tiid, method_name, provider_name):
+def provider_run(aliases_dict, tiid, method_name, provider_name, task_priority="high"):
 
     provider = ProviderFactory.get_provider(provider_name)
 
@@ -194,12 +241,23 @@ def provider_run(aliases_dict, tiid, method_name, provider_name):
                 countdown=estimated_wait_seconds, 
                 max_retries=10)
 
-    timeout_seconds = 30
+    if not breaker.allow_request(provider_name):
+        logger.warning(u"CIRCUIT OPEN in provider_run for {provider} {method_name} {tiid}, skipping".format(
+           provider=provider.provider_name, method_name=method_name, tiid=tiid))
+        provider_stats.stats.incr(provider_name, "circuit_open", method_name=method_name)
+        if isinstance(aliases_dict, list):
+            aliases_dict = item_module.alias_dict_from_tuples(aliases_dict)    
+        return aliases_dict
+
+    # shorter for providers that are usually quick, so a slow tail doesn't hold the worker
+    timeout_seconds = adaptive_timeouts.task_timeout(provider_name)
     try:
-        with timeout.Timeout(timeout_seconds):
+        # low priority refreshes can make do with slightly stale pages
+        with timeout.Timeout(timeout_seconds), provider_module.allowing_stale(task_priority == "low"):
             response = provider_method_wrapper(tiid, aliases_dict, provider, method_name)
 
     except timeout.Timeout:
+        breaker.record_failure(provider_name)
         msg = u"TIMEOUT in provider_run for {provider} {method_name} {tiid} after {timeout_seconds} seconds".format(
            provider=provider.provider_name, method_name=method_name, tiid=tiid, timeout_seconds=timeout_seconds)
         # logger.warning(msg)  # message is written elsewhere
@@ -209,6 +267,73 @@ def provider_run(aliases_dict, tiid, method_name, provider_name):
 
 
 
+@task()
+def refresh_metrics_fanout(tiids_and_aliases, task_priority="high", provider_config=default_settings.PROVIDERS):
+    """ Runs every metrics provider for a batch of (tiid, aliases_dict) in green
+        threads of this one task, rather than a provider_run task per pair.
+        Only concurrent in workers started with --pool=eventlet. """
+    if not fanout.is_green():
+        logger.warning(u"refresh_metrics_fanout running without eventlet monkeypatching, requests will run one at a time")
+
+    def run_metrics(tiid, aliases_dict, provider):
+        # settings are per green thread
+        with provider_module.allowing_stale(task_priority == "low"):
+            return call_provider_method(tiid, aliases_dict, provider, "metrics")
+
+    metrics_fanout = fanout.Fanout()
+    runs = []
+    for provider in ProviderFactory.get_providers(provider_config, "metrics"):
+        if not breaker.allow_request(provider.provider_name):
+            logger.warning(u"CIRCUIT OPEN in refresh_metrics_fanout for {provider}, skipping".format(
+                provider=provider.provider_name))
+            continue
+        timeout_seconds = adaptive_timeouts.task_timeout(provider.provider_name)
+        for (tiid, aliases_dict) in tiids_and_aliases:
+            (success, estimated_wait_seconds) = rate.acquire(provider.provider_name, block=False)
+            if not success:
+                # hand this one to its own provider_run, which retries on the rate limit
+                logger.warning(u"RATE LIMIT HIT in refresh_metrics_fanout for {provider} {tiid}, requeuing".format(
+                   provider=provider.provider_name, tiid=tiid))
+                provider_run.apply_async(args=(aliases_dict, tiid, "metrics", provider.provider_name), 
+                        kwargs={"task_priority": task_priority},
+                        countdown=estimated_wait_seconds + random.random() * 3, 
+                        queue="core_"+task_priority)
+                continue
+            green_thread = metrics_fanout.spawn(provider, timeout_seconds, run_metrics, tiid, aliases_dict, provider)
+            runs.append((tiid, provider.provider_name, green_thread))
+
+    # save from this one green thread, the db session isn't shared safely
+    for (tiid, provider_name, green_thread) in runs:
+        try:
+            (method_response, full_aliases_dict) = green_thread.wait()
+        except ProviderTimeout:
+            breaker.record_failure(provider_name)
+            logger.info(u"{:20}: **ProviderTimeout {tiid} METRICS {provider_name}".format(
+                provider_name+"_worker", tiid=tiid, provider_name=provider_name.upper()))
+            continue
+        except Exception, e:
+            # one provider choking on one item mustn't lose everyone else's metrics
+            breaker.record_failure(provider_name)
+            logger.exception(u"{:20}: **Exception {tiid} METRICS {provider_name}, Exception type {exception_type}".format(
+                provider_name+"_worker", tiid=tiid, provider_name=provider_name.upper(), 
+                exception_type=type(e).__name__))
+            continue
+        add_to_database_if_nonzero(tiid, method_response, "metrics", provider_name)
+
+    return [tiid for (tiid, aliases_dict) in tiids_and_aliases]
+
+
+@task()
+def metrics_fanout_run(aliases_dict, tiid, task_priority="high"):
+    """ The metrics step of refresh_tiid as one task, when METRICS_FANOUT is on.
+        Takes and returns the aliases dict like provider_run does in the chain. """
+    if isinstance(aliases_dict, list):
+        aliases_dict = item_module.alias_dict_from_tuples(aliases_dict)    
+    refresh_metrics_fanout([(tiid, aliases_dict)], task_priority=task_priority)
+    return aliases_dict
+
+
+
 @task(priority=0)
 def after_refresh_complete(tiid, task_ids):
     logger.info(u"here in after_refresh_complete with {tiid}".format(
@@ -245,12 +370,22 @@ def refresh_tiid(tiid, aliases_dict, task_priority):
     task_ids = []
     for step_config in pipeline:
         group_list = []
+        if METRICS_FANOUT and chain_list and step_config and all([method_name=="metrics" for (method_name, provider_name) in step_config]):
+            # the whole step as one task
+            (method_name, provider_name) = ("metrics", "fanout")
+            new_task = metrics_fanout_run.s(tiid, task_priority=task_priority).set(priority=0, queue="core_"+task_priority)
+            uuid_bit = uuid().split("-")[0]
+            new_task_id = "task-{tiid}-{method_name}-{provider_name}-{uuid}".format(
+                tiid=tiid, method_name=method_name, provider_name=provider_name, uuid=uuid_bit)
+            group_list.append(new_task.set(task_id=new_task_id))
+            task_ids.append(new_task_id)
+            step_config = []
         for (method_name, provider_name) in step_config:
             if not chain_list:
                 # pass the alias dict in to the first one in the whole chain
-                new_task = provider_run.si(aliases_dict, tiid, method_name, provider_name).set(priority=3, queue="core_"+task_priority) #don't start new ones till done
+                new_task = provider_run.si(aliases_dict, tiid, method_name, provider_name, task_priority=task_priority).set(priority=3, queue="core_"+task_priority) #don't start new ones till done
             else:
-                new_task = provider_run.s(tiid, method_name, provider_name).set(priority=0, queue="core_"+task_priority)
+                new_task = provider_run.s(tiid, method_name, provider_name, task_priority=task_priority).set(priority=0, queue="core_"+task_priority)
             uuid_bit = uuid().split("-")[0]
             new_task_id = "task-{tiid}-{method_name}-{provider_name}-{uuid}".format(
                 tiid=tiid, method_name=method_name, provider_name=provider_name, uuid=uuid_bit)
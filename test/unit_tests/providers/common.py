@@ -84,6 +84,8 @@ class ProviderTestCase:
     testitem_biblio = ()
 
     def setUp(self):
+        # a fresh instance, so changes made by other tests don't carry over
+        ProviderFactory.reset()
         self.provider = ProviderFactory.get_provider(self.provider_name)
         self.old_http_get = Provider.http_get
 
@@ -1,6 +1,7 @@
 from test.unit_tests.providers import common
 from test.unit_tests.providers.common import ProviderTestCase
 from totalimpact.providers.provider import Provider, ProviderContentMalformedError, ProviderServerError
+from totalimpact.providers import bibtex as bibtex_module
 
 
 import os, json
@@ -100,6 +101,10 @@ class TestBibtex(ProviderTestCase):
         expected = [{'title': u'Luftutsl\xe4pp av organiska milj\xf6gifter fr\xe5n ljusb\xe5gsugnar: F\xf6rekomst och m\xf6jliga \xe5tg\xe4rder f\xf6r att minska milj\xf6p\xe5verkan', 'first_author': u'\xd6berg', 'journal': '', 'year': '2003', 'number': '', 'volume': '', 'first_page': '', 'authors': u'\xd6berg'}]
         assert_equals(response, expected)
 
+    def test_to_unicode(self):
+        response = self.provider._to_unicode(r'Milojevi{\'c} and {\"O}berg, {not an escape}')
+        assert_equals(response, u'Milojevi\u0107 and \xd6berg, {not an escape}')
+
     def test_parse_long(self):
         file_contents = SAMPLE_EXTRACT_MEMBER_ITEMS_CONTENTS
         response = self.provider.parse(file_contents)
@@ -130,6 +135,47 @@ class TestBibtex(ProviderTestCase):
         expected = [{'title': '', 'first_author': '', 'journal': '', 'year': '2009', 'number': '', 'volume': '', 'first_page': '', 'authors': ''}]
         assert_equals(response, expected)
 
+    def test_paginate_broken_reports_errors(self):
+        errors = []
+        response = list(self.provider.iter_parse(SAMPLE_EXTRACT_MEMBER_ITEMS_BROKEN, errors))
+        assert_equals(len(response[0]), 1)
+        assert_equals(len(errors), 1)
+
+    def test_iter_bibtex_entries(self):
+        entries = list(bibtex_module.iter_bibtex_entries(" a@b@@c@ "))
+        assert_equals(entries, ["@a", "@b", "@c"])
+
+    def test_iter_parse_in_chunks(self):
+        old_chunk_size = bibtex_module.BIBTEX_CHUNK_SIZE
+        old_processes = bibtex_module.BIBTEX_PARSE_PROCESSES
+        try:
+            bibtex_module.BIBTEX_CHUNK_SIZE = 4
+            expected = self.provider.parse(SAMPLE_EXTRACT_MEMBER_ITEMS_CONTENTS2)
+
+            bibtex_module.BIBTEX_PARSE_PROCESSES = 1
+            chunks = list(self.provider.iter_parse(SAMPLE_EXTRACT_MEMBER_ITEMS_CONTENTS2))
+            assert_equals(len(chunks[0]), 4)
+            assert_equals(sum(chunks, []), expected)
+
+            bibtex_module.BIBTEX_PARSE_PROCESSES = 2
+            chunks = list(self.provider.iter_parse(SAMPLE_EXTRACT_MEMBER_ITEMS_CONTENTS2))
+            assert_equals(sum(chunks, []), expected)
+        finally:
+            bibtex_module.BIBTEX_CHUNK_SIZE = old_chunk_size
+            bibtex_module.BIBTEX_PARSE_PROCESSES = old_processes
+
+    def test_parse_pool_remade_after_fork(self):
+        pool = bibtex_module._get_parse_pool()
+        assert bibtex_module._get_parse_pool() is pool
+        # as if this were a forked child of the process that made the pool
+        bibtex_module._parse_pool_pid = -1
+        child_pool = bibtex_module._get_parse_pool()
+        assert child_pool is not pool
+        pool.terminate()
+
+        bibtex_module.close_parse_pool()
+        assert_equals(bibtex_module._parse_pool, None)
+
     def test_member_items_arxiv(self):
         file_contents = SAMPLE_EXTRACT_MEMBER_ITEMS_ARXIV
         response = self.provider.member_items(file_contents)
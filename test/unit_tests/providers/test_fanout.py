@@ -0,0 +1,39 @@
+from nose.tools import assert_equals, raises
+import eventlet
+
+from totalimpact.providers import fanout
+from totalimpact.providers.provider import Provider, ProviderTimeout
+
+
+class TestFanout():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.provider.max_simultaneous_requests = 2
+        self.running = 0
+        self.max_running = 0
+
+    def slow_call(self, result):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        eventlet.sleep(0.01)
+        self.running -= 1
+        return result
+
+    def test_returns_results(self):
+        metrics_fanout = fanout.Fanout()
+        green_threads = [metrics_fanout.spawn(self.provider, 5, self.slow_call, i) for i in range(5)]
+        assert_equals([green_thread.wait() for green_thread in green_threads], range(5))
+
+    def test_limits_calls_per_provider(self):
+        metrics_fanout = fanout.Fanout()
+        for i in range(6):
+            metrics_fanout.spawn(self.provider, 5, self.slow_call, i)
+        metrics_fanout.waitall()
+        assert_equals(self.max_running, 2)
+
+    @raises(ProviderTimeout)
+    def test_times_out(self):
+        metrics_fanout = fanout.Fanout()
+        green_thread = metrics_fanout.spawn(self.provider, 0.001, eventlet.sleep, 1)
+        green_thread.wait()
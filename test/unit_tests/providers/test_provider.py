@@ -1,12 +1,18 @@
-from totalimpact.providers import provider
-from totalimpact.providers.provider import Provider, ProviderFactory
+from totalimpact.providers import provider, sessions
+from totalimpact.providers.provider import Provider, ProviderFactory, ProviderTimeout, ProviderResponseTooLargeError
 from totalimpact import app, db
-from nose.tools import assert_equals, nottest
+from totalimpact import cache as cache_module
+from totalimpact import provider_stats
+from nose.tools import assert_equals, nottest, raises
 from xml.dom import minidom 
 from test.utils import setup_postgres_for_unittests, teardown_postgres_for_unittests
+from test.unit_tests.providers.common import DummyResponse
 
 import simplejson, BeautifulSoup
-import os
+import os, time, threading, tempfile
+import StringIO
+import requests
+from requests.packages.urllib3.response import HTTPResponse
 from sqlalchemy.sql import text    
 
 sampledir = os.path.join(os.path.split(__file__)[0], "../../../extras/sample_provider_pages/")
@@ -68,13 +74,107 @@ class Test_Provider():
 
         response = provider._extract_from_json(page, dict_of_keylists)
         assert_equals(response, {'description': u'Git-based ToDo tool.', 'title': u'gtd'})
-    
+
+    def test_json_extractor(self):
+        extractor = provider.JsonExtractor({
+            'title' : ['repository', 'name'],
+            'description' : ['repository', 'description'],
+            'missing' : ['repository', 'nope', 'deeper'],
+            'not_a_dict' : ['repository', 'name', 'deeper']})
+
+        response = extractor.extract(self.TEST_JSON)
+        assert_equals(response, {'description': u'Git-based ToDo tool.', 'title': u'gtd'})
+
+        response = extractor.extract(self.TEST_JSON, include_falses=True)
+        assert_equals(response["missing"], None)
+        assert_equals(response["not_a_dict"], None)
+
+        # the module functions take a compiled extractor too
+        data = simplejson.loads(self.TEST_JSON)
+        assert_equals(provider._extract_from_data_dict(data, extractor), extractor.extract_from_data(data))
+
+    def test_json_extractor_matches_uncompiled(self):
+        dict_of_keylists = {
+            'a' : ['x', 'y'],
+            'b' : ['x', 'z'],
+            'c' : ['x'],
+            'd' : ['w']}
+        data = {"x": {"y": 1, "z": "0"}, "w": None}
+        response = provider.JsonExtractor(dict_of_keylists).extract_from_data(data, include_falses=True)
+        expected = dict((metric, provider._lookup_json(data, keylist)) for (metric, keylist) in dict_of_keylists.iteritems())
+        assert_equals(response, expected)
+
+    def test_parse_once(self):
+        provider.clear_parsed_pages()
+        calls = []
+        def parse(page):
+            calls.append(page)
+            return len(calls)
+
+        page = "<a>1</a>"
+        assert_equals(provider._parse_once("xml", page, parse), 1)
+        # an equal page, not just the same object, is a hit
+        assert_equals(provider._parse_once("xml", "".join(["<a>", "1</a>"]), parse), 1)
+        assert_equals(provider._parse_once("json", page, parse), 2)
+        assert_equals(len(calls), 2)
+
+        provider.clear_parsed_pages()
+        assert_equals(provider._parse_once("xml", page, parse), 3)
+
+    def test_parse_once_is_bounded(self):
+        provider.clear_parsed_pages()
+        parse = lambda page: object()
+        first = provider._parse_once("xml", "page 0", parse)
+        for i in range(provider.MAX_PARSED_PAGES):
+            provider._parse_once("xml", "page %i" %(i+1), parse)
+        assert provider._parse_once("xml", "page 0", parse) is not first
+        provider.clear_parsed_pages()
+
+    def test_get_doc_from_xml_parses_once(self):
+        provider.clear_parsed_pages()
+        (doc, lookup_function) = provider._get_doc_from_xml(self.TEST_XML)
+        (doc_again, lookup_function) = provider._get_doc_from_xml(self.TEST_XML)
+        assert doc is doc_again
+        assert_equals(provider._count_in_xml(self.TEST_XML, "total_count"), 1)
+        provider.clear_parsed_pages()
+
     def test_lookup_xml_from_dom(self):
         page = self.TEST_XML
         doc = minidom.parseString(page.strip())
         response = provider._lookup_xml_from_dom(doc, ['total_count'])
         assert_equals(response, 17)
 
+    def test_lookup_xml_from_etree(self):
+        (doc, lookup_function) = provider._get_doc_from_xml(self.TEST_XML)
+        assert_equals(lookup_function, provider._lookup_xml_from_etree)
+        assert_equals(provider._lookup_xml_from_etree(doc, ['total_count']), 17)
+
+    def test_lookup_xml_from_etree_matches_prefixed_tags(self):
+        page = """<feed xmlns="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/">
+            <entry><dc:title>hi</dc:title><title>there</title></entry></feed>"""
+        (doc, lookup_function) = provider._get_doc_from_xml(page)
+        assert_equals(lookup_function(doc, ['feed', 'entry', 'dc:title']), u'hi')
+        assert_equals(lookup_function(doc, ['entry', 'title']), u'there')
+        assert_equals(lookup_function(doc, ['entry', 'author']), None)
+
+    def test_iterparse_xml(self):
+        page = "<articles>" + "".join(['<article id="%i"><usage pdf="1"/></article>' % i for i in range(5)]) + "</articles>"
+        ids = [article.get("id") for article in provider._iterparse_xml(page, "article")]
+        assert_equals(ids, ["0", "1", "2", "3", "4"])
+
+    def test_xml_external_entities_not_expanded(self):
+        secret_file = tempfile.NamedTemporaryFile(suffix=".txt")
+        secret_file.write("secret")
+        secret_file.flush()
+        page = """<?xml version="1.0"?>
+            <!DOCTYPE articles [<!ENTITY e SYSTEM "file://%s">]>
+            <articles><article id="1"><title>&e;</title></article></articles>""" % secret_file.name
+
+        (doc, lookup_function) = provider._get_doc_from_xml(page)
+        assert "secret" not in (lookup_function(doc, ['articles', 'article', 'title']) or "")
+        titles = [article.findtext("title") for article in provider._iterparse_xml(page, "article")]
+        assert "secret" not in (titles[0] or "")
+
     def test_lookup_xml_from_soup(self):
         page = self.TEST_XML
         doc = BeautifulSoup.BeautifulStoneSoup(page) 
@@ -110,6 +210,22 @@ class Test_Provider():
         expected = [('pmid', '123456'), ('url', 'HTTPS://starbucks.com'), ('arxiv', '1305.3328'), ('doi', '10.123/abc')]
         assert_equals(response, expected)
 
+    def test_normalize_aliases(self):
+        provider.clear_normalized_nids()
+        aliases = [("doi", "http://dx.doi.org/10.123/ABC"), ("pmid", u"pmid:123456"), 
+                    ("url", "http://starbucks.com\x00 "), ("biblio", {"title": "hi"})]
+        expected = [("doi", "10.123/abc"), ("pmid", u"123456"), 
+                    ("url", "http://starbucks.com"), ("biblio", {"title": "hi"})]
+        assert_equals(provider.normalize_aliases(aliases), expected)
+        # and again from the memo
+        assert_equals(provider.normalize_aliases(aliases), expected)
+        assert_equals([provider.normalize_alias(alias) for alias in aliases], expected)
+
+    def test_normalize_alias_keeps_string_type(self):
+        provider.clear_normalized_nids()
+        assert_equals(type(provider.normalize_alias(("pmid", "123456"))[1]), str)
+        assert_equals(type(provider.normalize_alias(("pmid", u"123456"))[1]), unicode)
+
     def test_import_products_bad_providername(self):
         response = provider.import_products("nonexistant", {})
         expected = []
@@ -125,6 +241,48 @@ class TestProviderFactory():
         ("mendeley", {"workers": 3}),
     ]
 
+    def test_manifest_is_up_to_date(self):
+        # if this fails, run python -m totalimpact.providers.build_manifest
+        assert_equals(ProviderFactory.build_manifest(), provider.PROVIDER_MANIFEST)
+
+    def test_providers_missing_from_manifest_are_asked(self):
+        manifest = provider.PROVIDER_MANIFEST
+        try:
+            provider.PROVIDER_MANIFEST = {}
+            ProviderFactory.reset()
+            sm = ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG)
+        finally:
+            provider.PROVIDER_MANIFEST = manifest
+            ProviderFactory.reset()
+        assert_equals(sm, ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG))
+
+    def test_get_provider_is_cached(self):
+        ProviderFactory.reset()
+        provider = ProviderFactory.get_provider("wikipedia")
+        assert ProviderFactory.get_provider("wikipedia") is provider
+        assert ProviderFactory.get_providers(self.TEST_PROVIDER_CONFIG)[1] is provider
+
+        ProviderFactory.reset()
+        assert ProviderFactory.get_provider("wikipedia") is not provider
+
+    def test_get_provider_from_many_threads(self):
+        ProviderFactory.reset()
+        providers = []
+        threads = [threading.Thread(target=lambda: providers.append(ProviderFactory.get_provider("wikipedia"))) 
+                    for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equals(len(set([id(provider) for provider in providers])), 1)
+
+    def test_lookups_are_memoized(self):
+        ProviderFactory.reset()
+        sm = ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG)
+        assert ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG) is sm
+        # a different set of providers is looked up separately
+        assert_equals(ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG[0:1]).keys()[0].split(":")[0], "pubmed")
+
     def test_get_all_static_meta(self):
         sm = ProviderFactory.get_all_static_meta(self.TEST_PROVIDER_CONFIG)
         expected = 'The number of citations by papers in PubMed Central'
@@ -140,3 +298,428 @@ class TestProviderFactory():
         print md["pubmed"]
         assert_equals(md["pubmed"]['url'], 'http://pubmed.gov')
 
+
+
+class TestHttpGetMultiple():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def slow_http_get(self, url, headers=None, timeout=None, cache_enabled=True, allow_redirects=False):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.1)
+        with self.lock:
+            self.in_flight -= 1
+        return DummyResponse(200, url)
+
+    def test_http_get_multiple_fetches_in_parallel(self):
+        self.provider.http_get = self.slow_http_get
+        urls = ["http://example.com/%i" %i for i in range(5)]
+        start = time.time()
+        responses = self.provider.http_get_multiple(urls, cache_enabled=False)
+        elapsed = time.time() - start
+        assert_equals(sorted(responses.keys()), sorted(urls))
+        assert_equals(responses[urls[2]].text, urls[2])
+        assert elapsed < 0.3, elapsed
+
+    def test_http_get_multiple_limits_requests_per_host(self):
+        self.provider.http_get = self.slow_http_get
+        self.provider.max_requests_per_host = 2
+        urls = ["http://example.com/%i" %i for i in range(6)]
+        responses = self.provider.http_get_multiple(urls, cache_enabled=False)
+        assert_equals(len(responses), 6)
+        assert_equals(self.max_in_flight, 2)
+
+    def test_http_get_multiple_keeps_method_name(self):
+        method_names = []
+        def recording_http_get(url, headers=None, timeout=None, cache_enabled=True, allow_redirects=False):
+            method_names.append(provider_stats.get_method_name())
+            return self.slow_http_get(url)
+        self.provider.http_get = recording_http_get
+        provider_stats.set_method_name("metrics")
+        urls = ["http://example.com/%i" %i for i in range(4)]
+        responses = self.provider.http_get_multiple(urls, cache_enabled=False)
+        assert_equals(method_names, ["metrics"]*4)
+
+    @raises(ProviderTimeout)
+    def test_http_get_multiple_raises_errors(self):
+        def timeout_http_get(url, headers=None, timeout=None, cache_enabled=True, allow_redirects=False):
+            if url.endswith("2"):
+                raise ProviderTimeout()
+            return DummyResponse(200, url)
+        self.provider.http_get = timeout_http_get
+        urls = ["http://example.com/%i" %i for i in range(4)]
+        responses = self.provider.http_get_multiple(urls, cache_enabled=False)
+
+
+    def test_http_get_multiple_raises_other_errors(self):
+        fetched = []
+        def broken_http_get(url, headers=None, timeout=None, cache_enabled=True, allow_redirects=False):
+            if url.endswith("1"):
+                raise KeyError(url)
+            fetched.append(url)
+            return DummyResponse(200, url)
+        self.provider.http_get = broken_http_get
+        urls = ["http://example.com/%i" %i for i in range(4)]
+        try:
+            self.provider.http_get_multiple(urls, cache_enabled=False, num_concurrent_requests=2)
+            assert False, "should have raised"
+        except KeyError, e:
+            assert_equals(e.args, (urls[1],))
+        assert_equals(sorted(fetched), [urls[0], urls[2], urls[3]])
+
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = responses
+        self.sent_headers = []
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=False, verify=True, stream=False):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+class FakeResponse(DummyResponse):
+    encoding = "utf-8"
+
+    # like requests responses, false for error status codes
+    def __nonzero__(self):
+        return self.status_code < 400
+
+
+class TestConditionalGet():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.url = "http://example.com/conditional/%f" % time.time()
+        self.old_get_session = sessions.get_session
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+
+    def make_response(self, status_code, text, headers):
+        response = DummyResponse(status_code, text)
+        response.headers = headers
+        response.url = self.url
+        response.encoding = "utf-8"
+        return response
+
+    def expire_cache_entry(self):
+        cache = cache_module.Cache(self.provider.max_cache_duration)
+        cache_key = provider._cache_key(self.url, {"User-Agent": app.config["USER_AGENT"]}, False)
+        cache_data = cache.get_cache_entry(cache_key)
+        cache_data["cached_at"] -= self.provider.max_cache_duration + 1
+        cache.set_cache_entry(cache_key, cache_data)
+
+    def test_stale_page_is_revalidated(self):
+        fake_session = FakeSession([
+            self.make_response(200, "original page", {"ETag": '"abc"', "Last-Modified": "Mon, 01 Sep 2014 00:00:00 GMT"}),
+            self.make_response(304, "", {"ETag": '"abc"'})
+            ])
+        sessions.get_session = lambda url, pool_size: fake_session
+
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "original page")
+        assert "If-None-Match" not in fake_session.sent_headers[0]
+
+        self.expire_cache_entry()
+        response = self.provider.http_get(self.url)
+        assert_equals(fake_session.sent_headers[1]["If-None-Match"], '"abc"')
+        assert_equals(fake_session.sent_headers[1]["If-Modified-Since"], "Mon, 01 Sep 2014 00:00:00 GMT")
+        assert_equals(response.status_code, 200)
+        assert_equals(response.text, "original page")
+
+        # refreshed, so now served from the cache without a GET
+        response = self.provider.http_get(self.url)
+        assert_equals(len(fake_session.sent_headers), 2)
+
+    def test_changed_page_replaces_cache_entry(self):
+        fake_session = FakeSession([
+            self.make_response(200, "original page", {"ETag": '"abc"'}),
+            self.make_response(200, "new page", {"ETag": '"def"'})
+            ])
+        sessions.get_session = lambda url, pool_size: fake_session
+
+        response = self.provider.http_get(self.url)
+        self.expire_cache_entry()
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "new page")
+
+
+class TestSingleFlight():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.provider.cache_fill_wait_seconds = 2
+        self.url = "http://example.com/singleflight/%f" % time.time()
+        self.cache = cache_module.Cache(self.provider.max_cache_duration)
+        self.cache_key = provider._cache_key(self.url, {"User-Agent": app.config["USER_AGENT"]}, False)
+        self.fake_session = FakeSession([DummyResponse(200, "fetched page")])
+        self.fake_session.responses[0].encoding = "utf-8"
+        self.old_get_session = sessions.get_session
+        sessions.get_session = lambda url, pool_size: self.fake_session
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+
+    def test_lease_released_after_fetch(self):
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "fetched page")
+        assert_equals(self.cache.is_leased(self.cache_key), False)
+
+    def test_waits_for_other_worker_to_fill_cache(self):
+        token = self.cache.acquire_lease(self.cache_key)
+        def other_worker():
+            time.sleep(0.3)
+            self.cache.set_cache_entry(self.cache_key, 
+                {"text": "page from other worker", "status_code": 200, "url": self.url})
+            self.cache.release_lease(self.cache_key, token)
+        threading.Thread(target=other_worker).start()
+
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "page from other worker")
+        assert_equals(self.fake_session.sent_headers, [])
+
+    def test_fetches_itself_if_other_worker_gives_up(self):
+        token = self.cache.acquire_lease(self.cache_key)
+        def other_worker():
+            time.sleep(0.3)
+            self.cache.release_lease(self.cache_key, token)
+        threading.Thread(target=other_worker).start()
+
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "fetched page")
+        assert_equals(len(self.fake_session.sent_headers), 1)
+
+    def test_release_lease_only_releases_own_lease(self):
+        token = self.cache.acquire_lease(self.cache_key)
+        assert_equals(self.cache.acquire_lease(self.cache_key), None)
+        self.cache.release_lease(self.cache_key, "someone else's token")
+        assert_equals(self.cache.is_leased(self.cache_key), True)
+        self.cache.release_lease(self.cache_key, token)
+        assert_equals(self.cache.is_leased(self.cache_key), False)
+
+
+class TestNegativeCache():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.provider.negative_cache_status_codes = [404, 410]
+        self.provider.negative_cache_duration = 60*60*24
+        self.url = "http://example.com/negative/%f" % time.time()
+        self.old_get_session = sessions.get_session
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+
+    def make_response(self, status_code):
+        response = FakeResponse(status_code, "")
+        response.url = self.url
+        return response
+
+    def test_not_found_is_cached(self):
+        fake_session = FakeSession([self.make_response(404)])
+        sessions.get_session = lambda url, pool_size: fake_session
+
+        response = self.provider.http_get(self.url)
+        assert_equals(response.status_code, 404)
+        response = self.provider.http_get(self.url)
+        assert_equals(response.status_code, 404)
+        assert_equals(len(fake_session.sent_headers), 1)
+
+    def test_negative_cache_expires_on_its_own_schedule(self):
+        fake_session = FakeSession([self.make_response(404), self.make_response(404)])
+        sessions.get_session = lambda url, pool_size: fake_session
+        self.provider.negative_cache_duration = 1
+
+        response = self.provider.http_get(self.url)
+        cache_module.local_cache.clear()
+        time.sleep(1.1)
+        response = self.provider.http_get(self.url)
+        assert_equals(len(fake_session.sent_headers), 2)
+
+    def test_not_found_is_not_cached_unless_provider_opts_in(self):
+        fake_session = FakeSession([self.make_response(404), self.make_response(404)])
+        sessions.get_session = lambda url, pool_size: fake_session
+        self.provider = Provider()
+
+        response = self.provider.http_get(self.url)
+        response = self.provider.http_get(self.url)
+        assert_equals(len(fake_session.sent_headers), 2)
+
+    def test_server_errors_are_not_cached(self):
+        fake_session = FakeSession([self.make_response(500), self.make_response(500)])
+        sessions.get_session = lambda url, pool_size: fake_session
+
+        response = self.provider.http_get(self.url)
+        response = self.provider.http_get(self.url)
+        assert_equals(len(fake_session.sent_headers), 2)
+
+
+class TestStaleWhileRevalidate():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.provider.max_stale_duration = 60*60*24
+        self.url = "http://example.com/stale/%f" % time.time()
+        self.old_get_session = sessions.get_session
+        self.old_stale_page_refresher = provider.stale_page_refresher
+        self.refreshes = []
+        self.fake_session = FakeSession([
+            FakeResponse(200, "original page"),
+            FakeResponse(200, "new page")])
+        sessions.get_session = lambda url, pool_size: self.fake_session
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+        provider.stale_page_refresher = self.old_stale_page_refresher
+
+    def record_refresh(self, provider_name, url, headers, allow_redirects):
+        self.refreshes.append(url)
+
+    def age_cache_entry(self, seconds):
+        cache = cache_module.Cache(self.provider.max_cache_duration)
+        cache_key = provider._cache_key(self.url, {"User-Agent": app.config["USER_AGENT"]}, False)
+        cache_data = cache.get_cache_entry(cache_key)
+        cache_data["cached_at"] -= seconds
+        cache.set_cache_entry(cache_key, cache_data)
+
+    def test_stale_page_served_and_refreshed_in_background(self):
+        provider.stale_page_refresher = self.record_refresh
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + 1)
+
+        response = self.provider.http_get(self.url, allow_stale=True)
+        assert_equals(response.text, "original page")
+        response = self.provider.http_get(self.url, allow_stale=True)
+        assert_equals(self.refreshes, [self.url])
+        assert_equals(len(self.fake_session.sent_headers), 1)
+
+    def test_stale_page_not_served_without_refresher(self):
+        provider.stale_page_refresher = None
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + 1)
+
+        response = self.provider.http_get(self.url, allow_stale=True)
+        assert_equals(response.text, "new page")
+
+    def test_too_stale_page_is_fetched(self):
+        provider.stale_page_refresher = self.record_refresh
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + self.provider.max_stale_duration + 1)
+
+        response = self.provider.http_get(self.url, allow_stale=True)
+        assert_equals(response.text, "new page")
+        assert_equals(self.refreshes, [])
+
+    def test_stale_page_not_served_by_default(self):
+        provider.stale_page_refresher = self.record_refresh
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + 1)
+
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "new page")
+
+    def test_stale_page_not_served_by_providers_not_opted_in(self):
+        provider.stale_page_refresher = self.record_refresh
+        self.provider.max_stale_duration = 0
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + 1)
+
+        response = self.provider.http_get(self.url, allow_stale=True)
+        assert_equals(response.text, "new page")
+
+    def test_allowing_stale_only_for_the_block(self):
+        provider.stale_page_refresher = self.record_refresh
+        self.provider.http_get(self.url)
+        self.age_cache_entry(self.provider.max_cache_duration + 1)
+
+        try:
+            with provider.allowing_stale(True):
+                response = self.provider.http_get(self.url)
+                assert_equals(response.text, "original page")
+                raise ValueError()
+        except ValueError:
+            pass
+        response = self.provider.http_get(self.url)
+        assert_equals(response.text, "new page")
+
+
+class TestStreamedBodies():
+
+    def setUp(self):
+        self.provider = Provider()
+        self.url = "http://example.com/streamed/%f" % time.time()
+        self.old_get_session = sessions.get_session
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+
+    def make_response(self, body):
+        response = requests.models.Response()
+        response.raw = HTTPResponse(body=StringIO.StringIO(body), preload_content=False)
+        response.status_code = 200
+        response.url = self.url
+        response.encoding = "utf-8"
+        return response
+
+    def test_reads_whole_body(self):
+        response = self.make_response("a"*100000)
+        assert_equals(provider._read_body(response, 200000), False)
+        assert_equals(response.text, "a"*100000)
+
+    @raises(ProviderResponseTooLargeError)
+    def test_gives_up_on_large_bodies(self):
+        response = self.make_response("a"*100000)
+        provider._read_body(response, 50000)
+
+    def test_truncates_large_bodies(self):
+        response = self.make_response("<title>hi</title>" + "a"*100000)
+        assert_equals(provider._read_body(response, 50000, truncate=True), True)
+        assert_equals(len(response.content), 50000)
+        assert response.text.startswith("<title>hi</title>")
+
+        # not streamed
+        response = requests.models.Response()
+        response._content = "a"*100
+        response._content_consumed = True
+        assert_equals(provider._read_body(response, 50, truncate=True), True)
+        assert_equals(len(response.content), 50)
+
+    def test_stops_reading_at_marker(self):
+        body = "<html><head><title>hi</title></HEAD>" + "<p>a</p>"*100000
+        response = self.make_response(body)
+        assert_equals(provider._read_body(response, 200000, "</head>"), True)
+        assert "<title>hi</title>" in response.text
+        assert len(response.content) < len(body)
+        assert response.raw.closed
+
+    def test_http_get_caches_partial_pages_only_for_the_same_cutoff(self):
+        fake_session = FakeSession([
+            self.make_response("<html><head><title>hi</title></head><body></body></html>"),
+            self.make_response("<html><head><title>hi</title></head><body></body></html>")])
+        sessions.get_session = lambda url, pool_size: fake_session
+        self.provider.stop_reading_at = "</head>"
+
+        response = self.provider.http_get(self.url)
+        assert "<title>hi</title>" in response.text
+        response = self.provider.http_get(self.url)
+        assert "<title>hi</title>" in response.text
+        assert_equals(len(fake_session.sent_headers), 1)
+
+        # someone reading whole pages doesn't get the cut short one
+        self.provider.stop_reading_at = None
+        response = self.provider.http_get(self.url)
+        assert_equals(len(fake_session.sent_headers), 2)
+
+    @raises(ProviderResponseTooLargeError)
+    def test_http_get_raises_on_large_bodies(self):
+        fake_session = FakeSession([self.make_response("a"*100000)])
+        sessions.get_session = lambda url, pool_size: fake_session
+        self.provider.max_response_bytes = 50000
+        self.provider.http_get(self.url)
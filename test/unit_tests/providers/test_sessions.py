@@ -0,0 +1,49 @@
+from nose.tools import assert_equals, assert_not_equals
+
+from totalimpact.providers import sessions
+
+
+class TestSessions():
+
+    def setUp(self):
+        self.registry = sessions.SessionRegistry(max_pool_size=5, max_idle_seconds=60, max_sessions=2)
+
+    def tearDown(self):
+        self.registry.clear()
+
+    def test_same_host_reuses_session(self):
+        session1 = self.registry.get_session("http://api.github.com/users/egonw")
+        session2 = self.registry.get_session("http://API.github.com/repos/egonw/gtd")
+        assert_equals(session1, session2)
+
+    def test_different_hosts_get_different_sessions(self):
+        session1 = self.registry.get_session("http://api.github.com/users/egonw")
+        session2 = self.registry.get_session("https://api.github.com/users/egonw")
+        session3 = self.registry.get_session("http://dx.doi.org/10.1371/journal.pcbi.1000361")
+        assert_not_equals(session1, session2)
+        assert_not_equals(session1, session3)
+
+    def test_pool_size_is_capped(self):
+        session = self.registry.get_session("http://api.github.com", pool_size=20)
+        adapter = session.get_adapter("http://api.github.com")
+        assert_equals(adapter._pool_maxsize, 5)
+
+    def test_evicts_least_recently_used(self):
+        self.registry.get_session("http://a.example.com")
+        self.registry.get_session("http://b.example.com")
+        self.registry.get_session("http://a.example.com")
+        self.registry.get_session("http://c.example.com")
+        assert_equals(len(self.registry), 2)
+        assert_equals(set(self.registry._sessions.keys()),
+            set([("http", "a.example.com"), ("http", "c.example.com")]))
+
+    def test_evicts_idle_sessions(self):
+        self.registry.max_idle_seconds = -1
+        session1 = self.registry.get_session("http://a.example.com")
+        session2 = self.registry.get_session("http://a.example.com")
+        assert_not_equals(session1, session2)
+        assert_equals(len(self.registry), 1)
+
+    def test_does_not_keep_cookies(self):
+        session = self.registry.get_session("http://a.example.com")
+        assert_equals(list(session.cookies._policy.allowed_domains()), [])
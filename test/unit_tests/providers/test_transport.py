@@ -0,0 +1,77 @@
+from nose.tools import assert_equals, raises
+import os
+import shutil
+import tempfile
+import requests
+
+from totalimpact.providers import transport, sessions
+from totalimpact import provider_stats
+
+datadir = os.path.join(os.path.split(__file__)[0], "../../../extras/sample_provider_pages")
+
+
+class FakeSession(object):
+    def __init__(self, response):
+        self.response = response
+        self.num_gets = 0
+
+    def get(self, url, **kwargs):
+        self.num_gets += 1
+        return self.response
+
+
+class TestTransport():
+
+    def setUp(self):
+        self.fixtures_dir = tempfile.mkdtemp()
+        self.store = transport.FixtureStore(self.fixtures_dir, datadir)
+        self.old_get_session = sessions.get_session
+        self.url = "http://api.github.com/repos/egonw/cdk?client_id=abc&client_secret=def"
+
+    def tearDown(self):
+        sessions.get_session = self.old_get_session
+        shutil.rmtree(self.fixtures_dir)
+
+    @raises(ValueError)
+    def test_unknown_mode(self):
+        transport.Transport(mode="carrier_pigeon")
+
+    def test_record_then_replay(self):
+        fake_session = FakeSession(transport.build_response(self.url, 200, '{"watchers": 3}'))
+        sessions.get_session = lambda url, pool_size: fake_session
+
+        recorder = transport.Transport(mode="record", store=self.store)
+        response = recorder.get_session("github", self.url).get(self.url, timeout=20)
+        assert_equals(response.text, '{"watchers": 3}')
+        assert_equals(fake_session.num_gets, 1)
+
+        # recordings don't keep credentials, so replay works with rotated keys
+        fixture = open(os.path.join(self.fixtures_dir, "github", os.listdir(os.path.join(self.fixtures_dir, "github"))[0])).read()
+        assert "def" not in fixture
+
+        replayer = transport.Transport(mode="replay", store=self.store)
+        rotated_url = "http://api.github.com/repos/egonw/cdk?client_id=xyz&client_secret=uvw"
+        response = replayer.get_session("github", rotated_url).get(rotated_url, timeout=20)
+        assert_equals(response.status_code, 200)
+        assert_equals(response.json(), {"watchers": 3})
+        assert_equals(fake_session.num_gets, 1)
+
+    def test_replay_falls_back_to_sample_pages(self):
+        provider_stats.set_method_name("metrics")
+        replayer = transport.Transport(mode="replay", store=self.store)
+        response = replayer.get_session("github", self.url).get(self.url)
+        assert_equals(response.text, open(os.path.join(datadir, "github", "metrics")).read())
+
+        response = replayer.get_session("nosuchprovider", self.url).get(self.url)
+        assert_equals(response.status_code, 404)
+
+    def test_replay_injects_errors(self):
+        replayer = transport.Transport(mode="replay", store=self.store, error_rate=1)
+        response = replayer.get_session("github", self.url).get(self.url)
+        assert_equals(response.status_code, 500)
+
+    @raises(requests.exceptions.Timeout)
+    def test_replay_injects_timeouts(self):
+        replayer = transport.Transport(mode="replay", store=self.store, timeout_rate=1)
+        replayer.get_session("github", self.url).get(self.url)
+
@@ -0,0 +1,54 @@
+from nose.tools import assert_equals
+import redis
+
+from totalimpact import adaptive_timeouts, provider_stats
+from totalimpact import REDIS_UNITTEST_DATABASE_NUMBER
+
+
+class TestAdaptiveTimeouts():
+
+    def setUp(self):
+        self.r = redis.from_url("redis://localhost:6379", REDIS_UNITTEST_DATABASE_NUMBER)
+        self.r.flushdb()
+        self.stats = provider_stats.ProviderStats(flush_interval_seconds=60*60)
+        self.timeouts = adaptive_timeouts.AdaptiveTimeouts(self.r)
+
+    def record_latencies(self, provider_name, latency_seconds, num_requests):
+        for i in range(num_requests):
+            self.stats.record_response(provider_name, 200, 100, latency_seconds)
+        self.stats.flush(self.r)
+
+    def test_latency_percentile(self):
+        counts = {"latency_ms_le_50": 98, "latency_ms_le_1000": 1, "latency_ms_over_20000": 1}
+        assert_equals(provider_stats.latency_percentile(counts, 0.5), 0.05)
+        assert_equals(provider_stats.latency_percentile(counts, 0.99), 1.0)
+        assert_equals(provider_stats.latency_percentile(counts, 1), None)
+        assert_equals(provider_stats.latency_percentile({}, 0.99), None)
+
+    def test_defaults_without_enough_samples(self):
+        self.record_latencies("pubmed", 0.2, 10)
+        assert_equals(self.timeouts.http_timeout("pubmed"), adaptive_timeouts.DEFAULT_HTTP_TIMEOUT)
+        assert_equals(self.timeouts.task_timeout("pubmed"), adaptive_timeouts.DEFAULT_TASK_TIMEOUT)
+
+    def test_fast_provider_gets_short_timeouts(self):
+        self.record_latencies("pubmed", 0.9, 100)
+        assert_equals(self.timeouts.http_timeout("pubmed"), 3.0)
+        assert_equals(self.timeouts.task_timeout("pubmed"), 10)
+
+    def test_within_floor_and_ceiling(self):
+        self.record_latencies("pubmed", 0.01, 100)
+        self.record_latencies("webpage", 9, 100)
+        assert_equals(self.timeouts.http_timeout("pubmed"), adaptive_timeouts.MIN_HTTP_TIMEOUT)
+        assert_equals(self.timeouts.http_timeout("webpage"), adaptive_timeouts.MAX_HTTP_TIMEOUT)
+        assert_equals(self.timeouts.task_timeout("webpage"), adaptive_timeouts.MAX_TASK_TIMEOUT)
+
+    def test_timeouts_raise_the_timeout(self):
+        self.record_latencies("pubmed", 0.9, 100)
+        assert_equals(self.timeouts.http_timeout("pubmed"), 3.0)
+
+        # the provider slows down and requests start timing out
+        for i in range(5):
+            self.stats.record_timeout("pubmed")
+        self.stats.flush(self.r)
+        self.timeouts.clear()
+        assert_equals(self.timeouts.http_timeout("pubmed"), adaptive_timeouts.MAX_HTTP_TIMEOUT)
@@ -0,0 +1,179 @@
+from nose.tools import assert_equals, assert_true
+import json, os, sys, time
+import redis
+
+from totalimpact import cache
+from totalimpact import REDIS_UNITTEST_DATABASE_NUMBER
+
+
+class UnittestCache(cache.Cache):
+    # keep unittest entries and bookkeeping out of the real cache db
+    def _get_client(self):
+        return redis.from_url("redis://localhost:6379", REDIS_UNITTEST_DATABASE_NUMBER)
+
+
+class TestCache():
+
+    def setUp(self):
+        self.cache = UnittestCache(60)
+        self.r = self.cache._get_client()
+        self.r.flushdb()
+        cache.local_cache.clear()
+        cache.stats.clear()
+        self.old_max_cache_size_bytes = cache.MAX_CACHE_SIZE_BYTES
+
+    def tearDown(self):
+        cache.MAX_CACHE_SIZE_BYTES = self.old_max_cache_size_bytes
+
+    def entry(self, text):
+        return {"text": text, "status_code": 200, "url": "http://example.com"}
+
+    def test_set_and_get(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        assert_equals(self.cache.get_cache_entry({"url": "a"}), self.entry(u"hi there"))
+        assert_equals(self.cache.get_cache_entry({"url": "b"}), None)
+
+    def test_entries_are_compressed(self):
+        page = "<html>" + "<p>hello</p>"*1000 + "</html>"
+        self.cache.set_cache_entry({"url": "a"}, self.entry(page))
+        stored = self.r.get(self.cache._build_hash_key({"url": "a"}))
+        assert_true(len(stored) < len(page)/10)
+        assert_equals(self.cache.get_footprint(), len(stored))
+
+    def test_entries_expire(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        ttl = self.r.ttl(self.cache._build_hash_key({"url": "a"}))
+        assert_true(0 < ttl <= 60)
+
+    def test_reads_uncompressed_entries(self):
+        hash_key = self.cache._build_hash_key({"url": "a"})
+        self.r.set(hash_key, json.dumps(self.entry(u"old style")))
+        cache.local_cache.clear()
+        assert_equals(self.cache.get_cache_entry({"url": "a"}), self.entry(u"old style"))
+
+    def test_overwrite_does_not_double_count(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        footprint = self.cache.get_footprint()
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        assert_equals(self.cache.get_footprint(), footprint)
+
+    def test_evicts_least_recently_used(self):
+        for url in ["a", "b", "c"]:
+            self.cache.set_cache_entry({"url": url}, self.entry(url*100))
+        entry_size = self.cache.get_footprint() / 3
+
+        # touch a, so b is the least recently used
+        cache.local_cache.clear()
+        self.cache.get_cache_entry({"url": "a"})
+        cache.MAX_CACHE_SIZE_BYTES = entry_size * 3
+        self.cache.set_cache_entry({"url": "d"}, self.entry("d"*100))
+        cache.local_cache.clear()
+
+        assert_equals(self.cache.get_cache_entry({"url": "b"}), None)
+        for url in ["a", "c", "d"]:
+            assert_equals(self.cache.get_cache_entry({"url": url})["text"], url*100)
+        assert_true(self.cache.get_footprint() <= cache.MAX_CACHE_SIZE_BYTES)
+
+    def test_expired_entries_are_forgotten_on_store(self):
+        short_lived_cache = UnittestCache(1)
+        short_lived_cache.set_cache_entry({"url": "a"}, self.entry("a"*100))
+        time.sleep(1.1)
+        self.cache.set_cache_entry({"url": "b"}, self.entry("b"*100))
+        stored = self.r.get(self.cache._build_hash_key({"url": "b"}))
+        assert_equals(self.cache.get_footprint(), len(stored))
+        assert_equals(self.r.zcard(cache.LRU_KEY), 1)
+        assert_equals(self.r.zcard(cache.EXPIRY_KEY), 1)
+
+    def test_expired_entries_are_forgotten_on_read(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry("a"*100))
+        self.r.delete(self.cache._build_hash_key({"url": "a"}))  # as its ttl would
+        cache.local_cache.clear()
+        assert_equals(self.cache.get_cache_entry({"url": "a"}), None)
+        assert_equals(self.cache.get_footprint(), 0)
+        assert_equals(self.r.hlen(cache.SIZES_KEY), 0)
+
+    def test_set_cache_entries(self):
+        self.cache.set_cache_entries([
+            ({"url": "a"}, self.entry(u"page a")),
+            ({"url": "b"}, self.entry(u"page b"))])
+        assert_equals(self.cache.get_cache_entry({"url": "a"})["text"], u"page a")
+        assert_equals(self.cache.get_cache_entry({"url": "b"})["text"], u"page b")
+
+    def test_get_cache_entries(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"page a"))
+        self.cache.set_cache_entry({"url": "b"}, self.entry(u"page b"))
+        cache.local_cache.clear()
+        self.cache.get_cache_entry({"url": "a"})
+
+        entries = self.cache.get_cache_entries([{"url": "a"}, {"url": "c"}, {"url": "b"}])
+        assert_equals(entries, [self.entry(u"page a"), None, self.entry(u"page b")])
+        assert_equals(dict(cache.stats), {"redis_hits": 2, "local_hits": 1, "misses": 1})
+
+    def test_does_not_cache_huge_payloads(self):
+        response = self.cache.set_cache_entry({"url": "a"}, self.entry(os.urandom(2*1000*1000).encode("hex")))
+        assert_equals(response, None)
+        assert_equals(self.cache.get_cache_entry({"url": "a"}), None)
+
+    def test_local_tier_serves_without_redis(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        self.r.delete(self.cache._build_hash_key({"url": "a"}))
+        assert_equals(self.cache.get_cache_entry({"url": "a"}), self.entry(u"hi there"))
+        assert_equals(cache.stats["local_hits"], 1)
+
+    def test_redis_hits_fill_local_tier(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        cache.local_cache.clear()
+        self.cache.get_cache_entry({"url": "a"})
+        self.cache.get_cache_entry({"url": "a"})
+        self.cache.get_cache_entry({"url": "b"})
+        assert_equals(dict(cache.stats), {"redis_hits": 1, "local_hits": 1, "misses": 1})
+
+    def test_local_tier_returns_copies(self):
+        self.cache.set_cache_entry({"url": "a"}, self.entry(u"hi there"))
+        self.cache.get_cache_entry({"url": "a"})["status_code"] = 404
+        assert_equals(self.cache.get_cache_entry({"url": "a"})["status_code"], 200)
+
+    def test_local_tier_not_kept_past_freshness(self):
+        data = self.entry(u"hi there")
+        data["cached_at"] = time.time() - 61
+        self.cache.set_cache_entry({"url": "a"}, data)
+        assert_equals(len(cache.local_cache), 0)
+
+    def test_equivalent_urls_share_an_entry(self):
+        self.cache.set_cache_entry({"url": "http://dx.doi.org/10.1/abc/?b=2&a=1&api_key=old"}, self.entry(u"hi there"))
+        cache.local_cache.clear()
+        entry = self.cache.get_cache_entry({"url": "https://DOI.org/10.1/abc?a=1&b=2&api_key=new"})
+        assert_equals(entry, self.entry(u"hi there"))
+
+
+class TestCanonicalUrl():
+
+    def test_drops_credentials_and_sorts_query(self):
+        url = "https://api.github.com/repos/a/b?client_id=1&client_secret=2&z=1&apiKey=3&a=x&a=y"
+        assert_equals(cache.canonical_url(url), "https://api.github.com/repos/a/b?a=x&a=y&z=1")
+
+    def test_normalizes_host_and_path(self):
+        assert_equals(cache.canonical_url("HTTP://Example.COM:80/Path/"), "http://example.com/Path")
+        assert_equals(cache.canonical_url("http://example.com"), "http://example.com/")
+
+    def test_folds_equivalent_hosts(self):
+        assert_equals(cache.canonical_url("http://dx.doi.org/10.1/ABC"), "https://doi.org/10.1/ABC")
+        assert_equals(cache.canonical_url("http://dx.doi.org/10.1/ABC", fold_hosts=False), "http://dx.doi.org/10.1/ABC")
+
+
+class TestLocalCache():
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        local_cache = cache.LocalCache(max_bytes=sys.getsizeof("a"*100)*2, max_age=60)
+        for hash_key in ["a", "b", "c"]:
+            local_cache.set(hash_key, {"text": hash_key*100}, 60)
+        assert_equals(local_cache.get("a"), None)
+        assert_equals(local_cache.get("b"), {"text": "b"*100})
+        assert_equals(len(local_cache), 2)
+
+    def test_expires(self):
+        local_cache = cache.LocalCache(max_bytes=1000, max_age=60)
+        local_cache.set("a", {"text": "a"}, 0.01)
+        time.sleep(0.02)
+        assert_equals(local_cache.get("a"), None)
+        assert_equals(local_cache.num_bytes, 0)
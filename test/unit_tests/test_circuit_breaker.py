@@ -0,0 +1,64 @@
+from nose.tools import assert_equals
+import time
+import redis
+
+from totalimpact import circuit_breaker
+from totalimpact import REDIS_UNITTEST_DATABASE_NUMBER
+
+
+class TestCircuitBreaker():
+
+    def setUp(self):
+        self.r = redis.from_url("redis://localhost:6379", REDIS_UNITTEST_DATABASE_NUMBER)
+        self.r.flushdb()
+        self.breaker = circuit_breaker.CircuitBreaker(self.r, 
+            window_seconds=60, 
+            min_calls=4, 
+            max_failure_rate=0.5, 
+            open_seconds=1)
+
+    def test_stays_closed_below_failure_rate(self):
+        for i in range(3):
+            self.breaker.record_success("mendeley")
+        self.breaker.record_failure("mendeley")
+        assert_equals(self.breaker.state("mendeley"), "closed")
+        assert_equals(self.breaker.allow_request("mendeley"), True)
+
+    def test_needs_min_calls(self):
+        for i in range(3):
+            self.breaker.record_failure("mendeley")
+        assert_equals(self.breaker.state("mendeley"), "closed")
+
+    def test_opens_then_probes(self):
+        for i in range(4):
+            self.breaker.record_failure("mendeley")
+        assert_equals(self.breaker.state("mendeley"), "open")
+        assert_equals(self.breaker.allow_request("mendeley"), False)
+        assert_equals(self.breaker.allow_request("pubmed"), True)
+
+        time.sleep(1.1)
+        assert_equals(self.breaker.state("mendeley"), "half_open")
+        assert_equals(self.breaker.allow_request("mendeley"), True)
+        # only one probe at a time
+        assert_equals(self.breaker.allow_request("mendeley"), False)
+
+        self.breaker.record_success("mendeley")
+        assert_equals(self.breaker.state("mendeley"), "closed")
+        assert_equals(self.breaker.allow_request("mendeley"), True)
+
+    def test_success_from_before_opening_does_not_close(self):
+        for i in range(4):
+            self.breaker.record_failure("mendeley")
+        # a slow call that started while the circuit was still closed
+        self.breaker.record_success("mendeley")
+        time.sleep(1.1)
+        assert_equals(self.breaker.state("mendeley"), "half_open")
+        assert_equals(self.breaker.allow_request("mendeley"), True)
+
+    def test_failed_probe_opens_again(self):
+        for i in range(4):
+            self.breaker.record_failure("mendeley")
+        time.sleep(1.1)
+        assert_equals(self.breaker.allow_request("mendeley"), True)
+        self.breaker.record_failure("mendeley")
+        assert_equals(self.breaker.state("mendeley"), "open")
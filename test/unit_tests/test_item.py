@@ -394,6 +394,19 @@ class TestItem():
         alias_dict = item_module.alias_dict_from_tuples(aliases)
         assert_equals(alias_dict, {'unknown_namespace': ['myname']})
 
+    def test_clean_alias_tuples_for_deduplication(self):
+        alias_tuples = [("DOI", "http://doi.org/10.123/ABC"), ("biblio", {"title": "Hi", "year": 2012}), ("url", "HTTP://a.com")]
+        response = item_module.clean_alias_tuples_for_deduplication(alias_tuples)
+        expected = [item_module.clean_alias_tuple_for_deduplication(alias_tuple) for alias_tuple in alias_tuples]
+        assert_equals(response, expected)
+        assert_equals(response[0], ("doi", "10.123/abc"))
+
+    def test_aliases_not_in_list(self):
+        existing = [("doi", "10.123/abc"), ("url", "http://a.com")]
+        retrieved = [("doi", "http://dx.doi.org/10.123/ABC"), ("doi", "10.123/def"), ("url", "HTTP://A.com")]
+        response = item_module.aliases_not_in_list(retrieved, existing)
+        assert_equals(response, [("doi", "10.123/def")])
+
     def test_as_old_doc(self):
         test_object = item_module.create_objects_from_item_doc(self.ITEM_DATA)        
         new_doc = test_object.as_old_doc()
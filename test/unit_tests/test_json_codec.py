@@ -0,0 +1,52 @@
+from nose.tools import raises, assert_equals
+from nose.plugins.skip import SkipTest
+import json
+
+from totalimpact import json_codec
+
+
+class TestJsonCodec():
+
+    def setUp(self):
+        self.old_redis_codec = json_codec.REDIS_CODEC
+        self.value = {"title": u"Caf\u00e9", "year": 2012, "authors": ["Piwowar", "Priem"]}
+
+    def tearDown(self):
+        json_codec.REDIS_CODEC = self.old_redis_codec
+
+    def test_loads_gives_unicode_like_json(self):
+        text = json.dumps(self.value)
+        response = json_codec.loads(text)
+        assert_equals(response, json.loads(text))
+        assert_equals(type(response["authors"][0]), unicode)
+
+    def test_dumps_is_json(self):
+        assert_equals(json.loads(json_codec.dumps(self.value)), self.value)
+
+    def test_loads_from_redis_reads_json(self):
+        # as stored before there was a choice of codec
+        assert_equals(json_codec.loads_from_redis(json.dumps(self.value)), self.value)
+
+    @raises(TypeError)
+    def test_loads_from_redis_none(self):
+        json_codec.loads_from_redis(None)
+
+    def test_msgpack_roundtrip_and_migration(self):
+        if not json_codec.msgpack:
+            raise SkipTest("msgpack isn't installed")
+        old_value = json_codec.dumps_for_redis(self.value)
+        json_codec.REDIS_CODEC = "msgpack"
+        new_value = json_codec.dumps_for_redis(self.value)
+        assert new_value.startswith(json_codec.MSGPACK_MARKER)
+        assert_equals(json_codec.loads_from_redis(new_value), self.value)
+        assert_equals(json_codec.loads_from_redis(old_value), self.value)
+
+        # and back again
+        json_codec.REDIS_CODEC = "json"
+        assert_equals(json_codec.loads_from_redis(new_value), self.value)
+
+    @raises(ValueError)
+    def test_msgpack_value_without_msgpack(self):
+        if json_codec.msgpack:
+            raise SkipTest("msgpack is installed")
+        json_codec.loads_from_redis(json_codec.MSGPACK_MARKER + "\x81")
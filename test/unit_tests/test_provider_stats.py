@@ -0,0 +1,57 @@
+from nose.tools import assert_equals
+import redis
+
+from totalimpact import provider_stats
+from totalimpact import REDIS_UNITTEST_DATABASE_NUMBER
+
+
+class TestProviderStats():
+
+    def setUp(self):
+        self.r = redis.from_url("redis://localhost:6379", REDIS_UNITTEST_DATABASE_NUMBER)
+        self.r.flushdb()
+        self.stats = provider_stats.ProviderStats(flush_interval_seconds=60*60)
+        provider_stats.set_method_name("metrics")
+
+    def test_latency_bucket(self):
+        assert_equals(provider_stats.latency_bucket(0.01), "latency_ms_le_50")
+        assert_equals(provider_stats.latency_bucket(0.3), "latency_ms_le_500")
+        assert_equals(provider_stats.latency_bucket(25), "latency_ms_over_20000")
+
+    def test_record(self):
+        self.stats.record_cache("github", "hit")
+        self.stats.record_cache("github", "miss")
+        self.stats.record_response("github", 200, 1500, 0.2)
+        provider_stats.set_method_name("biblio")
+        self.stats.record_response("github", 404, 10, 0.02)
+
+        snapshot = self.stats.snapshot()
+        assert_equals(snapshot["github"]["metrics"], {
+            "cache_hit": 1,
+            "cache_miss": 1,
+            "requests": 1,
+            "status_200": 1,
+            "bytes_fetched": 1500,
+            "latency_ms_total": 200,
+            "latency_ms_le_250": 1})
+        assert_equals(snapshot["github"]["biblio"]["status_404"], 1)
+
+    def test_flush_aggregates_in_redis(self):
+        other_process_stats = provider_stats.ProviderStats()
+        self.stats.record_response("github", 200, 1500, 0.2)
+        other_process_stats.record_response("github", 200, 500, 0.2)
+        other_process_stats.record_cache("pubmed", "store_refused")
+        self.stats.flush(self.r)
+        other_process_stats.flush(self.r)
+
+        aggregated = provider_stats.get_aggregated_stats(self.r)
+        assert_equals(aggregated["github"]["metrics"]["bytes_fetched"], 2000)
+        assert_equals(aggregated["github"]["metrics"]["requests"], 2)
+        assert_equals(aggregated["pubmed"]["metrics"]["cache_store_refused"], 1)
+        assert_equals(self.stats.snapshot(), {})
+
+    def test_clear_aggregated_stats(self):
+        self.stats.record_response("github", 200, 1500, 0.2)
+        self.stats.flush(self.r)
+        provider_stats.clear_aggregated_stats(self.r)
+        assert_equals(provider_stats.get_aggregated_stats(self.r), {})
@@ -80,3 +80,15 @@ class TestTiRedis():
         assert_equals(response, {"hi":"lookup"})
 
 
+
+    def test_unreadable_value_is_treated_as_missing(self):
+        # written by a worker with msgpack, read by one without it
+        self.r.set("memberitems:abcd", "\x00msgpack:\x0b")
+        from totalimpact import json_codec
+        saved_msgpack = json_codec.msgpack
+        json_codec.msgpack = None
+        try:
+            response = self.r.get_memberitems_status("abcd")
+        finally:
+            json_codec.msgpack = saved_msgpack
+        assert_equals(response, None)
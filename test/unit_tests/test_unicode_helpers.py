@@ -26,3 +26,12 @@ class TestUnicodeHelpers():
         response = unicode_helpers.remove_nonprinting_characters(unicode_input)
         expected = u"0000-0001-8907-4150"
         assert_equals(response, expected)
+
+    def test_remove_nonprinting_characters_ascii(self):
+        response = unicode_helpers.remove_nonprinting_characters("10.123/abc\t\x7f ")
+        assert_equals(response, "10.123/abc ")
+        assert_equals(type(response), str)
+
+        response = unicode_helpers.remove_nonprinting_characters(u"10.123/abc\n")
+        assert_equals(response, u"10.123/abc")
+        assert_equals(type(response), unicode)
@@ -88,22 +88,8 @@ analytics.identify("CORE", {
 
 
 
-# set up views and database, if necessary
-try:
-    from totalimpact import views
-except exc.ProgrammingError:
-    logger.info("SQLAlchemy database tables not found, so creating them")
-    db.session.rollback()
-    db.create_all()
-    from totalimpact import views
-
-try:
-    from totalimpact import extra_schema 
-except exc.ProgrammingError:
-    logger.info("SQLAlchemy database tables not found, so creating them")
-    db.session.rollback()
-    db.create_all()
-    from totalimpact import extra_schema 
+# set up views.  The database schema is set up by bootstrap.py, once per deploy.
+from totalimpact import views
 
 
 
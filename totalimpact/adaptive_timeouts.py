@@ -0,0 +1,85 @@
+import time
+import logging
+import threading
+import redis
+
+from totalimpact import provider_stats
+
+logger = logging.getLogger("ti.adaptive_timeouts")
+
+PERCENTILE = 0.99
+FACTOR = 3  # a request this many times slower than the provider's p99 is given up on
+MIN_SAMPLES = 50  # use the defaults until a provider has this many recent requests
+REFRESH_SECONDS = 60  # how long a process keeps using a computed timeout
+
+# http_get timeout, per request
+DEFAULT_HTTP_TIMEOUT = 20
+MIN_HTTP_TIMEOUT = 2
+MAX_HTTP_TIMEOUT = 20
+
+# provider_run timeout, for all the requests of one provider method
+DEFAULT_TASK_TIMEOUT = 30
+MIN_TASK_TIMEOUT = 10
+MAX_TASK_TIMEOUT = 30
+TASK_TIMEOUT_FACTOR = 3  # methods often make a few requests
+
+
+def _clamp(value, floor, ceiling):
+    return max(floor, min(value, ceiling))
+
+
+class AdaptiveTimeouts(object):
+    """ Timeouts per provider from the p99 of its latency over the last hour,
+        as recorded by provider_stats, within floors and ceilings """
+
+    def __init__(self, client=None, refresh_seconds=REFRESH_SECONDS):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self._http_timeouts = {}  # provider_name: (timeout, computed_at)
+        self._lock = threading.Lock()
+
+    def _compute_http_timeout(self, provider_name):
+        try:
+            latency_counts = provider_stats.get_recent_latency_counts(provider_name, self.client)
+        except redis.RedisError:
+            logger.warning(u"Unable to get latencies for {provider_name}, using default timeout".format(
+                provider_name=provider_name))
+            return DEFAULT_HTTP_TIMEOUT
+        if sum(latency_counts.values()) < MIN_SAMPLES:
+            return DEFAULT_HTTP_TIMEOUT
+        p99 = provider_stats.latency_percentile(latency_counts, PERCENTILE)
+        if p99 is None:
+            return MAX_HTTP_TIMEOUT
+        return _clamp(p99 * FACTOR, MIN_HTTP_TIMEOUT, MAX_HTTP_TIMEOUT)
+
+    def http_timeout(self, provider_name):
+        now = time.time()
+        with self._lock:
+            if provider_name in self._http_timeouts:
+                (timeout, computed_at) = self._http_timeouts[provider_name]
+                if (now - computed_at) < self.refresh_seconds:
+                    return timeout
+        timeout = self._compute_http_timeout(provider_name)
+        with self._lock:
+            self._http_timeouts[provider_name] = (timeout, now)
+        return timeout
+
+    def task_timeout(self, provider_name):
+        http_timeout = self.http_timeout(provider_name)
+        if http_timeout == DEFAULT_HTTP_TIMEOUT:
+            return DEFAULT_TASK_TIMEOUT
+        return _clamp(http_timeout * TASK_TIMEOUT_FACTOR, MIN_TASK_TIMEOUT, MAX_TASK_TIMEOUT)
+
+    def clear(self):
+        with self._lock:
+            self._http_timeouts = {}
+
+
+timeouts = AdaptiveTimeouts()
+
+def http_timeout(provider_name):
+    return timeouts.http_timeout(provider_name)
+
+def task_timeout(provider_name):
+    return timeouts.task_timeout(provider_name)
+
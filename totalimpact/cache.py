@@ -3,70 +3,383 @@ import sys
 import hashlib
 import logging
 import json
+import zlib
+import time
+import uuid
+import threading
+import urllib
+import urlparse
+from collections import OrderedDict, Counter
 from cPickle import PicklingError
 import redis
 
 from totalimpact import REDIS_CACHE_DATABASE_NUMBER
+from totalimpact import json_codec
 
 # set up logging
 logger = logging.getLogger("ti.cache")
 
 cache_client = redis.from_url(os.getenv("REDIS_URL"), REDIS_CACHE_DATABASE_NUMBER)
 
-MAX_PAYLOAD_SIZE_BYTES = 1000*1000 # 1mb
-MAX_CACHE_SIZE_BYTES = 100*1000*1000 #100mb
+MAX_PAYLOAD_SIZE_BYTES = 1000*1000 # 1mb, before compression
+MAX_CACHE_SIZE_BYTES = 100*1000*1000 #100mb of compressed entries, least recently used evicted past this
+# pages with an ETag or Last-Modified are kept past max_cache_age so they can be revalidated
+MAX_REVALIDATION_AGE = 60*60*24*8  # a bit over a week, to cover weekly refreshes
+
+# in-process tier in front of redis, holding decoded entries
+LOCAL_CACHE_MAX_BYTES = 20*1000*1000  #20mb per process
+LOCAL_CACHE_MAX_AGE = 60  # seconds, so entries refreshed by other workers are picked up
+
+# how long one worker may hold the right to fetch a url before others give up waiting
+LEASE_SECONDS = 30
+
+# bookkeeping for the cache's own footprint
+LRU_KEY = "cache:lru"  # sorted set of entry keys, scored by last use
+SIZES_KEY = "cache:sizes"  # hash of entry key to stored bytes
+TOTAL_BYTES_KEY = "cache:bytes"
+EXPIRY_KEY = "cache:expiry"  # sorted set of entry keys, scored by when their ttl runs out
+MAX_EXPIRED_PRUNED = 100  # per store, so one store never does unbounded work
+
+# lua to drop an entry and its bookkeeping, whether or not its ttl has already removed it
+FORGET_ENTRY_LUA = """
+local function forget(entry_key, lru_key, sizes_key, total_bytes_key, expiry_key)
+    local size = tonumber(redis.call("hget", sizes_key, entry_key) or "0")
+    redis.call("del", entry_key)
+    redis.call("zrem", lru_key, entry_key)
+    redis.call("zrem", expiry_key, entry_key)
+    redis.call("hdel", sizes_key, entry_key)
+    return redis.call("incrby", total_bytes_key, -size)
+end
+"""
+
+# stores an entry with its ttl in a single SET, forgets entries whose ttl has
+# run out, then evicts least recently used entries until the cache is back 
+# under its size limit
+SET_ENTRY_SCRIPT = cache_client.register_script(FORGET_ENTRY_LUA + """
+local entry_key = KEYS[1]
+local lru_key, sizes_key, total_bytes_key, expiry_key = KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local value, expire_seconds, now, max_bytes = ARGV[1], ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[4])
+local max_expired_pruned = tonumber(ARGV[5])
+
+local old_size = tonumber(redis.call("hget", sizes_key, entry_key) or "0")
+local new_size = string.len(value)
+redis.call("set", entry_key, value, "EX", expire_seconds)
+redis.call("zadd", lru_key, now, entry_key)
+redis.call("zadd", expiry_key, now + tonumber(expire_seconds), entry_key)
+redis.call("hset", sizes_key, entry_key, new_size)
+local total_bytes = redis.call("incrby", total_bytes_key, new_size - old_size)
+
+local expired = redis.call("zrangebyscore", expiry_key, "-inf", now, "LIMIT", 0, max_expired_pruned)
+for i, expired_key in ipairs(expired) do
+    total_bytes = forget(expired_key, lru_key, sizes_key, total_bytes_key, expiry_key)
+end
+
+while total_bytes > max_bytes do
+    local oldest = redis.call("zrange", lru_key, 0, 0)
+    if (#oldest == 0) or (oldest[1] == entry_key) then
+        break
+    end
+    total_bytes = forget(oldest[1], lru_key, sizes_key, total_bytes_key, expiry_key)
+end
+return total_bytes
+""")
+
+# reads an entry and marks it as recently used, or forgets its bookkeeping 
+# if its ttl has removed it
+GET_ENTRY_SCRIPT = cache_client.register_script(FORGET_ENTRY_LUA + """
+local value = redis.call("get", KEYS[1])
+if value then
+    redis.call("zadd", KEYS[2], ARGV[1], KEYS[1])
+elseif redis.call("hexists", KEYS[3], KEYS[1]) == 1 then
+    forget(KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5])
+end
+return value
+""")
+
+# only delete the lease if it is still ours, not one acquired after ours expired
+RELEASE_LEASE_SCRIPT = cache_client.register_script("""
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+""")
+
+# query parameters that carry credentials, left out of cache keys so rotating a key keeps the cache warm
+CREDENTIAL_PARAMS = set(["client_id", "client_secret", "api_key", "apikey", "access_token", "key", "insttoken"])
+
+# hosts that serve the same pages, folded onto one scheme and host in cache keys
+EQUIVALENT_HOSTS = {
+    "dx.doi.org": ("https", "doi.org"),
+    "doi.org": ("https", "doi.org"),
+    "www.doi.org": ("https", "doi.org")
+}
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
 
 class CacheException(Exception):
     pass
 
+
+def canonical_url(url, fold_hosts=True):
+    """ Normalizes a url for use in a cache key: credentials dropped, query 
+        sorted, host lowercased and trailing slash removed.  Never requested. """
+    if isinstance(url, unicode):
+        url = url.encode("utf-8")
+    try:
+        (scheme, netloc, path, query, fragment) = urlparse.urlsplit(url)
+    except (AttributeError, ValueError):
+        return url
+    scheme = scheme.lower()
+    host = netloc.lower()
+    if ":" in host:
+        (hostname, port) = host.rsplit(":", 1)
+        if DEFAULT_PORTS.get(scheme) == port:
+            host = hostname
+    if fold_hosts and host in EQUIVALENT_HOSTS:
+        (scheme, host) = EQUIVALENT_HOSTS[host]
+
+    if path.endswith("/"):
+        path = path.rstrip("/")
+    if not path:
+        path = "/"
+
+    params = [(name, value) for (name, value) in urlparse.parse_qsl(query, keep_blank_values=True)
+                if name.lower() not in CREDENTIAL_PARAMS]
+    # stable sort, so repeated parameters keep their order
+    params.sort(key=lambda param: param[0])
+    query = urllib.urlencode(params)
+
+    return urlparse.urlunsplit((scheme, host, path, query, ""))
+
+
+
+def _encode_within(data, max_bytes):
+    """ The compressed entry, or None if it is over max_bytes before compression """
+    value = json_codec.dumps_for_redis(data)
+    if len(value) > max_bytes:
+        return None
+    return zlib.compress(value)
+
+def _decode(value):
+    try:
+        value = zlib.decompress(value)
+    except zlib.error:
+        pass  # stored before entries were compressed
+    return json_codec.loads_from_redis(value)
+
+
+class LocalCache(object):
+    """ Bounded, thread-safe, in-process LRU of decoded cache entries """
+
+    def __init__(self, max_bytes=LOCAL_CACHE_MAX_BYTES, max_age=LOCAL_CACHE_MAX_AGE):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.num_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, hash_key):
+        with self._lock:
+            try:
+                (data, size, expires_at) = self._entries.pop(hash_key)
+            except KeyError:
+                return None
+            if expires_at < time.time():
+                self.num_bytes -= size
+                return None
+            # re-insert as the most recently used
+            self._entries[hash_key] = (data, size, expires_at)
+        return dict(data)
+
+    def set(self, hash_key, data, max_age):
+        size = sys.getsizeof(data.get("text"))
+        expires_at = time.time() + min(max_age, self.max_age)
+        with self._lock:
+            self._remove(hash_key)
+            if (size > self.max_bytes) or (expires_at <= time.time()):
+                return
+            self._entries[hash_key] = (dict(data), size, expires_at)
+            self.num_bytes += size
+            while self.num_bytes > self.max_bytes:
+                (evicted_key, (evicted_data, evicted_size, evicted_expires_at)) = self._entries.popitem(last=False)
+                self.num_bytes -= evicted_size
+
+    def _remove(self, hash_key):
+        try:
+            (data, size, expires_at) = self._entries.pop(hash_key)
+            self.num_bytes -= size
+        except KeyError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.num_bytes = 0
+
+
+local_cache = LocalCache()
+
+# hits per tier and misses, for this process
+stats = Counter()
+
+
 class Cache(object):
-    """ Maintains a cache of URL responses in memcached """
+    """ Maintains a size-bounded cache of compressed URL responses in redis,
+        with recently used entries also kept decoded in process """
 
     def _build_hash_key(self, key):
-        json_key = json.dumps(key)
+        if isinstance(key, dict) and ("url" in key):
+            key = dict(key, url=canonical_url(key["url"]))
+        json_key = json.dumps(key, sort_keys=True)
         hash_key = hashlib.md5(json_key.encode("utf-8")).hexdigest()
         return hash_key
 
     def _get_client(self):
         return cache_client
  
-    def __init__(self, max_cache_age=60*60):  #one hour
+    def __init__(self, max_cache_age=60*60, max_stale_age=0):  #one hour
         self.max_cache_age = max_cache_age
-        self.flush_cache()
-
-    def flush_cache(self):
-        #empties the cache
-        mc = self._get_client()        
-        # mc.flushdb()
-
+        # entries are kept this much longer so they can be served stale while being refreshed
+        self.max_stale_age = max_stale_age
     def get_cache_entry(self, key):
         """ Get an entry from the cache, returns None if not found """
-        mc = self._get_client()
         hash_key = self._build_hash_key(key)
-        response = mc.get(hash_key)
+        response = local_cache.get(hash_key)
         if response:
-            response = json.loads(response)
+            stats["local_hits"] += 1
+            return response
+
+        mc = self._get_client()
+        response = GET_ENTRY_SCRIPT(keys=[hash_key, LRU_KEY, SIZES_KEY, TOTAL_BYTES_KEY, EXPIRY_KEY], 
+                                    args=[time.time()], client=mc)
+        if response:
+            stats["redis_hits"] += 1
+            response = _decode(response)
+            self._set_local_entry(hash_key, response)
+        else:
+            stats["misses"] += 1
         return response
 
+    def get_cache_entries(self, keys):
+        """ Get several entries in one round trip to redis.  Returns a list 
+            in the same order as keys, with None for entries not found """
+        hash_keys = [self._build_hash_key(key) for key in keys]
+        responses = [local_cache.get(hash_key) for hash_key in hash_keys]
+        stats["local_hits"] += len([response for response in responses if response])
+
+        missing = [i for (i, response) in enumerate(responses) if not response]
+        if not missing:
+            return responses
+
+        pipe = self._get_client().pipeline(transaction=False)
+        now = time.time()
+        for i in missing:
+            GET_ENTRY_SCRIPT(keys=[hash_keys[i], LRU_KEY, SIZES_KEY, TOTAL_BYTES_KEY, EXPIRY_KEY], 
+                            args=[now], client=pipe)
+        for (i, value) in zip(missing, pipe.execute()):
+            if value:
+                stats["redis_hits"] += 1
+                responses[i] = _decode(value)
+                self._set_local_entry(hash_keys[i], responses[i])
+            else:
+                stats["misses"] += 1
+        return responses
+
+    def _set_local_entry(self, hash_key, data):
+        # don't keep it locally past when the provider would consider it stale
+        max_age = self.max_cache_age
+        if "cached_at" in data:
+            max_age = data["cached_at"] + self.max_cache_age - time.time()
+        local_cache.set(hash_key, data, max_age)
+
+    def get_footprint(self):
+        """ Bytes of compressed entries currently stored, as tracked by the cache """
+        mc = self._get_client()
+        return int(mc.get(TOTAL_BYTES_KEY) or 0)
+
+    def _expire_seconds(self, data):
+        expire_seconds = self.max_cache_age + self.max_stale_age
+        if data.get("etag") or data.get("last_modified"):
+            return max(expire_seconds, MAX_REVALIDATION_AGE)
+        return expire_seconds
+
+    def _encode_entry(self, data):
+        value = _encode_within(data, MAX_PAYLOAD_SIZE_BYTES)
+        if not value:
+            logger.debug(u"Not caching because payload is too large")
+            return None
+        return value
+
+    def _set_entry(self, client, key, value, data):
+        hash_key = self._build_hash_key(key)
+        self._set_local_entry(hash_key, data)
+        return SET_ENTRY_SCRIPT(
+            keys=[hash_key, LRU_KEY, SIZES_KEY, TOTAL_BYTES_KEY, EXPIRY_KEY], 
+            args=[value, self._expire_seconds(data), time.time(), MAX_CACHE_SIZE_BYTES, MAX_EXPIRED_PRUNED], 
+            client=client)
+
     def set_cache_entry(self, key, data):
         """ Store a cache entry """
 
-        if sys.getsizeof(data["text"]) > MAX_PAYLOAD_SIZE_BYTES:
-            logger.debug(u"Not caching because payload is too large")
+        value = self._encode_entry(data)
+        if not value:
             return None
 
         mc = self._get_client()
+        try:
+            self._set_entry(mc, key, value, data)
+        except redis.RedisError:
+            logger.warning("Unable to store into Redis. Make sure redis server is running.")
+            raise CacheException("Unable to store into Redis. Make sure redis server is running.")
+        return True
 
-        if mc.info()["used_memory"] >= MAX_CACHE_SIZE_BYTES:
-            logger.debug(u"Not caching because redis cache is too full")
-            return None
+    def set_cache_entries(self, entries):
+        """ Store a list of (key, data) cache entries in one round trip.
+            Returns the number of entries stored """
 
-        hash_key = self._build_hash_key(key)
-        set_response = mc.set(hash_key, json.dumps(data))
-        mc.expire(hash_key, self.max_cache_age)
+        mc = self._get_client()
+        pipe = mc.pipeline(transaction=False)
+        num_entries = 0
+        for (key, data) in entries:
+            value = self._encode_entry(data)
+            if value:
+                self._set_entry(pipe, key, value, data)
+                num_entries += 1
+        if not num_entries:
+            return 0
 
-        if not set_response:
+        try:
+            pipe.execute()
+        except redis.RedisError:
             logger.warning("Unable to store into Redis. Make sure redis server is running.")
             raise CacheException("Unable to store into Redis. Make sure redis server is running.")
-        return set_response
-  
+        return num_entries
+
+    def mark_refreshing(self, key, seconds=LEASE_SECONDS):
+        """ Returns True if nobody else has started refreshing the entry for key recently """
+        mc = self._get_client()
+        return bool(mc.set("refreshing:" + self._build_hash_key(key), 1, ex=seconds, nx=True))
+
+    def _build_lease_key(self, key):
+        return "lease:" + self._build_hash_key(key)
+
+    def acquire_lease(self, key, lease_seconds=LEASE_SECONDS):
+        """ Claim the right to fill the entry for key.  Returns a token 
+            to release the lease with, or None if another worker holds it """
+        mc = self._get_client()
+        token = uuid.uuid4().hex
+        if mc.set(self._build_lease_key(key), token, ex=lease_seconds, nx=True):
+            return token
+        return None
+
+    def release_lease(self, key, token):
+        mc = self._get_client()
+        return RELEASE_LEASE_SCRIPT(keys=[self._build_lease_key(key)], args=[token], client=mc)
+
+    def is_leased(self, key):
+        mc = self._get_client()
+        return mc.exists(self._build_lease_key(key))
@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+import redis
+
+from totalimpact import REDIS_MAIN_DATABASE_NUMBER
+
+logger = logging.getLogger("ti.circuit_breaker")
+
+breaker_client = redis.from_url(os.getenv("REDIS_URL"), REDIS_MAIN_DATABASE_NUMBER)
+
+WINDOW_SECONDS = 60  # failure rate is measured over windows this long
+MIN_CALLS = 10  # don't judge a provider on fewer calls than this in a window
+MAX_FAILURE_RATE = 0.5
+OPEN_SECONDS = 30  # how long to fail fast before letting a probe call through
+TRIPPED_EXPIRE_SECONDS = 60*60*24  # forget a broken circuit nobody has probed in a day
+KEY_PREFIX = "circuit:"
+
+# a success only closes the circuit if it is the probe's, so it has to still 
+# find the probe there: not one from a call that started before the circuit opened
+CLOSE_IF_PROBE_LUA = """
+if redis.call("del", KEYS[1]) == 1 then
+    redis.call("del", KEYS[2])
+    return 1
+end
+return 0
+"""
+
+
+class CircuitBreaker(object):
+    """ Shared across workers through redis, one circuit per provider.
+
+        Closed: calls go through, and calls and failures are counted per window.
+        Open: once too many calls in a window fail, calls fail fast for open_seconds.
+        Half open: after that, one probe call at a time goes through.  If it
+        succeeds the circuit closes, if it fails the circuit opens again. """
+
+    def __init__(self,
+            client=None,
+            window_seconds=WINDOW_SECONDS,
+            min_calls=MIN_CALLS,
+            max_failure_rate=MAX_FAILURE_RATE,
+            open_seconds=OPEN_SECONDS):
+        self.client = client or breaker_client
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.max_failure_rate = max_failure_rate
+        self.open_seconds = open_seconds
+        self._close_if_probe = self.client.register_script(CLOSE_IF_PROBE_LUA)
+
+    def _key(self, name, suffix):
+        return KEY_PREFIX + name + ":" + suffix
+
+    def _window_keys(self, name):
+        window = str(int(time.time() / self.window_seconds))
+        return (self._key(name, "calls:" + window), self._key(name, "failures:" + window))
+
+    def allow_request(self, name):
+        """ Returns False if calls to this provider should fail fast """
+        try:
+            (is_open, is_tripped) = self.client.mget(
+                [self._key(name, "open"), self._key(name, "tripped")])
+            if is_open:
+                return False
+            if is_tripped:
+                # half open, let one probe through
+                return bool(self.client.set(self._key(name, "probe"), 1, ex=self.open_seconds, nx=True))
+        except redis.RedisError:
+            logger.warning(u"Unable to check circuit for {name}, allowing call".format(name=name))
+        return True
+
+    def record_success(self, name):
+        (calls_key, failures_key) = self._window_keys(name)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incr(calls_key)
+            pipe.expire(calls_key, self.window_seconds*2)
+            # closes the circuit if a probe is out, otherwise just counts the call
+            self._close_if_probe(keys=[self._key(name, "probe"), self._key(name, "tripped")], client=pipe)
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning(u"Unable to record success for {name}".format(name=name))
+
+    def record_failure(self, name):
+        (calls_key, failures_key) = self._window_keys(name)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incr(calls_key)
+            pipe.expire(calls_key, self.window_seconds*2)
+            pipe.incr(failures_key)
+            pipe.expire(failures_key, self.window_seconds*2)
+            pipe.get(self._key(name, "tripped"))
+            (num_calls, ignore, num_failures, ignore, is_tripped) = pipe.execute()
+
+            if is_tripped:
+                logger.warning(u"Probe call to {name} failed, circuit open again".format(name=name))
+                self._open(name)
+            elif (num_calls >= self.min_calls) and (float(num_failures) / num_calls >= self.max_failure_rate):
+                logger.warning(u"{num_failures} of {num_calls} calls to {name} failed, opening circuit".format(
+                    num_failures=num_failures, num_calls=num_calls, name=name))
+                self._open(name)
+        except redis.RedisError:
+            logger.warning(u"Unable to record failure for {name}".format(name=name))
+
+    def _open(self, name):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key(name, "open"), 1, ex=self.open_seconds)
+        pipe.set(self._key(name, "tripped"), 1, ex=TRIPPED_EXPIRE_SECONDS)
+        pipe.delete(self._key(name, "probe"))
+        # start counting afresh once closed again
+        pipe.delete(*self._window_keys(name))
+        pipe.execute()
+
+    def state(self, name):
+        """ closed, open or half_open """
+        (is_open, is_tripped) = self.client.mget(
+            [self._key(name, "open"), self._key(name, "tripped")])
+        if is_open:
+            return "open"
+        if is_tripped:
+            return "half_open"
+        return "closed"
+
@@ -43,6 +43,11 @@ def create_doaj_view():
     result = db.session.execute(doaj_setup_sql)
     db.session.commit()
 
-create_view_min_biblio()    
-create_doaj_table()    
-create_doaj_view()    
\ No newline at end of file
+
+def create_schema():
+    """ Tables for the models, then the views and tables they don't cover.
+        Run once per deploy with bootstrap.py, not on every process start. """
+    db.create_all()
+    create_view_min_biblio()
+    create_doaj_table()
+    create_doaj_view()
@@ -5,7 +5,7 @@ from celery.result import AsyncResult
 
 from totalimpact.providers.provider import ProviderFactory
 from totalimpact.providers.provider import ProviderTimeout, ProviderServerError
-from totalimpact.providers.provider import normalize_alias
+from totalimpact.providers.provider import normalize_alias, normalize_aliases
 from totalimpact import unicode_helpers
 
 from totalimpact import default_settings
@@ -1167,6 +1167,23 @@ def create_tiids_from_aliases(profile_id, aliases, analytics_credentials, myredi
     return tiid_alias_mapping
 
 
+def create_tiids_from_alias_chunks(profile_id, alias_chunks, existing_tiids, analytics_credentials, myredis, 
+        provider=None, tiid_alias_mapping=None):
+    """ create_tiids_from_aliases for each list of aliases as it arrives, so
+        the first items start updating while later ones are still being found.
+        Aliases already in existing_tiids are skipped.  If tiid_alias_mapping is
+        given it is filled in as items are made, so callers still know what was
+        made if a later chunk raises. """
+    aliases_from_existing_items = alias_tuples_for_deduplication_from_tiids(existing_tiids)
+    if tiid_alias_mapping is None:
+        tiid_alias_mapping = {}
+    for aliases in alias_chunks:
+        new_aliases = aliases_not_in_list(aliases, aliases_from_existing_items)
+        if new_aliases:
+            tiid_alias_mapping.update(create_tiids_from_aliases(profile_id, new_aliases, analytics_credentials, myredis, provider))
+    return tiid_alias_mapping
+
+
 def get_items_from_tiids(tiids, with_metrics=True):
     items = []
     for tiid in tiids:
@@ -1255,14 +1272,31 @@ def clean_alias_tuple_for_deduplication(alias_tuple):
         biblios_as_string = json.dumps(biblio_dict_for_deduplication, sort_keys=True, indent=0, separators=(',', ':'))
         return ("biblio", biblios_as_string.lower())
     else:
-        (ns, nid) = normalize_alias((ns, nid))
-        try:
-            cleaned_alias = (ns.lower(), nid.lower())
-        except AttributeError:
-            logger.debug(u"problem cleaning {alias_tuple}".format(
-                alias_tuple=alias_tuple))
-            cleaned_alias = alias_tuple
-        return cleaned_alias
+        return _lowercase_normalized_alias(alias_tuple, normalize_alias((ns, nid)))
+
+def _lowercase_normalized_alias(alias_tuple, normalized_alias):
+    (ns, nid) = normalized_alias
+    try:
+        cleaned_alias = (ns.lower(), nid.lower())
+    except AttributeError:
+        logger.debug(u"problem cleaning {alias_tuple}".format(
+            alias_tuple=alias_tuple))
+        cleaned_alias = alias_tuple
+    return cleaned_alias
+
+def clean_alias_tuples_for_deduplication(alias_tuples):
+    """ clean_alias_tuple_for_deduplication for each of a list of alias tuples,
+        normalizing all the non-biblio ones in one go """
+    non_biblio_tuples = [alias_tuple for alias_tuple in alias_tuples if alias_tuple[0] != "biblio"]
+    normalized = iter(normalize_aliases(non_biblio_tuples))
+
+    cleaned_tuples = []
+    for alias_tuple in alias_tuples:
+        if alias_tuple[0] == "biblio":
+            cleaned_tuples.append(clean_alias_tuple_for_deduplication(alias_tuple))
+        else:
+            cleaned_tuples.append(_lowercase_normalized_alias(alias_tuple, normalized.next()))
+    return cleaned_tuples
 
 
 def alias_tuples_for_deduplication(item):
@@ -1276,27 +1310,42 @@ def alias_tuples_for_deduplication(item):
         # logger.debug(u"tiid={tiid}, for provider {provider} is a new alias {alias_tuple}".format(
         #     tiid=item.tiid, provider=provider, alias_tuple=alias_tuple))
 
-    cleaned_tuples = [clean_alias_tuple_for_deduplication(alias_tuple) for alias_tuple in alias_tuples]
+    cleaned_tuples = clean_alias_tuples_for_deduplication(alias_tuples)
     cleaned_tuples = [alias_tuple for alias_tuple in cleaned_tuples if alias_tuple != ("biblio", '{}')]
 
     # logger.debug(u"tiid={tiid}, cleaned_tuples {cleaned_tuples}".format(
     #     tiid=item.tiid, cleaned_tuples=cleaned_tuples))
     return cleaned_tuples
 
-def aliases_not_in_existing_tiids(retrieved_aliases, existing_tiids):
-    new_aliases = []
-    if not existing_tiids:
-        return retrieved_aliases
-    existing_items = Item.query.filter(Item.tiid.in_(existing_tiids)).all()
+def alias_tuples_for_deduplication_from_tiids(tiids):
+    if not tiids:
+        return []
+    existing_items = Item.query.filter(Item.tiid.in_(tiids)).all()
 
     aliases_from_all_items = []
     for item in existing_items:
         # logger.debug(u"getting alias_tuples_for_deduplication for tiid={tiid}".format(
         #      tiid=item.tiid))
         aliases_from_all_items += alias_tuples_for_deduplication(item)
+    return aliases_from_all_items
 
-    for alias_tuple in retrieved_aliases:
-        if is_equivalent_alias_tuple_in_list(alias_tuple, aliases_from_all_items):
+def aliases_not_in_existing_tiids(retrieved_aliases, existing_tiids):
+    if not existing_tiids:
+        return retrieved_aliases
+    aliases_from_all_items = alias_tuples_for_deduplication_from_tiids(existing_tiids)
+    return aliases_not_in_list(retrieved_aliases, aliases_from_all_items)
+
+def aliases_not_in_list(retrieved_aliases, aliases_from_all_items):
+    # a set, so each lookup doesn't scan every alias of every item
+    try:
+        aliases_from_all_items = set(aliases_from_all_items)
+    except TypeError:
+        pass  # something unhashable that couldn't be cleaned; scan the list then
+    cleaned_retrieved_aliases = clean_alias_tuples_for_deduplication(retrieved_aliases)
+
+    new_aliases = []
+    for (alias_tuple, cleaned_alias) in zip(retrieved_aliases, cleaned_retrieved_aliases):
+        if cleaned_alias in aliases_from_all_items:
             # logger.debug(u"already have alias {alias_tuple}".format(
             #     alias_tuple=alias_tuple))
             pass
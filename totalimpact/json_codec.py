@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+import simplejson
+
+logger = logging.getLogger("ti.json_codec")
+
+# json, simplejson or ujson.  All write plain json, so this can be changed
+# on a running deployment.
+JSON_CODEC = os.getenv("JSON_CODEC", "simplejson")
+# json or msgpack, for values that are only ever read back through this module
+# from redis.  Either kind of value is readable whichever is set.
+REDIS_CODEC = os.getenv("REDIS_CODEC", "json")
+
+# json text never starts with a NUL, so older json values are told apart
+MSGPACK_MARKER = "\x00msgpack:"
+
+
+def _simplejson_loads(value):
+    # given a str, simplejson returns str for ascii-only strings where json
+    # returns unicode.  Given unicode it returns unicode too.
+    if isinstance(value, str):
+        value = value.decode("utf-8")
+    return simplejson.loads(value)
+
+# (dumps, loads).  simplejson's decoder is faster than json's, its encoder isn't.
+JSON_CODECS = {
+    "json": (json.dumps, json.loads),
+    "simplejson": (json.dumps, _simplejson_loads)
+}
+
+try:
+    import ujson
+    JSON_CODECS["ujson"] = (ujson.dumps, ujson.loads)
+except ImportError:
+    pass
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _json_codec(name):
+    if name not in JSON_CODECS:
+        logger.warning(u"JSON_CODEC {name} isn't available, using simplejson".format(
+            name=name))
+        name = "simplejson"
+    return JSON_CODECS[name]
+
+(_dumps, _loads) = _json_codec(JSON_CODEC)
+
+if (REDIS_CODEC == "msgpack") and not msgpack:
+    logger.warning(u"REDIS_CODEC msgpack isn't installed, using json")
+    REDIS_CODEC = "json"
+
+
+def dumps(value):
+    """ value as json text, for anything that isn't only read by this module """
+    return _dumps(value)
+
+def loads(value):
+    return _loads(value)
+
+def dumps_for_redis(value):
+    if REDIS_CODEC == "msgpack":
+        return MSGPACK_MARKER + msgpack.packb(value)
+    return _dumps(value)
+
+def loads_from_redis(value):
+    """ Reads what dumps_for_redis wrote under either REDIS_CODEC.
+        Raises TypeError if value is None, like json does. """
+    if value is None:
+        raise TypeError("no value to decode")
+    if value.startswith(MSGPACK_MARKER):
+        if not msgpack:
+            raise ValueError("value is msgpack, which isn't installed")
+        return msgpack.unpackb(value[len(MSGPACK_MARKER):], encoding="utf-8")
+    return _loads(value)
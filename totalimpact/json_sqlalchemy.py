@@ -1,10 +1,11 @@
 # from https://gist.github.com/dbarnett/1730610
 
-import json
 import sqlalchemy
 from sqlalchemy import String
 from sqlalchemy.ext.mutable import Mutable
 
+from totalimpact import json_codec
+
 class JSONEncodedObj(sqlalchemy.types.TypeDecorator):
     """Represents an immutable structure as a json-encoded string."""
 
@@ -12,13 +13,13 @@ class JSONEncodedObj(sqlalchemy.types.TypeDecorator):
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            value = json.dumps(value)
+            value = json_codec.dumps(value)
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
             try:
-                value = json.loads(value)
+                value = json_codec.loads(value)
             except:
                 return value
         return value
@@ -0,0 +1,189 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+import redis
+
+from totalimpact import REDIS_MAIN_DATABASE_NUMBER
+
+logger = logging.getLogger("ti.provider_stats")
+
+stats_client = redis.from_url(os.getenv("REDIS_URL"), REDIS_MAIN_DATABASE_NUMBER)
+
+# upper bounds of the upstream latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000]
+FLUSH_INTERVAL_SECONDS = 10
+STATS_KEY_PREFIX = "provider_stats:"
+STATS_KEYS_SET = "provider_stats_keys"
+STATS_EXPIRE_SECONDS = 60*60*24*7  # a week since the last activity
+# latency histograms are also kept per provider in short windows, for recent percentiles
+LATENCY_KEY_PREFIX = "provider_latency:"
+LATENCY_WINDOW_SECONDS = 60*10
+LATENCY_NUM_WINDOWS = 6  # percentiles cover the last hour
+
+# which provider method (aliases, biblio, metrics, members) this thread is running
+_context = threading.local()
+
+def set_method_name(method_name):
+    _context.method_name = method_name
+
+def get_method_name():
+    return getattr(_context, "method_name", "unknown")
+
+
+def latency_window(now=None):
+    return int((now or time.time()) / LATENCY_WINDOW_SECONDS)
+
+def latency_bucket(latency_seconds):
+    latency_ms = latency_seconds * 1000
+    for upper_bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= upper_bound:
+            return "latency_ms_le_{upper_bound}".format(upper_bound=upper_bound)
+    return "latency_ms_over_{upper_bound}".format(upper_bound=LATENCY_BUCKETS_MS[-1])
+
+
+class ProviderStats(object):
+    """ Counts cache outcomes and upstream responses per provider and method
+        in this process, and periodically adds them to totals in redis """
+
+    def __init__(self, flush_interval_seconds=FLUSH_INTERVAL_SECONDS):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._counts = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+
+    def incr(self, provider_name, counter_name, amount=1, method_name=None):
+        if not method_name:
+            method_name = get_method_name()
+        with self._lock:
+            self._counts[(provider_name, method_name)][counter_name] += amount
+
+    def record_cache(self, provider_name, outcome):
+        """ outcome is one of hit, miss, revalidated, store_refused """
+        self.incr(provider_name, "cache_" + outcome)
+        self.maybe_flush()
+
+    def record_response(self, provider_name, status_code, num_bytes, latency_seconds):
+        method_name = get_method_name()
+        with self._lock:
+            counts = self._counts[(provider_name, method_name)]
+            counts["requests"] += 1
+            counts["status_{status_code}".format(status_code=status_code)] += 1
+            counts["bytes_fetched"] += num_bytes
+            counts["latency_ms_total"] += int(latency_seconds * 1000)
+            counts[latency_bucket(latency_seconds)] += 1
+        self.maybe_flush()
+
+    def record_timeout(self, provider_name):
+        """ A timed out request never finished, so it goes in the open-ended top 
+            latency bucket.  Otherwise percentiles only see requests that beat the 
+            current timeout, and a provider that slows down keeps a timeout 
+            that's too short. """
+        method_name = get_method_name()
+        with self._lock:
+            counts = self._counts[(provider_name, method_name)]
+            counts["timeouts"] += 1
+            counts[latency_bucket(float("inf"))] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        """ Counts not yet flushed, as {provider: {method: {counter: value}}} """
+        response = defaultdict(dict)
+        with self._lock:
+            for ((provider_name, method_name), counts) in self._counts.iteritems():
+                response[provider_name][method_name] = dict(counts)
+        return dict(response)
+
+    def maybe_flush(self, client=None):
+        if (time.time() - self._last_flush) > self.flush_interval_seconds:
+            self.flush(client)
+
+    def flush(self, client=None):
+        if not client:
+            client = stats_client
+        with self._lock:
+            counts = self._counts
+            self._counts = defaultdict(Counter)
+            self._last_flush = time.time()
+        if not counts:
+            return
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            window = str(latency_window())
+            for ((provider_name, method_name), provider_counts) in counts.iteritems():
+                key = STATS_KEY_PREFIX + provider_name + ":" + method_name
+                latency_key = LATENCY_KEY_PREFIX + provider_name + ":" + window
+                for (counter_name, value) in provider_counts.iteritems():
+                    pipe.hincrby(key, counter_name, value)
+                    if counter_name.startswith("latency_ms_") and counter_name != "latency_ms_total":
+                        pipe.hincrby(latency_key, counter_name, value)
+                pipe.expire(key, STATS_EXPIRE_SECONDS)
+                pipe.expire(latency_key, LATENCY_WINDOW_SECONDS * (LATENCY_NUM_WINDOWS+1))
+                pipe.sadd(STATS_KEYS_SET, key)
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning(u"Unable to flush provider stats to redis, dropping them")
+
+
+stats = ProviderStats()
+
+
+def get_aggregated_stats(client=None):
+    """ Totals across all processes, as {provider: {method: {counter: value}}} """
+    if not client:
+        client = stats_client
+    keys = sorted(client.smembers(STATS_KEYS_SET))
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    all_counts = pipe.execute()
+
+    response = defaultdict(dict)
+    for (key, counts) in zip(keys, all_counts):
+        if not counts:
+            client.srem(STATS_KEYS_SET, key)  # expired
+            continue
+        (provider_name, method_name) = key[len(STATS_KEY_PREFIX):].split(":", 1)
+        response[provider_name][method_name] = dict((k, int(v)) for (k, v) in counts.iteritems())
+    return dict(response)
+
+
+def clear_aggregated_stats(client=None):
+    if not client:
+        client = stats_client
+    keys = list(client.smembers(STATS_KEYS_SET))
+    if keys:
+        client.delete(*keys)
+    client.delete(STATS_KEYS_SET)
+
+
+def get_recent_latency_counts(provider_name, client=None):
+    """ Latency histogram of the provider's requests over the last hour, 
+        summed over all methods and processes, as {bucket_name: count} """
+    if not client:
+        client = stats_client
+    current_window = latency_window()
+    pipe = client.pipeline(transaction=False)
+    for window in range(current_window - LATENCY_NUM_WINDOWS + 1, current_window + 1):
+        pipe.hgetall(LATENCY_KEY_PREFIX + provider_name + ":" + str(window))
+    response = Counter()
+    for counts in pipe.execute():
+        for (bucket_name, count) in counts.iteritems():
+            response[bucket_name] += int(count)
+    return response
+
+
+def latency_percentile(latency_counts, percentile):
+    """ Upper bound in seconds of the bucket holding the percentile, 
+        None if that is the open-ended top bucket or there are no counts """
+    total = sum(latency_counts.values())
+    if not total:
+        return None
+    seen = 0
+    for upper_bound in LATENCY_BUCKETS_MS:
+        seen += latency_counts.get("latency_ms_le_{upper_bound}".format(upper_bound=upper_bound), 0)
+        if seen >= (percentile * total):
+            return upper_bound / 1000.0
+    return None
@@ -132,10 +132,10 @@ class Altmetric_Com(Provider):
         return new_aliases
 
 
-    def _extract_aliases(self, page, id=None):
-        dict_of_keylists = {"altmetric_com": ["altmetric_id"]}
+    aliases_extractor = provider.JsonExtractor({"altmetric_com": ["altmetric_id"]})
 
-        aliases_dict = provider._extract_from_json(page, dict_of_keylists)
+    def _extract_aliases(self, page, id=None):
+        aliases_dict = self.aliases_extractor.extract(page)
         if aliases_dict:
             aliases_list = [("altmetric_com", str(aliases_dict["altmetric_com"]))]
         else:
@@ -143,17 +143,18 @@ class Altmetric_Com(Provider):
         return aliases_list
 
 
+    metrics_via_fetch_extractor = provider.JsonExtractor({
+        'altmetric_com:tweets' : ['counts', 'twitter', 'posts_count'],
+        'altmetric_com:unique_tweeters' : ['counts', 'twitter', 'unique_users_count'],
+        # 'altmetric_com:news' : ['counts', 'news', 'posts_count'],
+        # 'altmetric_com:unique_news' : ['counts', 'news', 'unique_users_count'],
+        # 'altmetric_com:news_names' : ['counts', 'news', 'unique_users'],
+        'altmetric_com:demographics' : ['demographics'],
+        'altmetric_com:posts' : ['posts']
+    })
+
     def _extract_metrics_via_fetch(self, page, status_code=200, id=None):
-        dict_of_keylists = {
-            'altmetric_com:tweets' : ['counts', 'twitter', 'posts_count'],
-            'altmetric_com:unique_tweeters' : ['counts', 'twitter', 'unique_users_count'],
-            # 'altmetric_com:news' : ['counts', 'news', 'posts_count'],
-            # 'altmetric_com:unique_news' : ['counts', 'news', 'unique_users_count'],
-            # 'altmetric_com:news_names' : ['counts', 'news', 'unique_users'],
-            'altmetric_com:demographics' : ['demographics'],
-            'altmetric_com:posts' : ['posts']
-        }
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_via_fetch_extractor.extract(page)
 
         try:
             if metrics_dict['altmetric_com:posts'] and "twitter" in metrics_dict['altmetric_com:posts']:
@@ -179,14 +180,15 @@ class Altmetric_Com(Provider):
         return metrics_dict
 
 
+    metrics_for_via_citation_call_extractor = provider.JsonExtractor({
+        'altmetric_com:gplus_posts' : ['cited_by_gplus_count'],
+        'altmetric_com:facebook_posts' : ['cited_by_fbwalls_count'],
+        'altmetric_com:blog_posts' : ['cited_by_feeds_count']
+    })
+
     def _extract_metrics_for_via_citation_call(self, data, status_code=200, id=None):
-        dict_of_keylists = {
-            'altmetric_com:gplus_posts' : ['cited_by_gplus_count'],
-            'altmetric_com:facebook_posts' : ['cited_by_fbwalls_count'],
-            'altmetric_com:blog_posts' : ['cited_by_feeds_count']
-        }
         entry = data["results"][0]
-        metrics_dict = provider._extract_from_data_dict(entry, dict_of_keylists)
+        metrics_dict = self.metrics_for_via_citation_call_extractor.extract_from_data(entry)
         return metrics_dict
 
 
@@ -90,7 +90,7 @@ class Arxiv(Provider):
         dom_authors = provider._find_all_in_xml(page, "name")
 
         try:
-            authors = [author.firstChild.data for author in dom_authors]
+            authors = [provider._xml_text(author) for author in dom_authors]
             biblio_dict["authors"] = ", ".join([author.split(" ")[-1] for author in authors])
         except (AttributeError, TypeError):
             pass
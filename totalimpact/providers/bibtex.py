@@ -1,5 +1,7 @@
 from StringIO import StringIO
-import json, re
+import json, re, os, itertools
+import atexit
+import multiprocessing
 
 from pybtex.database.input import bibtex
 from pybtex.errors import enable_strict_mode, format_error
@@ -28,6 +30,66 @@ def build_bibtex_to_unicode(unicode_to_bibtex):
         bibtex_to_unicode[bibtex] = unicode_value
     return bibtex_to_unicode
 
+BIBTEX_TO_UNICODE = build_bibtex_to_unicode(bibtex_lookup.unicode_to_latex)
+
+# every key of BIBTEX_TO_UNICODE is a {group} with no braces inside, so one 
+# scan over these innermost groups finds everything there is to decode
+bibtex_escape_pattern = re.compile(r"\{[^{}]*\}")
+
+# uploads with more entries than one chunk are parsed a chunk at a time in
+# a pool of processes, since pybtex is pure python
+BIBTEX_CHUNK_SIZE = 50
+BIBTEX_PARSE_PROCESSES = int(os.getenv("BIBTEX_PARSE_PROCESSES", 2))
+
+_parse_pool = None
+_parse_pool_pid = None
+_chunk_parser = None
+
+def _get_parse_pool():
+    global _parse_pool, _parse_pool_pid
+    # a pool inherited over a fork talks to the parent's processes, so make our own
+    if (_parse_pool is None) or (_parse_pool_pid != os.getpid()):
+        _parse_pool = multiprocessing.Pool(BIBTEX_PARSE_PROCESSES)
+        _parse_pool_pid = os.getpid()
+    return _parse_pool
+
+def close_parse_pool():
+    global _parse_pool
+    if (_parse_pool is not None) and (_parse_pool_pid == os.getpid()):
+        _parse_pool.terminate()
+        _parse_pool.join()
+    _parse_pool = None
+
+atexit.register(close_parse_pool)
+
+def _parse_entry_chunk(entries):
+    # run in the pool's processes, so has to be importable at module level
+    global _chunk_parser
+    if _chunk_parser is None:
+        _chunk_parser = Bibtex()
+    return _chunk_parser.parse_entries(entries)
+
+def iter_bibtex_entries(bibtex_contents):
+    """ Yields the entries of a bibtex file one at a time, each starting with @ """
+    cleaned_string = bibtex_contents.replace("\&", "").replace("%", "").strip()
+    start = 0
+    while start <= len(cleaned_string):
+        end = cleaned_string.find("@", start)
+        if end == -1:
+            end = len(cleaned_string)
+        entry = cleaned_string[start:end]
+        if entry:
+            yield "@"+entry
+        start = end + 1
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Bibtex(Provider):  
 
@@ -39,17 +101,20 @@ class Bibtex(Provider):
     def __init__(self):
         super(Bibtex, self).__init__()
         enable_strict_mode(True) #throw errors
-        self.bibtex_to_unicode = build_bibtex_to_unicode(bibtex_lookup.unicode_to_latex)
+        self.bibtex_to_unicode = BIBTEX_TO_UNICODE
+
+    def _decode_escape(self, match):
+        escape = match.group(0)
+        return self.bibtex_to_unicode.get(escape, escape)
 
     def _to_unicode(self, text):
         text = unicode_helpers.to_unicode_or_bust(text)
         if "{" in text:
             text = text.replace("\\", "")
-            for i, j in self.bibtex_to_unicode.iteritems():
-                text = text.replace(i, j)
+            text = bibtex_escape_pattern.sub(self._decode_escape, text)
         return text
 
-    def _parse_bibtex_entries(self, entries):
+    def _parse_bibtex_entries(self, entries, errors=None):
         biblio_list = []
         for entry in entries:
             stream = StringIO(entry)
@@ -60,87 +125,109 @@ class Bibtex(Provider):
             except (PybtexSyntaxError, PybtexError), error:
                 error = error
                 logger.error(format_error(error, prefix='BIBTEX_ERROR: '))
+                if errors is not None:
+                    errors.append(format_error(error))
                 #logger.error("BIBTEX_ERROR error input: '{entry}'".format(
                 #    entry=entry))
                 #raise ProviderContentMalformedError(error.message)
         return biblio_list
 
     def parse(self, bibtex_contents):
+        (ret, errors) = self.parse_entries(iter_bibtex_entries(bibtex_contents))
+        return ret
+
+    def parse_entries(self, entries):
+        """ Returns (parsed entries, error messages for entries that couldn't be parsed) """
         ret = []
-        cleaned_string = bibtex_contents.replace("\&", "").replace("%", "").strip()
-        entries = ["@"+entry for entry in cleaned_string.split("@") if entry]
-        biblio_list = self._parse_bibtex_entries(entries)
+        errors = []
+        biblio_list = self._parse_bibtex_entries(entries, errors)
 
         for biblio in biblio_list:
-            parsed = {}
-            try:
-                mykey = biblio.entries.keys()[0]
-            except AttributeError:
-                # doesn't seem to be a valid biblio object, so skip to the next one
-                logger.info(u"%20s NO DOI because no entries attribute in %s" % (self.provider_name, biblio))
-                continue
-
-            try:
-                parsed["journal"] = self._to_unicode(biblio.entries[mykey].fields["journal"])
-            except KeyError:
-                parsed["journal"] = ""
-
-
+            parsed = self._parse_biblio(biblio)
+            if parsed is not None:
+                ret.append(parsed)
+
+        return (ret, errors)
+
+    def iter_parse(self, bibtex_contents, errors=None):
+        """ Yields lists of parsed entries as they are ready, in order.  Error
+            messages for entries that couldn't be parsed go in errors, if given. """
+        chunks = _chunks(iter_bibtex_entries(bibtex_contents), BIBTEX_CHUNK_SIZE)
+        first_chunks = list(itertools.islice(chunks, 2))
+        chunks = itertools.chain(first_chunks, chunks)
+        if (len(first_chunks) > 1) and (BIBTEX_PARSE_PROCESSES > 1):
+            results = _get_parse_pool().imap(_parse_entry_chunk, chunks)
+        else:
+            results = itertools.imap(self.parse_entries, chunks)
+
+        for (parsed_entries, chunk_errors) in results:
+            if errors is not None:
+                errors += chunk_errors
+            yield parsed_entries
+
+    def _parse_biblio(self, biblio):
+        parsed = {}
+        try:
+            mykey = biblio.entries.keys()[0]
+        except AttributeError:
+            # doesn't seem to be a valid biblio object, so skip to the next one
+            logger.info(u"%20s NO DOI because no entries attribute in %s" % (self.provider_name, biblio))
+            return None
+
+        try:
+            parsed["journal"] = self._to_unicode(biblio.entries[mykey].fields["journal"])
+        except KeyError:
+            parsed["journal"] = ""
+
+
+        try:
+            lnames = [person.get_part_as_text("last") for person in biblio.entries[mykey].persons["author"]]
+            parsed["first_author"] = self._to_unicode(lnames[0])
+        except (KeyError, AttributeError):
             try:
-                lnames = [person.get_part_as_text("last") for person in biblio.entries[mykey].persons["author"]]
-                parsed["first_author"] = self._to_unicode(lnames[0])
+                parsed["first_author"] = self._to_unicode(biblio.entries[mykey].fields["author"][0].split(",")[0])
             except (KeyError, AttributeError):
-                try:
-                    parsed["first_author"] = self._to_unicode(biblio.entries[mykey].fields["author"][0].split(",")[0])
-                except (KeyError, AttributeError):
-                    parsed["first_author"] = ""
-
-            try:
-                lnames = [person.get_part_as_text("last") for person in biblio.entries[mykey].persons["author"]]
-                parsed["authors"] = self._to_unicode(", ".join(lnames))
-            except (KeyError, AttributeError):
-                parsed["authors"] = ""
-
-            try:
-                parsed["number"] = biblio.entries[mykey].fields["number"]
-            except KeyError:
-                parsed["number"] = ""
+                parsed["first_author"] = ""
 
-            try:
-                parsed["volume"] = biblio.entries[mykey].fields["volume"]
-            except KeyError:
-                parsed["volume"] = ""
+        try:
+            lnames = [person.get_part_as_text("last") for person in biblio.entries[mykey].persons["author"]]
+            parsed["authors"] = self._to_unicode(", ".join(lnames))
+        except (KeyError, AttributeError):
+            parsed["authors"] = ""
 
-            try:
-                pages = biblio.entries[mykey].fields["pages"]
-                parsed["first_page"] = pages.split("--")[0]
-            except KeyError:
-                parsed["first_page"] = ""
+        try:
+            parsed["number"] = biblio.entries[mykey].fields["number"]
+        except KeyError:
+            parsed["number"] = ""
 
-            try:
-                year_string = biblio.entries[mykey].fields["year"].replace("{}", "")
-                parsed["year"] = re.sub("\D", "", year_string)
-            except KeyError:
-                parsed["year"]  = ""
+        try:
+            parsed["volume"] = biblio.entries[mykey].fields["volume"]
+        except KeyError:
+            parsed["volume"] = ""
 
-            try:
-                parsed["title"] = self._to_unicode(biblio.entries[mykey].fields["title"])
-            except KeyError:
-                parsed["title"]  = ""
+        try:
+            pages = biblio.entries[mykey].fields["pages"]
+            parsed["first_page"] = pages.split("--")[0]
+        except KeyError:
+            parsed["first_page"] = ""
 
-            #parsed["key"] = mykey
-
-            ret.append(parsed)
-
-        return ret
+        try:
+            year_string = biblio.entries[mykey].fields["year"].replace("{}", "")
+            parsed["year"] = re.sub("\D", "", year_string)
+        except KeyError:
+            parsed["year"]  = ""
 
+        try:
+            parsed["title"] = self._to_unicode(biblio.entries[mykey].fields["title"])
+        except KeyError:
+            parsed["title"]  = ""
 
+        #parsed["key"] = mykey
 
-    def member_items(self, bibtex_contents, cache_enabled=True):
-        logger.debug(u"%20s getting member_items for bibtex" % (self.provider_name))
+        return parsed
 
-        parsed_bibtex = self.parse(bibtex_contents)
 
+    def _aliases_from_parsed(self, parsed_bibtex):
         aliases = []
         for entry in parsed_bibtex:
             if ("journal" in entry) and "arXiv preprint" in entry["journal"]:
@@ -149,5 +236,17 @@ class Bibtex(Provider):
                 aliases += [("arxiv", arxiv_id)]
             else:                
                 aliases += [("biblio", entry)]
+        return aliases
 
+    def member_items(self, bibtex_contents, cache_enabled=True):
+        logger.debug(u"%20s getting member_items for bibtex" % (self.provider_name))
+
+        aliases = []
+        for chunk_aliases in self.iter_member_items(bibtex_contents):
+            aliases += chunk_aliases
         return(aliases)
+
+    def iter_member_items(self, bibtex_contents, errors=None):
+        """ Yields lists of aliases a chunk of entries at a time """
+        for parsed_bibtex in self.iter_parse(bibtex_contents, errors):
+            yield self._aliases_from_parsed(parsed_bibtex)
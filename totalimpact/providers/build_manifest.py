@@ -0,0 +1,34 @@
+# Regenerates provider_manifest.py from the providers in default_settings.PROVIDERS.
+# Run from the repo root after adding a provider or changing what one provides:
+#   python -m totalimpact.providers.build_manifest
+
+import os
+import pprint
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "provider_manifest.py")
+
+HEADER = """# What each provider provides, so the app can answer without importing every
+# provider module.  Generated by totalimpact/providers/build_manifest.py, don't edit.
+
+"""
+
+def manifest_source(manifest):
+    prefix = "PROVIDER_MANIFEST = "
+    lines = pprint.pformat(manifest).split("\n")
+    # line continuations up with the opening brace
+    lines = [prefix + lines[0]] + [" "*len(prefix) + line for line in lines[1:]]
+    return HEADER + "\n".join(lines) + "\n"
+
+def write_manifest(path=MANIFEST_PATH):
+    from totalimpact import default_settings
+    from totalimpact.providers.provider import ProviderFactory
+
+    manifest = ProviderFactory.build_manifest(default_settings.PROVIDERS)
+    with open(path, "w") as f:
+        f.write(manifest_source(manifest))
+
+
+if __name__ == "__main__":
+    import config
+    config.set_env_vars_from_dot_env()
+    write_manifest()
@@ -9,23 +9,28 @@ logger = logging.getLogger('ti.providers.crossref')
 
 #!/usr/bin/env python
 
+doi_url_pattern = re.compile("^https*://(dx\.)*doi.org/(10\..+)")
+doi_org_pattern = re.compile("^(dx\.)*doi.org/(10\..+)")
+doi_prefix_pattern = re.compile("^doi:(10\..+)")
+embedded_doi_pattern = re.compile(".*(10\.\d+.+)", re.DOTALL)
+
 def clean_doi(input_doi):
     input_doi = remove_nonprinting_characters(input_doi)
     try:
         input_doi = input_doi.lower()
         if input_doi.startswith("http"):
-            match = re.match("^https*://(dx\.)*doi.org/(10\..+)", input_doi)
+            match = doi_url_pattern.match(input_doi)
             doi = match.group(2)
         elif "doi.org" in input_doi:
-            match = re.match("^(dx\.)*doi.org/(10\..+)", input_doi)
+            match = doi_org_pattern.match(input_doi)
             doi = match.group(2)
         elif input_doi.startswith("doi:"):
-            match = re.match("^doi:(10\..+)", input_doi)
+            match = doi_prefix_pattern.match(input_doi)
             doi = match.group(1)
         elif input_doi.startswith("10."):
             doi = input_doi
         elif "10." in input_doi:
-            match = re.match(".*(10\.\d+.+)", input_doi, re.DOTALL)
+            match = embedded_doi_pattern.match(input_doi)
             doi = match.group(1)
         else:
             doi = None
@@ -54,6 +59,9 @@ class Crossref(Provider):
 
     def __init__(self):
         super(Crossref, self).__init__()
+        # 403 and 406 come back for dois crossref doesn't serve, like datacite dois
+        self.negative_cache_status_codes = [403, 404, 406, 410]
+        self.negative_cache_duration = 60*60*24  # one day
 
     def is_relevant_alias(self, alias):
         (namespace, nid) = alias
@@ -131,11 +139,12 @@ class Crossref(Provider):
         return biblio_dict
 
 
+    biblio_issn_extractor = provider.JsonExtractor({
+        'issn' : ['ISSN']
+    })
+
     def _extract_biblio_issn(self, page, id=None):
-        dict_of_keylists = {
-            'issn' : ['ISSN']
-        }
-        biblio_dict = provider._extract_from_json(page, dict_of_keylists)
+        biblio_dict = self.biblio_issn_extractor.extract(page)
         if not biblio_dict:
           return {}
 
@@ -173,15 +182,16 @@ class Crossref(Provider):
         return biblio_dict
 
 
+    biblio_extractor = provider.JsonExtractor({
+        'title' : ['title'],
+        'year' : ['issued'],
+        'repository' : ['publisher'],
+        'journal' : ['container-title'],
+        'authors_literal' : ['author']
+    })
+
     def _extract_biblio(self, page, id=None):
-        dict_of_keylists = {
-            'title' : ['title'],
-            'year' : ['issued'],
-            'repository' : ['publisher'],
-            'journal' : ['container-title'],
-            'authors_literal' : ['author']
-        }
-        biblio_dict = provider._extract_from_json(page, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract(page)
         if not biblio_dict:
           return {}
 
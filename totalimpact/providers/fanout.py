@@ -0,0 +1,50 @@
+import logging
+import eventlet
+from eventlet import patcher, semaphore
+
+from totalimpact.providers.provider import ProviderTimeout
+
+logger = logging.getLogger("ti.providers.fanout")
+
+# green threads are cheap, this bounds memory rather than cpu
+POOL_SIZE = 1000
+
+
+def is_green():
+    """ True if sockets are monkeypatched, as in a celery worker started with
+        --pool=eventlet.  Otherwise each request blocks every green thread. """
+    return patcher.is_monkey_patched("socket")
+
+
+class Fanout(object):
+    """ Runs many provider calls at once in green threads of one process,
+        at most max_simultaneous_requests at a time per provider """
+
+    def __init__(self, pool_size=POOL_SIZE):
+        self.pool = eventlet.GreenPool(pool_size)
+        self._semaphores = {}
+
+    def _semaphore(self, provider):
+        if provider.provider_name not in self._semaphores:
+            self._semaphores[provider.provider_name] = semaphore.Semaphore(provider.max_simultaneous_requests)
+        return self._semaphores[provider.provider_name]
+
+    def _run(self, provider, timeout_seconds, func, args):
+        with self._semaphore(provider):
+            try:
+                with eventlet.Timeout(timeout_seconds):
+                    return func(*args)
+            except eventlet.Timeout:
+                msg = u"TIMEOUT in fanout for {provider} after {timeout_seconds} seconds".format(
+                    provider=provider.provider_name, timeout_seconds=timeout_seconds)
+                raise ProviderTimeout(msg)
+
+    def spawn(self, provider, timeout_seconds, func, *args):
+        """ Starts func(*args) once the provider has a free slot.  Returns a
+            green thread whose wait() gives the result or raises its exception,
+            ProviderTimeout if it took longer than timeout_seconds. """
+        return self.pool.spawn(self._run, provider, timeout_seconds, func, args)
+
+    def waitall(self):
+        self.pool.waitall()
+
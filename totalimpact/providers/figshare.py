@@ -60,11 +60,11 @@ class Figshare(Provider):
         return match[0]
 
 
-    def _extract_aliases(self, page, id=None):
-        dict_of_keylists = {"url": ["figshare_url"]}
+    aliases_extractor = provider.JsonExtractor({"url": ["figshare_url"]})
 
+    def _extract_aliases(self, page, id=None):
         item = self._extract_figshare_record(page, id)
-        aliases_dict = provider._extract_from_data_dict(item, dict_of_keylists)
+        aliases_dict = self.aliases_extractor.extract_from_data(item)
 
         if aliases_dict:
             aliases_list = [(namespace, nid) for (namespace, nid) in aliases_dict.iteritems()]
@@ -73,15 +73,16 @@ class Figshare(Provider):
         return aliases_list
 
 
+    biblio_extractor = provider.JsonExtractor({
+        'title' : ['title'],
+        'genre' : ['defined_type'],
+        #'authors_literal' : ['authors'],
+        'published_date' : ['published_date']
+    })
+
     def _extract_biblio(self, page, id=None):
-        dict_of_keylists = {
-            'title' : ['title'],
-            'genre' : ['defined_type'],
-            #'authors_literal' : ['authors'],
-            'published_date' : ['published_date']
-        }
         item = self._extract_figshare_record(page, id)
-        biblio_dict = provider._extract_from_data_dict(item, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract_from_data(item)
 
         biblio_dict["repository"] = "figshare"
         
@@ -129,6 +130,12 @@ class Figshare(Provider):
             return {}
 
 
+    metrics_extractor = provider.JsonExtractor({
+        'figshare:shares' : ['shares'],
+        'figshare:downloads' : ['downloads'],
+        'figshare:views' : ['views']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -136,13 +143,8 @@ class Figshare(Provider):
             else:
                 raise(self._get_error(status_code))
 
-        dict_of_keylists = {
-            'figshare:shares' : ['shares'],
-            'figshare:downloads' : ['downloads'],
-            'figshare:views' : ['views']
-        }
         item = self._extract_figshare_record(page, id)
-        metrics_dict = provider._extract_from_data_dict(item, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract_from_data(item)
         return metrics_dict
 
 
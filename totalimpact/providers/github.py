@@ -76,16 +76,17 @@ class Github(Provider):
         return(members)
 
 
+    biblio_extractor = provider.JsonExtractor({
+        'title' : ['name'],
+        'description' : ['description'],
+        'owner' : ['owner', 'login'],
+        'url' : ['svn_url'],
+        'last_push_date' : ['pushed_at'],
+        'create_date' : ['created_at']
+    })
+
     def _extract_biblio(self, page, id=None):
-        dict_of_keylists = {
-            'title' : ['name'],
-            'description' : ['description'],
-            'owner' : ['owner', 'login'],
-            'url' : ['svn_url'],
-            'last_push_date' : ['pushed_at'],
-            'create_date' : ['created_at']
-        }
-        biblio_dict = provider._extract_from_json(page, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract(page)
         try:
             biblio_dict["year"] = biblio_dict["create_date"][0:4]
         except KeyError:
@@ -94,11 +95,11 @@ class Github(Provider):
 
         return biblio_dict    
        
-    def _extract_aliases(self, page, id=None):
-        dict_of_keylists = {"url": ["svn_url"], 
-                            "title" : ["name"]}
+    aliases_extractor = provider.JsonExtractor({"url": ["svn_url"], 
+                                                "title" : ["name"]})
 
-        aliases_dict = provider._extract_from_json(page, dict_of_keylists)
+    def _extract_aliases(self, page, id=None):
+        aliases_dict = self.aliases_extractor.extract(page)
         if aliases_dict:
             aliases_list = [(namespace, nid) for (namespace, nid) in aliases_dict.iteritems()]
         else:
@@ -106,6 +107,11 @@ class Github(Provider):
         return aliases_list
 
 
+    metrics_extractor = provider.JsonExtractor({
+        'github:stars' : ['watchers'],
+        'github:forks' : ['forks']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -116,12 +122,7 @@ class Github(Provider):
         if not "forks_count" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'github:stars' : ['watchers'],
-            'github:forks' : ['forks']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract(page)
 
         return metrics_dict
 
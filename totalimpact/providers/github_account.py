@@ -82,6 +82,13 @@ class Github_Account(Provider):
         biblio_dict["account"] = id
         return biblio_dict   
    
+    metrics_from_api_users_extractor = provider.JsonExtractor({
+        'github_account:followers' : ['followers'],
+        'github_account:number_repos' : ['public_repos'],
+        'github_account:number_gists' : ['public_gists'],
+        'github_account:joined_date' : ['created_at']
+    })
+
     def _extract_metrics_from_api_users(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -92,14 +99,7 @@ class Github_Account(Provider):
         if not "followers" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'github_account:followers' : ['followers'],
-            'github_account:number_repos' : ['public_repos'],
-            'github_account:number_gists' : ['public_gists'],
-            'github_account:joined_date' : ['created_at']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_from_api_users_extractor.extract(page)
 
         return metrics_dict
 
@@ -136,6 +136,11 @@ class Github_Account(Provider):
         return metrics_dict
 
 
+    metrics_from_open_source_report_card_extractor = provider.JsonExtractor({
+        'github_account:active_repos' : ['repositories'],
+        'github_account:languages' : ["usage", 'languages']
+    })
+
     def _extract_metrics_from_open_source_report_card(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -146,12 +151,7 @@ class Github_Account(Provider):
         if not "repositories" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'github_account:active_repos' : ['repositories'],
-            'github_account:languages' : ["usage", 'languages']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_from_open_source_report_card_extractor.extract(page)
         return metrics_dict
 
 
@@ -37,12 +37,19 @@ class Plosalm(Provider):
 
     def __init__(self):
         super(Plosalm, self).__init__()
+        # ALM views and citations are only recomputed about once a day
+        self.max_stale_duration = 60*60*24
 
     def is_relevant_alias(self, alias):
         (namespace, nid) = alias
         relevant = (("doi" == namespace) and ("10.1371/" in nid))
         return(relevant)
 
+    metrics_extractor = provider.JsonExtractor({
+        'plosalm:html_views' : ['html'],
+        'plosalm:pdf_views' : ['pdf']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -56,12 +63,7 @@ class Plosalm(Provider):
         json_response = provider._load_json(page)
         this_article = json_response[0]["sources"][0]["metrics"]
 
-        dict_of_keylists = {
-            'plosalm:html_views' : ['html'],
-            'plosalm:pdf_views' : ['pdf']
-        }
-
-        metrics_dict = provider._extract_from_data_dict(this_article, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract_from_data(this_article)
 
         return metrics_dict
 
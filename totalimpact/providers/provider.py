@@ -1,21 +1,27 @@
  # -*- coding: utf-8 -*-  # need this line because test utf-8 strings later
 
 from totalimpact import cache as cache_module
-from totalimpact import providers
+from totalimpact.providers import sessions, transport
+from totalimpact.providers.provider_manifest import PROVIDER_MANIFEST
 from totalimpact import default_settings
 from totalimpact import utils
 from totalimpact import app
 from totalimpact import db
+from totalimpact import provider_stats, adaptive_timeouts
+from totalimpact.provider_stats import stats
 from totalimpact.unicode_helpers import remove_nonprinting_characters
 
 import requests, os, time, threading, sys, traceback, importlib, urllib, logging, itertools
+import collections
+import contextlib
+import Queue
 import simplejson
 import BeautifulSoup
 import socket
 import analytics
 import re
-from xml.dom import minidom 
-from xml.parsers.expat import ExpatError
+from lxml import etree
+from StringIO import StringIO
 from sqlalchemy.sql import text    
 
 logger = logging.getLogger("ti.provider")
@@ -23,6 +29,57 @@ logger = logging.getLogger("ti.provider")
 # Requests' logging is too noisy
 requests_log = logging.getLogger("requests").setLevel(logging.WARNING) 
 
+CACHE_FILL_POLL_SECONDS = 0.1
+READ_CHUNK_BYTES = 16*1024
+
+# called as stale_page_refresher(provider_name, url, headers, allow_redirects) to refresh 
+# a page in the background; stale pages are only served when one is registered
+stale_page_refresher = None
+
+# per-thread defaults for http_get, set by whatever is running the provider
+_http_context = threading.local()
+
+@contextlib.contextmanager
+def allowing_stale(allow_stale):
+    """ http_get's allow_stale default on this thread for the duration of the 
+        block, put back afterwards so it doesn't leak into the thread's next task """
+    previous_allow_stale = getattr(_http_context, "allow_stale", False)
+    _http_context.allow_stale = allow_stale
+    try:
+        yield
+    finally:
+        _http_context.allow_stale = previous_allow_stale
+
+# parsed pages, so every extractor that looks at a page during one provider
+# method call shares one parse of it.  Per thread, and cleared by whatever is
+# running the provider once the call is done.
+MAX_PARSED_PAGES = 8
+_parsed_pages = threading.local()
+
+def _parse_once(kind, page, parse_function):
+    """ parse_function(page), or what it returned last time for an equal page.
+        Callers must not modify what comes back. """
+    if not isinstance(page, basestring):
+        return parse_function(page)
+    try:
+        memo = _parsed_pages.memo
+    except AttributeError:
+        memo = _parsed_pages.memo = collections.OrderedDict()
+
+    key = (kind, page)
+    try:
+        parsed = memo.pop(key)
+    except KeyError:
+        parsed = parse_function(page)
+        if len(memo) >= MAX_PARSED_PAGES:
+            memo.popitem(last=False)
+    # most recently used last
+    memo[key] = parsed
+    return parsed
+
+def clear_parsed_pages():
+    _parsed_pages.memo = collections.OrderedDict()
+
 
 class CachedResponse:
     def __init__(self, cache_data):
@@ -30,26 +87,151 @@ class CachedResponse:
         self.url = cache_data['url']
         self.text = cache_data['text']
 
-def get_page_from_cache(url, headers, allow_redirects, cache):
+def _cache_key(url, headers, allow_redirects, stop_reading_at=None):
     cache_key = headers.copy()
     cache_key.update({"url":url, "allow_redirects":allow_redirects})
+    if stop_reading_at:
+        # pages read only up to stop_reading_at are only for those who stop there too
+        cache_key["stop_reading_at"] = stop_reading_at
+    return cache_key
+
+def _cache_data(response):
+    cache_data = {
+        'text':             response.text, 
+        'status_code':      response.status_code, 
+        'url':              response.url,
+        'cached_at':        time.time()}
+
+    # keep validators so the page can be revalidated with a conditional GET once stale
+    if response.status_code == 200:
+        try:
+            response_headers = response.headers
+        except AttributeError:
+            response_headers = {}
+        if response_headers.get("ETag"):
+            cache_data["etag"] = response_headers.get("ETag")
+        if response_headers.get("Last-Modified"):
+            cache_data["last_modified"] = response_headers.get("Last-Modified")
+    return cache_data
+
+def _is_fresh(cache_data, max_cache_age):
+    try:
+        age = time.time() - cache_data["cached_at"]
+    except KeyError:
+        # entries without a timestamp are only kept for max_cache_age
+        return True
+    return age <= max_cache_age
+
+def _is_within_stale_age(cache_data, max_cache_age, max_stale_age):
+    try:
+        age = time.time() - cache_data["cached_at"]
+    except KeyError:
+        return False
+    return age <= (max_cache_age + max_stale_age)
+
+def _validation_headers(cache_data):
+    validation_headers = {}
+    if cache_data.get("etag"):
+        validation_headers["If-None-Match"] = cache_data["etag"]
+    if cache_data.get("last_modified"):
+        validation_headers["If-Modified-Since"] = cache_data["last_modified"]
+    return validation_headers
+
+def get_cache_data(url, headers, allow_redirects, cache, stop_reading_at=None):
+    cache_key = _cache_key(url, headers, allow_redirects, stop_reading_at)
+    return cache.get_cache_entry(cache_key)
+
+def get_cache_data_multiple(urls, headers, allow_redirects, cache, stop_reading_at=None):
+    cache_keys = [_cache_key(url, headers, allow_redirects, stop_reading_at) for url in urls]
+    return cache.get_cache_entries(cache_keys)
+
+def fresh_cached_response(cache_data, max_cache_age, max_negative_cache_age=0, negative_status_codes=[]):
+    if not cache_data:
+        return None
+
+    # use it if it was a 200 or a known "not here" answer, otherwise go get it again
+    if cache_data['status_code'] == 200:
+        max_age = max_cache_age
+    elif cache_data['status_code'] in negative_status_codes:
+        max_age = max_negative_cache_age
+    else:
+        return None
 
-    cache_data = cache.get_cache_entry(cache_key)
-    # use it if it was a 200, otherwise go get it again
-    if cache_data and (cache_data['status_code'] == 200):
+    if _is_fresh(cache_data, max_age):
         # logger.debug(u"returning from cache: %s" %(url))
         return CachedResponse(cache_data)
     return None
 
-def store_page_in_cache(url, headers, allow_redirects, response, cache):
-    cache_key = headers.copy()
-    cache_key.update({"url":url, "allow_redirects":allow_redirects})
-
-    cache_data = {
-        'text':             response.text, 
-        'status_code':      response.status_code, 
-        'url':              response.url}
+def get_page_from_cache(url, headers, allow_redirects, cache):
+    cache_data = get_cache_data(url, headers, allow_redirects, cache)
+    return fresh_cached_response(cache_data, cache.max_cache_age)
+
+def refresh_page_in_cache(url, headers, allow_redirects, response, cache_data, cache, stop_reading_at=None):
+    # a 304 Not Modified: the cached page is good for another max_cache_age
+    cache_data["cached_at"] = time.time()
+    for (header_name, cache_data_name) in [("ETag", "etag"), ("Last-Modified", "last_modified")]:
+        if response.headers.get(header_name):
+            cache_data[cache_data_name] = response.headers.get(header_name)
+    cache_key = _cache_key(url, headers, allow_redirects, stop_reading_at)
     cache.set_cache_entry(cache_key, cache_data)
+    return CachedResponse(cache_data)
+
+def store_page_in_cache(url, headers, allow_redirects, response, cache, stop_reading_at=None):
+    cache_key = _cache_key(url, headers, allow_redirects, stop_reading_at)
+    return cache.set_cache_entry(cache_key, _cache_data(response))
+
+def store_pages_in_cache(responses_dict, headers, allow_redirects, cache, stop_reading_at=None):
+    entries = [(_cache_key(url, headers, allow_redirects, stop_reading_at), _cache_data(responses_dict[url])) 
+                for url in responses_dict]
+    return cache.set_cache_entries(entries)
+
+def _read_body(response, max_bytes, stop_reading_at=None, truncate=False):
+    """ Reads a streamed response body, giving up once it is over max_bytes (or 
+        keeping the first max_bytes, if truncate) and stopping early once 
+        stop_reading_at has been seen.  Returns True if the body was cut short. """
+    if getattr(response, "_content_consumed", True):
+        # not streamed, like replayed responses and test doubles
+        content = getattr(response, "_content", None)
+        if isinstance(content, str) and (len(content) > max_bytes):
+            if truncate:
+                response._content = content[:max_bytes]
+                return True
+            raise ProviderResponseTooLargeError("Response larger than {max_bytes} bytes from {url}".format(
+                max_bytes=max_bytes, url=response.url))
+        return False
+
+    chunks = []
+    num_bytes = 0
+    previous_chunk = ""
+    cut_short = False
+    for chunk in response.iter_content(READ_CHUNK_BYTES):
+        chunks.append(chunk)
+        num_bytes += len(chunk)
+        if (num_bytes > max_bytes) and truncate:
+            chunks[-1] = chunk[:len(chunk) - (num_bytes - max_bytes)]
+            cut_short = True
+            break
+        if num_bytes > max_bytes:
+            response.raw.close()  # don't hand a half-read connection back to the pool
+            raise ProviderResponseTooLargeError("Response larger than {max_bytes} bytes from {url}".format(
+                max_bytes=max_bytes, url=response.url))
+        # the marker can straddle two chunks
+        if stop_reading_at and (stop_reading_at in (previous_chunk[-len(stop_reading_at):] + chunk).lower()):
+            cut_short = True
+            break
+        previous_chunk = chunk
+
+    response._content = "".join(chunks)
+    response._content_consumed = True
+    if cut_short:
+        response.raw.close()
+    return cut_short
+
+def _num_bytes(response):
+    try:
+        return len(response.content)
+    except (AttributeError, TypeError):
+        return len(response.text or "")
 
 def is_doi(nid):
     nid = nid.lower()
@@ -57,8 +239,10 @@ def is_doi(nid):
         return True
     return False
 
+digits_pattern = re.compile("\d+")
+
 def is_pmid(nid):
-    if nid.startswith("pmid") or (len(nid)>2 and len(nid)<=8 and re.search("\d+", nid)):
+    if nid.startswith("pmid") or (len(nid)>2 and len(nid)<=8 and digits_pattern.search(nid)):
         return True
     return False
 
@@ -72,23 +256,61 @@ def is_arxiv(nid):
         return True
     return False
 
-def normalize_alias(alias):
-    (ns, nid) = alias
-    if ns == "biblio":
-        return (ns, nid)
+# normalized nids, as the same ids come round again and again when
+# deduplicating.  Shared by all threads.
+MAX_NORMALIZED_NIDS = 10000
+_normalized_nids = collections.OrderedDict()
+_normalized_nids_lock = threading.Lock()
+
+def _normalize_nid(nid):
+    from totalimpact.providers import crossref, pubmed, arxiv, webpage
 
     nid = remove_nonprinting_characters(nid)
     nid = nid.strip()  # also remove spaces
     if is_doi(nid):
-        nid = providers.crossref.clean_doi(nid)
+        nid = crossref.clean_doi(nid)
     elif is_pmid(nid):
-        nid = providers.pubmed.clean_pmid(nid)
+        nid = pubmed.clean_pmid(nid)
     elif is_arxiv(nid):
-        nid = providers.arxiv.clean_arxiv_id(nid)
+        nid = arxiv.clean_arxiv_id(nid)
     elif is_url(nid):
-        nid = providers.webpage.clean_url(nid)
+        nid = webpage.clean_url(nid)
+    return nid
 
-    return (ns, nid)
+def _normalize_nid_once(nid):
+    if not isinstance(nid, basestring):
+        return _normalize_nid(nid)
+
+    # str and unicode ids are equal keys but normalize to different types
+    key = (type(nid), nid)
+    with _normalized_nids_lock:
+        try:
+            normalized = _normalized_nids.pop(key)
+            _normalized_nids[key] = normalized  # most recently used last
+            return normalized
+        except KeyError:
+            pass
+
+    normalized = _normalize_nid(nid)
+    with _normalized_nids_lock:
+        if len(_normalized_nids) >= MAX_NORMALIZED_NIDS:
+            _normalized_nids.popitem(last=False)
+        _normalized_nids[key] = normalized
+    return normalized
+
+def clear_normalized_nids():
+    with _normalized_nids_lock:
+        _normalized_nids.clear()
+
+def normalize_alias(alias):
+    (ns, nid) = alias
+    if ns == "biblio":
+        return (ns, nid)
+    return (ns, _normalize_nid_once(nid))
+
+def normalize_aliases(aliases):
+    """ normalize_alias for each of a list of aliases, in the same order """
+    return [normalize_alias(alias) for alias in aliases]
 
 
 def get_aliases_from_product_id_strings(product_id_strings):
@@ -97,13 +319,13 @@ def get_aliases_from_product_id_strings(product_id_strings):
         nid = remove_nonprinting_characters(nid)
         nid = nid.strip()  # also remove spaces
         if is_doi(nid):
-            aliases += providers.crossref.Crossref().member_items(nid)
+            aliases += ProviderFactory.get_provider("crossref").member_items(nid)
         elif is_pmid(nid):
-            aliases += providers.pubmed.Pubmed().member_items(nid)
+            aliases += ProviderFactory.get_provider("pubmed").member_items(nid)
         elif is_arxiv(nid):
-            aliases += providers.arxiv.Arxiv().member_items(nid)
+            aliases += ProviderFactory.get_provider("arxiv").member_items(nid)
         elif is_url(nid):
-            aliases += providers.webpage.Webpage().member_items(nid)
+            aliases += ProviderFactory.get_provider("webpage").member_items(nid)
     return aliases
 
 
@@ -116,6 +338,7 @@ def import_products(provider_name, import_input):
             provider_name=provider_name, import_input=import_input))
 
     aliases = []
+    provider_stats.set_method_name("members")
 
     # pull in standard items, if we were passed any of these
     if provider_name=="product_id_strings":
@@ -133,6 +356,21 @@ def import_products(provider_name, import_input):
     return(aliases)
 
 
+def import_product_chunks(provider_name, import_input, errors=None):
+    """ Like import_products, but yields lists of aliases as they are found,
+        for importers that can stream them.  Messages about input that couldn't
+        be imported go in errors, if given. """
+    if provider_name=="bibtex":
+        logger.debug(u"in import_product_chunks with {provider_name}".format(
+            provider_name=provider_name))
+        provider_stats.set_method_name("members")
+        provider = ProviderFactory.get_provider("bibtex")
+        for aliases in provider.iter_member_items(import_input["bibtex"], errors):
+            yield aliases
+    else:
+        yield import_products(provider_name, import_input)
+
+
 def is_issn_in_doaj(issn):
     issn = issn.replace("-", "")
     raw_sql = text("""SELECT issn from doaj_issn_lookup where issn=:issn""")
@@ -145,50 +383,150 @@ def is_issn_in_doaj(issn):
 
 class ProviderFactory(object):
 
+    # one instance of each provider per process, shared by its threads
+    _providers = {}
+    _providers_lock = threading.RLock()
+    _providers_pid = os.getpid()
+    # results of the lookups below, by arguments
+    _memo = {}
+
     @classmethod
     def get_provider(cls, provider_name):
+        """ The process's instance of the provider, made on first use.  It is
+            shared, so providers keep per-call state out of their attributes. """
+        if cls._providers_pid != os.getpid():
+            # don't share instances or their connections with a parent process
+            cls.reset()
+        try:
+            return cls._providers[provider_name]
+        except KeyError:
+            pass
+        with cls._providers_lock:
+            if provider_name not in cls._providers:
+                cls._providers[provider_name] = cls.new_provider(provider_name)
+            return cls._providers[provider_name]
+
+    @classmethod
+    def new_provider(cls, provider_name):
         provider_module = importlib.import_module('totalimpact.providers.'+provider_name)
         provider = getattr(provider_module, provider_name.title())
         instance = provider()
         return instance
 
+    @classmethod
+    def reset(cls):
+        """ Forgets provider instances and memoized lookups, so tests can start afresh """
+        with cls._providers_lock:
+            cls._providers = {}
+            cls._providers_pid = os.getpid()
+            cls._memo = {}
+
+    @classmethod
+    def _memoized(cls, name, config_providers, function, *args):
+        key = (name, tuple([provider_name for (provider_name, v) in config_providers])) + args
+        try:
+            return cls._memo[key]
+        except KeyError:
+            value = function(config_providers, *args)
+            cls._memo[key] = value
+            return value
+
+    @classmethod
+    def _manifest_entry(cls, provider):
+        entry = {
+            "provides_members": provider.provides_members,
+            "provides_aliases": provider.provides_aliases,
+            "provides_biblio": provider.provides_biblio,
+            "provides_metrics": provider.provides_metrics
+        }
+        for attribute in ["url", "descr"]:
+            try:
+                entry[attribute] = getattr(provider, attribute)
+            except AttributeError:
+                pass
+        if provider.provides_static_meta:
+            entry["static_meta"] = provider.static_meta_dict
+        return entry
+
+    @classmethod
+    def build_manifest(cls, config_providers=default_settings.PROVIDERS):
+        """ What provider_manifest.py holds, from the providers themselves """
+        manifest = {}
+        for provider in cls.get_providers(config_providers):
+            manifest[provider.provider_name] = cls._manifest_entry(provider)
+        return manifest
+
+    @classmethod
+    def get_manifest_entries(cls, config_providers):
+        """ (provider_name, entry) for each provider, from provider_manifest.py
+            so provider modules aren't imported just to find out what they do.
+            Providers missing from the manifest are asked directly. """
+        entries = []
+        for provider_name, v in config_providers:
+            if provider_name in PROVIDER_MANIFEST:
+                entries.append((provider_name, PROVIDER_MANIFEST[provider_name]))
+                continue
+            try:
+                prov = ProviderFactory.get_provider(provider_name)
+                entries.append((provider_name, cls._manifest_entry(prov)))
+            except ProviderConfigurationError:
+                logger.error(u"Unable to configure provider ... skipping " + str(v))
+        return entries
+
     @classmethod
     def get_providers(cls, config_providers, filter_by=None):
         """ config is the application configuration """
-        providers = []
+        provider_names = cls._memoized("get_providers", config_providers, 
+                                    cls._filter_provider_names, filter_by)
+        return [cls.get_provider(provider_name) for provider_name in provider_names]
+
+    @classmethod
+    def _filter_provider_names(cls, config_providers, filter_by=None):
+        provider_names = []
         for provider_name, v in config_providers:
+            if filter_by is not None:
+                try:
+                    if not PROVIDER_MANIFEST[provider_name]["provides_"+filter_by]:
+                        continue
+                except KeyError:
+                    pass  # not in the manifest, so ask the provider
             try:
                 prov = ProviderFactory.get_provider(provider_name)
-                prov.provider_name = provider_name
-                providers.append(prov)
+                provider_names.append(provider_name)
 
                 if filter_by is not None:
                     if not getattr(prov, "provides_"+filter_by):
-                        providers.pop()
+                        provider_names.pop()
 
             except ProviderConfigurationError:
                 logger.error(u"Unable to configure provider ... skipping " + str(v))
-        return providers
+        return provider_names
 
     @classmethod
     def providers_with_metrics(cls, config_providers):
-        providers = cls.get_providers(config_providers)
+        return list(cls._memoized("providers_with_metrics", config_providers, cls._providers_with_metrics))
+
+    @classmethod
+    def _providers_with_metrics(cls, config_providers):
         providers_with_metrics = []
-        for provider in providers:
-            if provider.provides_metrics:
-                providers_with_metrics += [provider.provider_name]
+        for (provider_name, entry) in cls.get_manifest_entries(config_providers):
+            if entry["provides_metrics"]:
+                providers_with_metrics += [provider_name]
         return providers_with_metrics
 
     @classmethod
     def get_all_static_meta(cls, config_providers=default_settings.PROVIDERS):
-        # this is now duplicating get_all_metadata below; not high refactoring priority, though.
+        """ Memoized, so don't modify what comes back """
+        return cls._memoized("get_all_static_meta", config_providers, cls._all_static_meta)
+
+    @classmethod
+    def _all_static_meta(cls, config_providers):
         all_static_meta = {}
-        providers = cls.get_providers(config_providers)
-        for provider in providers:
-            if provider.provides_metrics:
-                for metric_name in provider.static_meta_dict:
-                    full_metric_name = provider.provider_name + ":" + metric_name
-                    all_static_meta[full_metric_name] = provider.static_meta_dict[metric_name]
+        for (provider_name, entry) in cls.get_manifest_entries(config_providers):
+            if entry["provides_metrics"] and ("static_meta" in entry):
+                for metric_name in entry["static_meta"]:
+                    full_metric_name = provider_name + ":" + metric_name
+                    all_static_meta[full_metric_name] = entry["static_meta"][metric_name]
         return(all_static_meta)
 
     @classmethod
@@ -200,28 +538,17 @@ class ProviderFactory(object):
     @classmethod
     def get_all_metadata(cls, config_providers=default_settings.PROVIDERS):
         ret = {}
-        providers = cls.get_providers(config_providers)
-        for provider in providers:
+        for (provider_name, entry) in cls.get_manifest_entries(config_providers):
             provider_data = {}
-            provider_data["provides_metrics"] = provider.provides_metrics
-            provider_data["provides_aliases"] = provider.provides_aliases
+            provider_data["provides_metrics"] = entry["provides_metrics"]
+            provider_data["provides_aliases"] = entry["provides_aliases"]
 
-            try:
-                provider_data["url"] = provider.url
-            except AttributeError:
-                pass
-
-            try:
-                provider_data["descr"] = provider.descr
-            except AttributeError:
-                pass
-
-            try:
-                provider_data["metrics"] = provider.static_meta_dict
-            except AttributeError:
-                pass
+            for attribute in ["url", "descr"]:
+                if attribute in entry:
+                    provider_data[attribute] = entry[attribute]
 
-            provider_name = provider.__class__.__name__.lower()
+            if "static_meta" in entry:
+                provider_data["metrics"] = entry["static_meta"]
 
             ret[provider_name] = provider_data
 
@@ -242,6 +569,23 @@ class Provider(object):
         self.tool_email = tool_email
         self.provider_name = self.__class__.__name__.lower()
         self.max_simultaneous_requests = 20  # max simultaneous requests, used by backend        
+        self.max_requests_per_host = 5  # max parallel requests to one host in http_get_multiple
+        self.cache_fill_wait_seconds = 5  # how long to wait for another worker fetching the same page
+        # responses that mean the item definitely isn't at this provider are cached too, for 
+        # this long.  Off unless a provider says which codes those are for it.
+        self.negative_cache_status_codes = []
+        self.negative_cache_duration = 0
+        # when stale pages are allowed, how long past max_cache_duration they can still be 
+        # served.  Pages are kept in the cache this much longer, so providers opt in.
+        self.max_stale_duration = 0
+        # bodies are streamed, and the GET fails if one is bigger than this
+        self.max_response_bytes = 10*1000*1000  #10mb
+        # unless this is set, when the first max_response_bytes are kept instead.  Only 
+        # set it along with stop_reading_at, so the truncated pages get their own cache key.
+        self.truncate_large_responses = False
+        # if set, stop reading a body once this lowercase string has been seen.  Part of 
+        # the cache key, so cut short pages are only served to providers cutting at the same place
+        self.stop_reading_at = None
         self.logger = logging.getLogger("ti.providers." + self.provider_name)
 
     def __repr__(self):
@@ -648,19 +992,55 @@ class Provider(object):
     # Core methods
     # These should be consistent for all providers
     
-    def http_get(self, url, headers={}, timeout=20, cache_enabled=True, allow_redirects=False):
+    def http_get(self, url, headers={}, timeout=None, cache_enabled=True, allow_redirects=False, allow_stale=None):
         """ Returns a requests.models.Response object or raises exception
-            on failure. Will cache requests to the same URL. """
+            on failure. Will cache requests to the same URL. 
+            If allow_stale, an expired page up to max_stale_duration old is returned 
+            right away and refreshed in the background.  Without a timeout, one is 
+            picked from this provider's recent latency. """
+
+        if allow_stale is None:
+            allow_stale = getattr(_http_context, "allow_stale", False)
 
         headers["User-Agent"] = app.config["USER_AGENT"]
+        request_headers = headers.copy()
 
+        stale_cache_data = None
+        lease_token = None
         if cache_enabled:
-            cache = cache_module.Cache(self.max_cache_duration)
-            cached_response = get_page_from_cache(url, headers, allow_redirects, cache)
+            cache = cache_module.Cache(self.max_cache_duration, self.max_stale_duration)
+            cache_data = get_cache_data(url, headers, allow_redirects, cache, self.stop_reading_at)
+            cached_response = self._fresh_cached_response(cache_data)
             if cached_response:
                 self.logger.debug(u"{provider_name} CACHE HIT on {url}".format(
                     provider_name=self.provider_name, url=url))
+                stats.record_cache(self.provider_name, "hit")
                 return cached_response
+
+            cache_key = _cache_key(url, headers, allow_redirects, self.stop_reading_at)
+            if allow_stale:
+                stale_response = self._stale_cached_response(cache_data)
+                if stale_response and self._refresh_in_background(url, headers, allow_redirects, cache_key, cache):
+                    self.logger.debug(u"{provider_name} STALE CACHE HIT on {url}".format(
+                        provider_name=self.provider_name, url=url))
+                    stats.record_cache(self.provider_name, "stale_hit")
+                    return stale_response
+
+            # only one worker at a time goes to the network for a given page
+            lease_token = cache.acquire_lease(cache_key)
+            if not lease_token:
+                (cached_response, cache_data) = self._wait_for_cache_fill(cache_key, cache)
+                if cached_response:
+                    self.logger.debug(u"{provider_name} CACHE HIT after wait on {url}".format(
+                        provider_name=self.provider_name, url=url))
+                    stats.record_cache(self.provider_name, "hit")
+                    return cached_response
+            stats.record_cache(self.provider_name, "miss")
+
+            # expired, but can ask the server whether it has changed
+            if cache_data and (cache_data['status_code'] == 200) and _validation_headers(cache_data):
+                stale_cache_data = cache_data
+                request_headers.update(_validation_headers(cache_data))
             
         try:
             # analytics.track("CORE", "Sent GET to Provider", {"provider": self.provider_name, "url": url}, 
@@ -672,15 +1052,39 @@ class Provider(object):
                 self.logger.info(u"{provider_name} LIVE GET on an url that throws UnicodeDecodeError".format(
                     provider_name=self.provider_name))
 
-            r = requests.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects, verify=False)
+            if not timeout:
+                timeout = adaptive_timeouts.http_timeout(self.provider_name)
+
+            # reuse keep-alive connections to this host across calls and tasks,
+            # or record or replay them if configured to
+            session = transport.get_session(self.provider_name, url, self.max_simultaneous_requests)
+            start_time = time.time()
+            r = session.get(url, headers=request_headers, timeout=timeout, allow_redirects=allow_redirects, verify=False, stream=True)
+            try:
+                _read_body(r, self.max_response_bytes, self.stop_reading_at, self.truncate_large_responses)
+            except ProviderResponseTooLargeError:
+                self.logger.info(u"{provider_name} response too large on GET on {url}".format(
+                    provider_name=self.provider_name, url=url))
+                stats.incr(self.provider_name, "too_large")
+                raise
+            stats.record_response(self.provider_name, r.status_code, _num_bytes(r), time.time() - start_time)
+
+            if stale_cache_data and (r.status_code == 304):
+                self.logger.debug(u"{provider_name} CACHE REVALIDATED on {url}".format(
+                    provider_name=self.provider_name, url=url))
+                stats.record_cache(self.provider_name, "revalidated")
+                return refresh_page_in_cache(url, headers, allow_redirects, r, stale_cache_data, cache, 
+                                                self.stop_reading_at)
             if r and not r.encoding:
                 r.encoding = "utf-8"     
-            if r and cache_enabled:
-                store_page_in_cache(url, headers, allow_redirects, r, cache)
+            # cut short pages are cached under a key with stop_reading_at in it
+            if cache_enabled:
+                self._store_page_in_cache(url, headers, allow_redirects, r, cache)
 
         except (requests.exceptions.Timeout, socket.timeout) as e:
             self.logger.info(u"{provider_name} provider timed out on GET on {url}".format(
                 provider_name=self.provider_name, url=url))
+            stats.record_timeout(self.provider_name)
             # analytics.track("CORE", "Received no response from Provider (timeout)", 
             #     {"provider": self.provider_name, "url": url})
             raise ProviderTimeout("Provider timed out during GET on " + url, e)
@@ -688,51 +1092,177 @@ class Provider(object):
         except requests.exceptions.RequestException as e:
             self.logger.info(u"{provider_name} RequestException on GET on {url}".format(
                 provider_name=self.provider_name, url=url))
+            stats.incr(self.provider_name, "request_errors")
             # analytics.track("CORE", "Received RequestException from Provider", 
             #     {"provider": self.provider_name, "url": url})
             raise ProviderHttpError("RequestException during GET on: " + url, e)
 
+        finally:
+            if lease_token:
+                cache.release_lease(cache_key, lease_token)
+
         return r
 
 
-    def http_get_multiple(self, urls, headers={}, timeout=20, cache_enabled=True, allow_redirects=False, num_concurrent_requests=False):
-        """ Returns a requests.models.Response object or raises exception
-            on failure. Will cache requests to the same URL. """
+    def _fresh_cached_response(self, cache_data):
+        return fresh_cached_response(cache_data, 
+            self.max_cache_duration, 
+            self.negative_cache_duration, 
+            self.negative_cache_status_codes)
+
+    def _stale_cached_response(self, cache_data):
+        if cache_data and (cache_data['status_code'] == 200) and \
+                _is_within_stale_age(cache_data, self.max_cache_duration, self.max_stale_duration):
+            return CachedResponse(cache_data)
+        return None
+
+    def _refresh_in_background(self, url, headers, allow_redirects, cache_key, cache):
+        """ Returns True if a refresh of the page has been queued by this or another worker """
+        if not stale_page_refresher:
+            return False
+        if cache.mark_refreshing(cache_key):
+            stale_page_refresher(self.provider_name, url, headers.copy(), allow_redirects)
+        return True
+
+    def _is_negative_response(self, response):
+        return (response.status_code in self.negative_cache_status_codes) and (self.negative_cache_duration > 0)
+
+    def _store_page_in_cache(self, url, headers, allow_redirects, response, cache):
+        if response:
+            stored = store_page_in_cache(url, headers, allow_redirects, response, cache, self.stop_reading_at)
+        elif self._is_negative_response(response):
+            negative_cache = cache_module.Cache(self.negative_cache_duration)
+            stored = store_page_in_cache(url, headers, allow_redirects, response, negative_cache, self.stop_reading_at)
+        else:
+            return
+        if not stored:
+            stats.record_cache(self.provider_name, "store_refused")
+
+    def _wait_for_cache_fill(self, cache_key, cache):
+        """ Another worker is fetching this page: poll the cache until it is filled, 
+            the other worker gives up, or cache_fill_wait_seconds passes.
+            Returns (fresh cached response or None, latest cache data) """
+
+        cache_data = None
+        deadline = time.time() + self.cache_fill_wait_seconds
+        while time.time() < deadline:
+            time.sleep(CACHE_FILL_POLL_SECONDS)
+            cache_data = cache.get_cache_entry(cache_key)
+            cached_response = self._fresh_cached_response(cache_data)
+            if cached_response:
+                return (cached_response, cache_data)
+            if not cache.is_leased(cache_key):
+                break
+        return (None, cache_data)
+
+
+    def http_get_multiple(self, urls, headers={}, timeout=None, cache_enabled=True, allow_redirects=False, num_concurrent_requests=False):
+        """ Returns a dict of url: requests.models.Response object or raises exception
+            on failure. Uncached urls are fetched in parallel. Will cache requests to the same URL. """
 
         headers["User-Agent"] = app.config["USER_AGENT"]
 
         # use the cache if the config parameter is set and the arg allows it
         if cache_enabled:
-            cache = cache_module.Cache(self.max_cache_duration)
+            cache = cache_module.Cache(self.max_cache_duration, self.max_stale_duration)
 
-        responses = {}
-        for url in urls:
-            responses[url] = None
-            if cache_enabled:
-                cached_response = get_page_from_cache(url, headers, allow_redirects, cache)
+        responses = dict((url, None) for url in urls)
+        if cache_enabled:
+            urls = list(urls)
+            all_cache_data = get_cache_data_multiple(urls, headers, allow_redirects, cache, self.stop_reading_at)
+            for (url, cache_data) in zip(urls, all_cache_data):
+                cached_response = self._fresh_cached_response(cache_data)
                 if cached_response:
                     responses[url] = cached_response
+                    stats.record_cache(self.provider_name, "hit")
+                else:
+                    stats.record_cache(self.provider_name, "miss")
 
         uncached_urls = [url for url in responses if not responses[url]]
 
-        # replace the loop below with requests made in parallel, ideally!
-        fresh_responses = []
-        fresh_responses_dict = {}
-        for u in uncached_urls:
-            fresh_responses += [self.http_get(u, headers=headers, timeout=timeout, allow_redirects=allow_redirects)]
-
-        if fresh_responses:
-            fresh_responses_dict = dict(zip(uncached_urls, fresh_responses))
-            if cache_enabled:
-                for url in fresh_responses_dict:
-                    r = fresh_responses_dict[url]
-                    if r and not r.encoding:
-                        r.encoding = "utf-8"     
-                    store_page_in_cache(url, headers, allow_redirects, r, cache)
+        fresh_responses_dict = self._http_get_concurrently(uncached_urls, 
+                headers=headers, 
+                timeout=timeout, 
+                allow_redirects=allow_redirects, 
+                num_concurrent_requests=num_concurrent_requests)
+
+        if fresh_responses_dict and cache_enabled:
+            for url in fresh_responses_dict:
+                r = fresh_responses_dict[url]
+                if r and not r.encoding:
+                    r.encoding = "utf-8"     
+            self._store_pages_in_cache(fresh_responses_dict, headers, allow_redirects, cache)
         responses.update(fresh_responses_dict)
         return responses
 
 
+    def _store_pages_in_cache(self, responses_dict, headers, allow_redirects, cache):
+        positive_responses = dict((url, r) for (url, r) in responses_dict.iteritems() if r)
+        negative_responses = dict((url, r) for (url, r) in responses_dict.iteritems() 
+                                    if not r and self._is_negative_response(r))
+        num_refused = 0
+        if positive_responses:
+            num_refused += len(positive_responses) - store_pages_in_cache(positive_responses, headers, allow_redirects, cache, 
+                                                                            self.stop_reading_at)
+        if negative_responses:
+            negative_cache = cache_module.Cache(self.negative_cache_duration)
+            num_refused += len(negative_responses) - store_pages_in_cache(negative_responses, headers, allow_redirects, negative_cache, 
+                                                                            self.stop_reading_at)
+        if num_refused:
+            stats.incr(self.provider_name, "cache_store_refused", num_refused)
+
+    def _http_get_concurrently(self, urls, headers={}, timeout=None, allow_redirects=False, num_concurrent_requests=False):
+        """ GETs the urls in parallel threads, at most max_requests_per_host at a time 
+            to any one host.  Returns a dict of url: response, or raises the 
+            first exception (in url order) if any GET failed. """
+
+        if not num_concurrent_requests:
+            num_concurrent_requests = self.max_simultaneous_requests
+        num_threads = min(num_concurrent_requests, len(urls))
+
+        url_queue = Queue.Queue()
+        host_semaphores = {}
+        for url in urls:
+            url_queue.put(url)
+            host_semaphores[sessions.host_key(url)] = threading.BoundedSemaphore(self.max_requests_per_host)
+
+        responses = {}
+        errors = {}
+        # so requests from the worker threads are counted against the right method
+        method_name = provider_stats.get_method_name()
+        def fetch_from_queue():
+            provider_stats.set_method_name(method_name)
+            while True:
+                try:
+                    url = url_queue.get_nowait()
+                except Queue.Empty:
+                    return
+                with host_semaphores[sessions.host_key(url)]:
+                    try:
+                        responses[url] = self.http_get(url, 
+                            headers=headers.copy(), 
+                            timeout=timeout, 
+                            cache_enabled=False, 
+                            allow_redirects=allow_redirects)
+                    except Exception as e:
+                        # anything, or the url would just be missing from responses
+                        errors[url] = e
+
+        if num_threads <= 1:
+            fetch_from_queue()
+        else:
+            threads = [threading.Thread(target=fetch_from_queue) for i in range(num_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        for url in urls:
+            if url in errors:
+                raise errors[url]
+        return responses
+
+
 class ProviderError(Exception):
     def __init__(self, message="", inner=None):
         self._message = message  # naming it self.message raises DepreciationWarning
@@ -772,6 +1302,9 @@ class ProviderTimeout(ProviderServerError):
 class ProviderHttpError(ProviderError):
     pass
 
+class ProviderResponseTooLargeError(ProviderHttpError):
+    pass
+
 class ProviderContentMalformedError(ProviderClientError):
     pass
 
@@ -803,40 +1336,151 @@ def _lookup_json(data, keylist):
             return None
     return(data)
 
-def _extract_from_data_dict(data, dict_of_keylists, include_falses=False):
-    return_dict = {}
-    if dict_of_keylists:
-        for (metric, keylist) in dict_of_keylists.iteritems():
-            value = _lookup_json(data, keylist)
+class JsonExtractor(object):
+    """ A dict_of_keylists compiled once, usually as a class attribute of the
+        provider, into a tree of keys.  Keylists that share a prefix, like
+        ['statistics', 'viewCount'] and ['statistics', 'likeCount'], walk
+        that prefix of the data once. """
+
+    def __init__(self, dict_of_keylists):
+        self.dict_of_keylists = dict_of_keylists or {}
+        self._root = self._compile(self.dict_of_keylists)
 
+    @staticmethod
+    def _new_node():
+        # names: metrics whose keylist ends here
+        # all_names: metrics whose keylist passes through here, all None if the walk stops here
+        return {"names": [], "children": {}, "all_names": []}
+
+    def _compile(self, dict_of_keylists):
+        root = self._new_node()
+        for (metric, keylist) in dict_of_keylists.iteritems():
+            node = root
+            node["all_names"].append(metric)
+            for mykey in keylist:
+                if mykey not in node["children"]:
+                    node["children"][mykey] = self._new_node()
+                node = node["children"][mykey]
+                node["all_names"].append(metric)
+            node["names"].append(metric)
+        return root
+
+    def _walk(self, node, data, values):
+        for metric in node["names"]:
+            values[metric] = data
+        for (mykey, child) in node["children"].iteritems():
+            try:
+                child_data = data[mykey]
+            except (KeyError, TypeError):
+                for metric in child["all_names"]:
+                    values[metric] = None
+                continue
+            self._walk(child, child_data, values)
+
+    def extract_from_data(self, data, include_falses=False):
+        values = {}
+        self._walk(self._root, data, values)
+
+        return_dict = {}
+        for (metric, value) in values.iteritems():
             # unless include_falses, only set metrics for non-zero and non-null metrics
             if include_falses or (value and (value != "0")):
                 return_dict[metric] = value
-    return return_dict
+        return return_dict
+
+    def extract(self, page, include_falses=False):
+        data = _parse_once("json", page, _load_json)
+        if not data:
+            return {}
+        return self.extract_from_data(data, include_falses)
+
+
+def _extract_from_data_dict(data, dict_of_keylists, include_falses=False):
+    if not isinstance(dict_of_keylists, JsonExtractor):
+        dict_of_keylists = JsonExtractor(dict_of_keylists)
+    return dict_of_keylists.extract_from_data(data, include_falses)
 
 
 def _extract_from_json(page, dict_of_keylists, include_falses=False):
-    data = _load_json(page)
+    data = _parse_once("json", page, _load_json)
     if not data:
         return {}
     return_dict = _extract_from_data_dict(data, dict_of_keylists, include_falses)
     return return_dict
 
+# compiled once.  name() is the tag with its prefix as written in the page, 
+# so these match the same elements as minidom's getElementsByTagName did
+_xml_first_named = etree.XPath("(descendant::*[name()=$name])[1]")
+_xml_all_named = etree.XPath("descendant::*[name()=$name]")
+_xml_first_named_or_self = etree.XPath("(descendant-or-self::*[name()=$name])[1]")
+_xml_all_named_or_self = etree.XPath("descendant-or-self::*[name()=$name]")
+
+def _xml_string(page):
+    try:
+        return page.strip().encode('utf-8')
+    except UnicodeDecodeError:
+        return page.strip()
+
 def _get_doc_from_xml(page):
+    """ Returns (doc, lookup_function).  doc is an lxml ElementTree, or 
+        BeautifulStoneSoup if the page isn't well-formed xml.  The page is
+        only parsed once per provider call, so don't modify doc. """
+    return _parse_once("xml", page, _parse_xml)
+
+# provider pages are untrusted, so never let them pull in local files or
+# other urls through external entities
+XML_PARSER_OPTIONS = {"resolve_entities": False, "no_network": True}
+
+def _parse_xml(page):
     try:
-        try:
-            doc = minidom.parseString(page.strip().encode('utf-8'))
-        except UnicodeDecodeError:
-            doc = minidom.parseString(page.strip())            
-        lookup_function = _lookup_xml_from_dom
-    except ExpatError, e:
+        # a parser per call, lxml parsers can't be shared between threads
+        parser = etree.XMLParser(**XML_PARSER_OPTIONS)
+        doc = etree.fromstring(_xml_string(page), parser).getroottree()
+        lookup_function = _lookup_xml_from_etree
+    except (etree.XMLSyntaxError, ValueError):
         doc = BeautifulSoup.BeautifulStoneSoup(page) 
         lookup_function = _lookup_xml_from_soup
+        if not doc:
+            raise ProviderContentMalformedError
 
-    if not doc:
-        raise ProviderContentMalformedError
     return (doc, lookup_function)
 
+def _xml_elements_named(node, mykey):
+    """ All elements below node with this tag, in document order, including
+        the root element when node is the document """
+    if isinstance(node, etree._ElementTree):
+        return _xml_all_named_or_self(node.getroot(), name=mykey)
+    if isinstance(node, etree._Element):
+        return _xml_all_named(node, name=mykey)
+    return []
+
+def _xml_first_element_named(node, mykey):
+    if isinstance(node, etree._ElementTree):
+        found = _xml_first_named_or_self(node.getroot(), name=mykey)
+    else:
+        found = _xml_first_named(node, name=mykey)
+    if not found:
+        return None
+    return found[0]
+
+def _xml_text(element):
+    """ The element's text up to its first child element, as unicode, 
+        like minidom's firstChild.data """
+    if element.text is None:
+        return None
+    return unicode(element.text)
+
+def _iterparse_xml(page, mykey):
+    """ Yields the elements with this tag one at a time, freeing each one 
+        once the caller moves on, so big pages are never held in memory whole """
+    for (event, element) in etree.iterparse(StringIO(_xml_string(page)), events=("end",), 
+                                                **XML_PARSER_OPTIONS):
+        if element.tag == mykey:
+            yield element
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
 def _count_in_xml(page, mykey): 
     doc_list = _find_all_in_xml(page, mykey)
     if not doc_list:
@@ -846,14 +1490,9 @@ def _count_in_xml(page, mykey):
 
 def _find_all_in_xml(page, mykey):  
     (doc, lookup_function) = _get_doc_from_xml(page)  
-    if not doc:
+    if lookup_function != _lookup_xml_from_etree:
         return None
-    try:
-        doc_list = doc.getElementsByTagName(mykey)
-    except (KeyError, IndexError, TypeError):
-        return None
-            
-    return(doc_list)
+    return _xml_elements_named(doc, mykey)
 
 
 def _lookup_xml_from_dom(doc, keylist): 
@@ -880,6 +1519,24 @@ def _lookup_xml_from_dom(doc, keylist):
         pass
     return(response)
 
+def _lookup_xml_from_etree(doc, keylist): 
+    for mykey in keylist:
+        # just takes the first one for now
+        doc = _xml_first_element_named(doc, mykey)
+        if doc is None:
+            return None
+
+    if isinstance(doc, etree._ElementTree):
+        return None
+    response = _xml_text(doc)
+    if response is None:
+        return None
+    try:
+        response = int(response)
+    except ValueError:
+        pass
+    return(response)
+
 def _lookup_xml_from_soup(soup, keylist):    
     smaller_bowl_of_soup = soup
     for mykey in keylist:
@@ -0,0 +1,377 @@
+# What each provider provides, so the app can answer without importing every
+# provider module.  Generated by totalimpact/providers/build_manifest.py, don't edit.
+
+PROVIDER_MANIFEST = {'altmetric_com': {'descr': 'We make article level metrics easy.',
+                                       'provides_aliases': True,
+                                       'provides_biblio': False,
+                                       'provides_members': False,
+                                       'provides_metrics': True,
+                                       'static_meta': {'blog_posts': {'description': 'Number of blog posts mentioning the product',
+                                                                      'display_name': 'blog posts',
+                                                                      'icon': 'http://impactstory.org/static/img/blogs-icon.png',
+                                                                      'provider': 'Altmetric.com',
+                                                                      'provider_url': ''},
+                                                       'facebook_posts': {'description': 'Number of posts mentioning the product on a public Facebook wall',
+                                                                          'display_name': 'Facebook public posts',
+                                                                          'icon': 'http://facebook.com/favicon.ico',
+                                                                          'provider': 'Altmetric.com',
+                                                                          'provider_url': 'http://facebook.com'},
+                                                       'gplus_posts': {'description': 'Number of posts mentioning the product on Google+',
+                                                                       'display_name': 'Google+ posts',
+                                                                       'icon': 'http://plus.google.com/favicon.ico',
+                                                                       'provider': 'Altmetric.com',
+                                                                       'provider_url': 'http://plus.google.com'},
+                                                       'impressions': {'description': "Number of times a tweet about the product has appeared in someone's twitter stream",
+                                                                       'display_name': 'Twitter impressions',
+                                                                       'icon': 'https://twitter.com/favicon.ico',
+                                                                       'provider': 'Altmetric.com',
+                                                                       'provider_url': 'http://twitter.com'},
+                                                       'tweets': {'description': 'Number of times the product has been tweeted',
+                                                                  'display_name': 'Twitter tweets',
+                                                                  'icon': 'https://twitter.com/favicon.ico',
+                                                                  'provider': 'Altmetric.com',
+                                                                  'provider_url': 'http://twitter.com'}},
+                                       'url': 'http://www.altmetric.com'},
+                     'arxiv': {'descr': 'arXiv is an e-print service in the fields of physics, mathematics, computer science, quantitative biology, quantitative finance and statistics.',
+                               'provides_aliases': True,
+                               'provides_biblio': True,
+                               'provides_members': True,
+                               'provides_metrics': False,
+                               'static_meta': {},
+                               'url': 'http://arxiv.org'},
+                     'bibtex': {'descr': '',
+                                'provides_aliases': False,
+                                'provides_biblio': False,
+                                'provides_members': False,
+                                'provides_metrics': False,
+                                'url': ''},
+                     'citeulike': {'descr': 'CiteULike is a free service to help you to store, organise and share the scholarly papers you are reading.',
+                                   'provides_aliases': False,
+                                   'provides_biblio': False,
+                                   'provides_members': False,
+                                   'provides_metrics': True,
+                                   'static_meta': {'bookmarks': {'description': 'Number of users who have bookmarked this item.',
+                                                                 'display_name': 'bookmarks',
+                                                                 'icon': 'http://citeulike.org/favicon.ico',
+                                                                 'provider': 'CiteULike',
+                                                                 'provider_url': 'http://www.citeulike.org/'}},
+                                   'url': 'http://www.citeulike.org/'},
+                     'crossref': {'descr': 'An official Digital Object Identifier (DOI) Registration Agency of the International DOI Foundation.',
+                                  'provides_aliases': True,
+                                  'provides_biblio': True,
+                                  'provides_members': True,
+                                  'provides_metrics': False,
+                                  'url': 'http://www.crossref.org/'},
+                     'delicious': {'descr': 'Online social bookmarking service',
+                                   'provides_aliases': False,
+                                   'provides_biblio': False,
+                                   'provides_members': False,
+                                   'provides_metrics': True,
+                                   'static_meta': {'bookmarks': {'description': 'The number of bookmarks to this artifact (maximum=100).',
+                                                                 'display_name': 'bookmarks',
+                                                                 'icon': 'http://g.etfv.co/http://delicious.com',
+                                                                 'provider': 'Delicious',
+                                                                 'provider_url': 'http://www.delicious.com/'}},
+                                   'url': 'http://www.delicious.com'},
+                     'dryad': {'descr': 'An international repository of data underlying peer-reviewed articles in the basic and applied biology.',
+                               'provides_aliases': True,
+                               'provides_biblio': True,
+                               'provides_members': False,
+                               'provides_metrics': True,
+                               'static_meta': {'package_views': {'description': 'Dryad package views: number of views of the main package page',
+                                                                 'display_name': 'package views',
+                                                                 'icon': 'http:\\/\\/datadryad.org\\/favicon.ico',
+                                                                 'provider': 'Dryad',
+                                                                 'provider_url': 'http:\\/\\/www.datadryad.org\\/'},
+                                               'total_downloads': {'description': 'Dryad total downloads: combined number of downloads of the data package and data files',
+                                                                   'display_name': 'total downloads',
+                                                                   'icon': 'http:\\/\\/datadryad.org\\/favicon.ico',
+                                                                   'provider': 'Dryad',
+                                                                   'provider_url': 'http:\\/\\/www.datadryad.org\\/'}},
+                               'url': 'http://www.datadryad.org'},
+                     'figshare': {'descr': 'Make all of your research outputs sharable, citable and visible in the browser for free.',
+                                  'provides_aliases': True,
+                                  'provides_biblio': True,
+                                  'provides_members': True,
+                                  'provides_metrics': True,
+                                  'static_meta': {'downloads': {'description': 'The number of times this has been downloaded',
+                                                                'display_name': 'downloads',
+                                                                'icon': 'http://figshare.com/static/img/favicon.png',
+                                                                'provider': 'figshare',
+                                                                'provider_url': 'http://figshare.com'},
+                                                  'shares': {'description': 'The number of times this has been shared',
+                                                             'display_name': 'shares',
+                                                             'icon': 'http://figshare.com/static/img/favicon.png',
+                                                             'provider': 'figshare',
+                                                             'provider_url': 'http://figshare.com'},
+                                                  'views': {'description': 'The number of times this item has been viewed',
+                                                            'display_name': 'views',
+                                                            'icon': 'http://figshare.com/static/img/favicon.png',
+                                                            'provider': 'figshare',
+                                                            'provider_url': 'http://figshare.com'}},
+                                  'url': 'http://figshare.com'},
+                     'github': {'descr': 'A social, online repository for open-source software.',
+                                'provides_aliases': True,
+                                'provides_biblio': True,
+                                'provides_members': True,
+                                'provides_metrics': True,
+                                'static_meta': {'forks': {'description': 'The number of people who have forked the GitHub repository',
+                                                          'display_name': 'forks',
+                                                          'icon': 'https://github.com/fluidicon.png',
+                                                          'provider': 'GitHub',
+                                                          'provider_url': 'http://github.com'},
+                                                'stars': {'description': 'The number of people who have given the GitHub repository a star',
+                                                          'display_name': 'stars',
+                                                          'icon': 'https://github.com/fluidicon.png',
+                                                          'provider': 'GitHub',
+                                                          'provider_url': 'http://github.com'}},
+                                'url': 'http://github.com'},
+                     'github_account': {'descr': 'A social, online repository for open-source software.',
+                                        'provides_aliases': False,
+                                        'provides_biblio': True,
+                                        'provides_members': False,
+                                        'provides_metrics': True,
+                                        'static_meta': {'followers': {'description': 'The number of people who have given the GitHub repository a star',
+                                                                      'display_name': 'followers',
+                                                                      'icon': 'https://github.com/fluidicon.png',
+                                                                      'provider': 'GitHub',
+                                                                      'provider_url': 'http://github.com'},
+                                                        'joined_date': {'description': 'The number of people who have forked the GitHub repository',
+                                                                        'display_name': 'forks',
+                                                                        'icon': 'https://github.com/fluidicon.png',
+                                                                        'provider': 'GitHub',
+                                                                        'provider_url': 'http://github.com'}},
+                                        'url': 'http://github.com'},
+                     'mendeley': {'descr': 'A research management tool for desktop and web.',
+                                  'provides_aliases': True,
+                                  'provides_biblio': True,
+                                  'provides_members': False,
+                                  'provides_metrics': True,
+                                  'static_meta': {'career_stage': {'description': 'readers by career_stage',
+                                                                   'display_name': 'career stage',
+                                                                   'icon': 'http://www.mendeley.com/favicon.ico',
+                                                                   'provider': 'Mendeley',
+                                                                   'provider_url': 'http://www.mendeley.com/'},
+                                                  'country': {'description': 'readers by country',
+                                                              'display_name': 'country, top 3 percentages',
+                                                              'icon': 'http://www.mendeley.com/favicon.ico',
+                                                              'provider': 'Mendeley',
+                                                              'provider_url': 'http://www.mendeley.com/'},
+                                                  'discipline': {'description': 'readers by discipline',
+                                                                 'display_name': 'discipline',
+                                                                 'icon': 'http://www.mendeley.com/favicon.ico',
+                                                                 'provider': 'Mendeley',
+                                                                 'provider_url': 'http://www.mendeley.com/'},
+                                                  'readers': {'description': 'The number of people who have added this item to their Mendeley library',
+                                                              'display_name': 'readers',
+                                                              'icon': 'http://www.mendeley.com/favicon.ico',
+                                                              'provider': 'Mendeley',
+                                                              'provider_url': 'http://www.mendeley.com/'}},
+                                  'url': 'http://www.mendeley.com'},
+                     'plosalm': {'descr': 'PLOS article level metrics.',
+                                 'provides_aliases': False,
+                                 'provides_biblio': False,
+                                 'provides_members': False,
+                                 'provides_metrics': True,
+                                 'static_meta': {'html_views': {'description': 'the number of views of the HTML article on PLOS',
+                                                                'display_name': 'html views',
+                                                                'icon': 'http://www.plos.org/wp-content/themes/plos_new/favicon.ico',
+                                                                'provider': 'PLOS',
+                                                                'provider_url': 'http://www.plos.org/'},
+                                                 'pdf_views': {'description': 'the number of downloads of the PDF from PLOS',
+                                                               'display_name': 'pdf views',
+                                                               'icon': 'http://www.plos.org/wp-content/themes/plos_new/favicon.ico',
+                                                               'provider': 'PLOS',
+                                                               'provider_url': 'http://www.plos.org/'}},
+                                 'url': 'http://www.plos.org/'},
+                     'plossearch': {'descr': 'PLoS article level metrics.',
+                                    'provides_aliases': False,
+                                    'provides_biblio': False,
+                                    'provides_members': False,
+                                    'provides_metrics': True,
+                                    'static_meta': {'mentions': {'description': 'the number of times the research product was mentioned in the full-text of PLOS papers',
+                                                                 'display_name': 'mentions',
+                                                                 'icon': 'http://www.plos.org/wp-content/themes/plos_new/favicon.ico',
+                                                                 'provider': 'PLOS',
+                                                                 'provider_url': 'http://www.plos.org/'}},
+                                    'url': 'http://www.plos.org/'},
+                     'publons': {'descr': 'Speeding up science by making peer review faster, more efficient, and more effective.',
+                                 'provides_aliases': True,
+                                 'provides_biblio': True,
+                                 'provides_members': True,
+                                 'provides_metrics': True,
+                                 'static_meta': {'forks': {'description': 'The number of people who have forked the GitHub repository',
+                                                           'display_name': 'forks',
+                                                           'icon': 'https://github.com/fluidicon.png',
+                                                           'provider': 'GitHub',
+                                                           'provider_url': 'http://github.com'},
+                                                 'stars': {'description': 'The number of people who have given the GitHub repository a star',
+                                                           'display_name': 'stars',
+                                                           'icon': 'https://github.com/fluidicon.png',
+                                                           'provider': 'GitHub',
+                                                           'provider_url': 'http://github.com'}},
+                                 'url': 'https://publons.com/'},
+                     'pubmed': {'descr': 'PubMed comprises more than 21 million citations for biomedical literature',
+                                'provides_aliases': True,
+                                'provides_biblio': True,
+                                'provides_members': True,
+                                'provides_metrics': True,
+                                'static_meta': {'f1000': {'description': 'The article has been reviewed by F1000',
+                                                          'display_name': 'reviewed',
+                                                          'icon': 'http://f1000.com/1371136042516/images/favicons/favicon-F1000.ico',
+                                                          'provider': 'F1000',
+                                                          'provider_url': 'http://f1000.com'},
+                                                'pmc_citations': {'description': 'The number of citations by papers in PubMed Central',
+                                                                  'display_name': 'citations',
+                                                                  'icon': 'http://www.ncbi.nlm.nih.gov/favicon.ico',
+                                                                  'provider': 'PubMed Central',
+                                                                  'provider_url': 'http://pubmed.gov'},
+                                                'pmc_citations_editorials': {'description': 'The number of citations by editorials papers in PubMed Central',
+                                                                             'display_name': 'citations: editorials',
+                                                                             'icon': 'http://www.ncbi.nlm.nih.gov/favicon.ico',
+                                                                             'provider': 'PubMed Central',
+                                                                             'provider_url': 'http://pubmed.gov'},
+                                                'pmc_citations_reviews': {'description': 'The number of citations by review papers in PubMed Central',
+                                                                          'display_name': 'citations: reviews',
+                                                                          'icon': 'http://www.ncbi.nlm.nih.gov/favicon.ico',
+                                                                          'provider': 'PubMed Central',
+                                                                          'provider_url': 'http://pubmed.gov'}},
+                                'url': 'http://pubmed.gov'},
+                     'scopus': {'descr': "The world's largest abstract and citation database of peer-reviewed literature.",
+                                'provides_aliases': False,
+                                'provides_biblio': False,
+                                'provides_members': False,
+                                'provides_metrics': True,
+                                'static_meta': {'citations': {'description': 'Number of times the item has been cited',
+                                                              'display_name': 'citations',
+                                                              'icon': 'http://www.info.sciverse.com/sites/all/themes/sciverse/favicon.ico',
+                                                              'provider': 'Scopus',
+                                                              'provider_url': 'http://www.info.sciverse.com/scopus/about'}},
+                                'url': 'http://www.info.sciverse.com/scopus/about'},
+                     'slideshare': {'descr': 'The best way to share presentations, documents and professional videos.',
+                                    'provides_aliases': True,
+                                    'provides_biblio': True,
+                                    'provides_members': True,
+                                    'provides_metrics': True,
+                                    'static_meta': {'comments': {'description': 'The number of comments the presentation has received',
+                                                                 'display_name': 'comments',
+                                                                 'icon': 'http://www.slideshare.net/favicon.ico',
+                                                                 'provider': 'SlideShare',
+                                                                 'provider_url': 'http://www.slideshare.net/'},
+                                                    'downloads': {'description': 'The number of times the presentation has been downloaded',
+                                                                  'display_name': 'downloads',
+                                                                  'icon': 'http://www.slideshare.net/favicon.ico',
+                                                                  'provider': 'SlideShare',
+                                                                  'provider_url': 'http://www.slideshare.net/'},
+                                                    'favorites': {'description': 'The number of times the presentation has been favorited',
+                                                                  'display_name': 'favorites',
+                                                                  'icon': 'http://www.slideshare.net/favicon.ico',
+                                                                  'provider': 'SlideShare',
+                                                                  'provider_url': 'http://www.slideshare.net/'},
+                                                    'views': {'description': 'The number of times the presentation has been viewed',
+                                                              'display_name': 'views',
+                                                              'icon': 'http://www.slideshare.net/favicon.ico',
+                                                              'provider': 'SlideShare',
+                                                              'provider_url': 'http://www.slideshare.net/'}},
+                                    'url': 'http://www.slideshare.net/'},
+                     'slideshare_account': {'descr': 'The best way to share presentations, documents and professional videos.',
+                                            'provides_aliases': False,
+                                            'provides_biblio': True,
+                                            'provides_members': False,
+                                            'provides_metrics': True,
+                                            'static_meta': {'followers': {'description': 'The number of people who follow this account',
+                                                                          'display_name': 'followers',
+                                                                          'icon': 'http://www.slideshare.net/favicon.ico',
+                                                                          'provider': 'SlideShare',
+                                                                          'provider_url': 'http://www.slideshare.net/'}},
+                                            'url': 'http://www.slideshare.net/'},
+                     'twitter': {'descr': 'Social networking and microblogging service.',
+                                 'provides_aliases': False,
+                                 'provides_biblio': True,
+                                 'provides_members': False,
+                                 'provides_metrics': True,
+                                 'static_meta': {'followers': {'description': 'The number of people following this Twitter account',
+                                                               'display_name': 'followers',
+                                                               'icon': 'https://twitter.com/favicon.ico',
+                                                               'provider': 'Twitter',
+                                                               'provider_url': 'http://twitter.com'},
+                                                 'lists': {'description': 'The number of people who have included this Twitter account in a Twitter list',
+                                                           'display_name': 'lists',
+                                                           'icon': 'https://twitter.com/favicon.ico',
+                                                           'provider': 'Twitter',
+                                                           'provider_url': 'http://twitter.com'},
+                                                 'number_tweets': {'description': 'The number of tweets from this Twitter account',
+                                                                   'display_name': 'number of tweets',
+                                                                   'icon': 'https://twitter.com/favicon.ico',
+                                                                   'provider': 'Twitter',
+                                                                   'provider_url': 'http://twitter.com'}},
+                                 'url': 'http://twitter.com'},
+                     'vimeo': {'descr': 'Vimeo: Your videos belong here.',
+                               'provides_aliases': False,
+                               'provides_biblio': True,
+                               'provides_members': False,
+                               'provides_metrics': True,
+                               'static_meta': {'comments': {'description': 'The number of comments on a video',
+                                                            'display_name': 'comments',
+                                                            'icon': 'https://secure-a.vimeocdn.com/images_v6/favicon_32.ico',
+                                                            'provider': 'Vimeo',
+                                                            'provider_url': 'http://vimeo.com'},
+                                               'likes': {'description': "The number of people who have 'liked' the video",
+                                                         'display_name': 'likes',
+                                                         'icon': 'https://secure-a.vimeocdn.com/images_v6/favicon_32.ico',
+                                                         'provider': 'Vimeo',
+                                                         'provider_url': 'http://vimeo.com'},
+                                               'plays': {'description': 'The number of people who have played the video',
+                                                         'display_name': 'plays',
+                                                         'icon': 'https://secure-a.vimeocdn.com/images_v6/favicon_32.ico',
+                                                         'provider': 'Vimeo',
+                                                         'provider_url': 'http://vimeo.com'}},
+                               'url': 'http://vimeo.com'},
+                     'webpage': {'descr': 'Information scraped from webpages by ImpactStory',
+                                 'provides_aliases': False,
+                                 'provides_biblio': True,
+                                 'provides_members': True,
+                                 'provides_metrics': False,
+                                 'url': 'http://impactstory.org'},
+                     'wikipedia': {'descr': 'The free encyclopedia that anyone can edit.',
+                                   'provides_aliases': False,
+                                   'provides_biblio': False,
+                                   'provides_members': False,
+                                   'provides_metrics': True,
+                                   'static_meta': {'mentions': {'description': 'The number of Wikipedia articles that mentioned this object.',
+                                                                'display_name': 'mentions',
+                                                                'icon': 'http://wikipedia.org/favicon.ico',
+                                                                'provider': 'Wikipedia',
+                                                                'provider_url': 'http://www.wikipedia.org/'}},
+                                   'url': 'http://www.wikipedia.org/'},
+                     'youtube': {'descr': 'YouTube allows billions of people to discover, watch and share originally-created videos',
+                                 'provides_aliases': False,
+                                 'provides_biblio': True,
+                                 'provides_members': False,
+                                 'provides_metrics': True,
+                                 'static_meta': {'comments': {'description': 'The number of comments on a video',
+                                                              'display_name': 'comments',
+                                                              'icon': 'http://www.youtube.com/favicon.ico',
+                                                              'provider': 'YouTube',
+                                                              'provider_url': 'http://youtube.com'},
+                                                 'dislikes': {'description': "The number of people who have who have 'disliked' the video",
+                                                              'display_name': 'dislikes',
+                                                              'icon': 'http://www.youtube.com/favicon.ico',
+                                                              'provider': 'YouTube',
+                                                              'provider_url': 'http://youtube.com'},
+                                                 'favorites': {'description': 'The number of people who have marked the video as a favorite',
+                                                               'display_name': 'favorites',
+                                                               'icon': 'http://www.youtube.com/favicon.ico',
+                                                               'provider': 'YouTube',
+                                                               'provider_url': 'http://youtube.com'},
+                                                 'likes': {'description': "The number of people who have 'liked' the video",
+                                                           'display_name': 'likes',
+                                                           'icon': 'http://www.youtube.com/favicon.ico',
+                                                           'provider': 'YouTube',
+                                                           'provider_url': 'http://youtube.com'},
+                                                 'views': {'description': 'The number of people who have viewed the video',
+                                                           'display_name': 'views',
+                                                           'icon': 'http://www.youtube.com/favicon.ico',
+                                                           'provider': 'YouTube',
+                                                           'provider_url': 'http://youtube.com'}},
+                                 'url': 'http://youtube.com'}}
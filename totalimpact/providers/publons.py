@@ -70,29 +70,30 @@ class Publons(Provider):
 
         return(members)
 
-    def _extract_aliases(self, page, id=None):
-        dict_of_keylists = {"doi": ["doi"]}
+    aliases_extractor = provider.JsonExtractor({"doi": ["doi"]})
 
-        aliases_dict = provider._extract_from_json(page, dict_of_keylists)
+    def _extract_aliases(self, page, id=None):
+        aliases_dict = self.aliases_extractor.extract(page)
         if aliases_dict:
             aliases_list = [(namespace, nid) for (namespace, nid) in aliases_dict.iteritems()]
         else:
             aliases_list = []
         return aliases_list
 
+    biblio_extractor = provider.JsonExtractor({
+        'title' : ['title'],
+        'authors' : ['author', 'last_name'],
+        'journal' : ['source', 'provider'],
+        'review_url' : ['source', 'url'],
+        'review_type' : ['review_type'],
+        'create_date' : ['datetime_reviewed'],
+        'free_fulltext_url' : ['_id', 'url'],
+        'source_provider' : ['source', 'provider'],
+        'source_url' : ['source', 'url']
+    })
+
     def _extract_biblio(self, page, id=None):
-        dict_of_keylists = {
-            'title' : ['title'],
-            'authors' : ['author', 'last_name'],
-            'journal' : ['source', 'provider'],
-            'review_url' : ['source', 'url'],
-            'review_type' : ['review_type'],
-            'create_date' : ['datetime_reviewed'],
-            'free_fulltext_url' : ['_id', 'url'],
-            'source_provider' : ['source', 'provider'],
-            'source_url' : ['source', 'url']
-        }
-        biblio_dict = provider._extract_from_json(page, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract(page)
         biblio_dict["genre"] = "peer review"
         biblio_dict["title"] = "Review of " + biblio_dict["title"]
 
@@ -111,6 +112,10 @@ class Publons(Provider):
 
         return biblio_dict    
        
+    metrics_extractor = provider.JsonExtractor({
+        'publons:views' : ['stats', 'views']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -121,11 +126,7 @@ class Publons(Provider):
         if not "views" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'publons:views' : ['stats', 'views']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract(page)
 
         return metrics_dict
 
@@ -124,14 +124,14 @@ class Pubmed(Provider):
         biblio_dict = provider._extract_from_xml(page, dict_of_keylists)
         dom_authors = provider._find_all_in_xml(page, "LastName")
         try:
-            biblio_dict["authors"] = ", ".join([author.firstChild.data for author in dom_authors])
+            biblio_dict["authors"] = ", ".join([provider._xml_text(author) for author in dom_authors])
         except (AttributeError, TypeError):
             pass
 
         mesh_list = provider._find_all_in_xml(page, "DescriptorName")
         try:
             if mesh_list:
-                biblio_dict["keywords"] = "; ".join([mesh_term.firstChild.data for mesh_term in mesh_list])
+                biblio_dict["keywords"] = "; ".join([provider._xml_text(mesh_term) for mesh_term in mesh_list])
         except (AttributeError, TypeError):
             pass
 
@@ -224,21 +224,21 @@ class Pubmed(Provider):
         doi = None
         pmc = None
         try:
-            articleidlist = doc.getElementsByTagName("ArticleIdList")[0]
-            for articleid in articleidlist.getElementsByTagName("ArticleId"):
-                if (articleid.getAttribute("IdType") == u"doi"):
-                    doi = articleid.firstChild.data
-                if (articleid.getAttribute("IdType") == u"pmc"):
-                    pmc = articleid.firstChild.data
+            articleidlist = provider._xml_elements_named(doc, "ArticleIdList")[0]
+            for articleid in provider._xml_elements_named(articleidlist, "ArticleId"):
+                if (articleid.get("IdType") == u"doi"):
+                    doi = provider._xml_text(articleid)
+                if (articleid.get("IdType") == u"pmc"):
+                    pmc = provider._xml_text(articleid)
 
             if not doi:
                 #give it another try, in another part of the xml 
                 # see http://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=pubmed&id=23682040&retmode=xml&email=team@total-impact.org&tool=total-impact
-                article = doc.getElementsByTagName("Article")[0]
-                for elocationid in article.getElementsByTagName("ELocationID"):
-                    if (elocationid.getAttribute("EIdType") == u"doi"):
-                        if (elocationid.getAttribute("ValidYN") == u"Y"):
-                            doi = elocationid.firstChild.data
+                article = provider._xml_elements_named(doc, "Article")[0]
+                for elocationid in provider._xml_elements_named(article, "ELocationID"):
+                    if (elocationid.get("EIdType") == u"doi"):
+                        if (elocationid.get("ValidYN") == u"Y"):
+                            doi = provider._xml_text(elocationid)
 
         except (IndexError, TypeError):
             pass
@@ -314,8 +314,8 @@ class Pubmed(Provider):
         page = self._get_eutils_page(pmcid_filter_url, id)
         (doc, lookup_function) = provider._get_doc_from_xml(page)  
         try:    
-            id_docs = doc.getElementsByTagName("Id")
-            pmids = [id_doc.firstChild.data for id_doc in id_docs]
+            id_docs = provider._xml_elements_named(doc, "Id")
+            pmids = [provider._xml_text(id_doc) for id_doc in id_docs]
         except TypeError:
             logger.warning(u"%20s no Id xml tags for %s" % (self.provider_name, id))
             pmids = []
@@ -366,8 +366,8 @@ class Pubmed(Provider):
         dict_of_keylists = {"pubmed:pmc_citations": ["PubMedToPMCcitingformSET", "REFORM"]}
         (doc, lookup_function) = provider._get_doc_from_xml(page)
         try:
-            pmcid_doms = doc.getElementsByTagName("PMCID")
-            pmcids = [pmcid_dom.firstChild.data for pmcid_dom in pmcid_doms]
+            pmcid_doms = provider._xml_elements_named(doc, "PMCID")
+            pmcids = [provider._xml_text(pmcid_dom) for pmcid_dom in pmcid_doms]
         except TypeError:
             logger.warning(u"%20s no PMCID xml tags for %s" % (self.provider_name, id))            
             pmcids = []
@@ -44,8 +44,8 @@ class Scienceseeker(Provider):
         if not doc:
             return {}
         try:
-            feed_doc = doc.getElementsByTagName("feed")
-            entry_docs = feed_doc[0].getElementsByTagName("entry")
+            feed_doc = provider._xml_elements_named(doc, "feed")
+            entry_docs = provider._xml_elements_named(feed_doc[0], "entry")
             number_blog_posts = len(entry_docs)
         except (KeyError, IndexError, TypeError):
             return {}
@@ -29,6 +29,8 @@ class Scopus(Provider):
 
     def __init__(self):
         super(Scopus, self).__init__()
+        # citation counts move slowly and every lookup spends our api key quota
+        self.max_stale_duration = 60*60*24
 
     def is_relevant_alias(self, alias):
         (namespace, nid) = alias
@@ -0,0 +1,111 @@
+import os
+import time
+import logging
+import threading
+import urlparse
+import cookielib
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+
+logger = logging.getLogger("ti.providers.sessions")
+
+# upper bound on keep-alive connections kept open to any one host
+MAX_POOL_SIZE = int(os.getenv("HTTP_MAX_POOL_SIZE", 20))
+# sessions unused for this long get their sockets closed
+MAX_IDLE_SECONDS = int(os.getenv("HTTP_SESSION_MAX_IDLE_SECONDS", 5*60))
+# max number of hosts with open sessions, least recently used closed first
+MAX_SESSIONS = int(os.getenv("HTTP_MAX_SESSIONS", 100))
+
+
+def host_key(url):
+    parsed = urlparse.urlparse(url)
+    return (parsed.scheme.lower(), parsed.netloc.lower())
+
+
+def _new_session(pool_size):
+    session = requests.Session()
+
+    # sessions are shared by every provider call to the host, so don't let
+    # cookies leak from one item to the next.  Cookies set during a redirect
+    # chain still work because requests tracks those on the request itself.
+    session.cookies = RequestsCookieJar(
+        policy=cookielib.DefaultCookiePolicy(allowed_domains=[]))
+
+    for prefix in ["http://", "https://"]:
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+        session.mount(prefix, adapter)
+    return session
+
+
+class SessionRegistry(object):
+    """ Keeps one keep-alive requests.Session per scheme and host, per process """
+
+    def __init__(self,
+            max_pool_size=MAX_POOL_SIZE,
+            max_idle_seconds=MAX_IDLE_SECONDS,
+            max_sessions=MAX_SESSIONS):
+        self.max_pool_size = max_pool_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._pid = os.getpid()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get_session(self, url, pool_size=10):
+        pool_size = max(1, min(pool_size, self.max_pool_size))
+        session_key = host_key(url)
+        now = time.time()
+
+        with self._lock:
+            # sockets can't be shared with a forked parent, so start fresh
+            if os.getpid() != self._pid:
+                self._sessions = {}
+                self._pid = os.getpid()
+
+            self._evict_idle(now)
+
+            try:
+                (session, last_used) = self._sessions[session_key]
+            except KeyError:
+                logger.debug(u"opening new http session for {host}".format(
+                    host=session_key[1]))
+                session = _new_session(pool_size)
+                self._evict_least_recently_used()
+            self._sessions[session_key] = (session, now)
+
+        return session
+
+    def clear(self):
+        with self._lock:
+            for session_key in self._sessions.keys():
+                self._close(session_key)
+
+    def _close(self, session_key):
+        (session, last_used) = self._sessions.pop(session_key)
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        for session_key in self._sessions.keys():
+            (session, last_used) = self._sessions[session_key]
+            if (now - last_used) > self.max_idle_seconds:
+                self._close(session_key)
+
+    def _evict_least_recently_used(self):
+        while len(self._sessions) >= self.max_sessions:
+            oldest_session_key = min(self._sessions, key=lambda k: self._sessions[k][1])
+            self._close(oldest_session_key)
+
+
+registry = SessionRegistry()
+
+def get_session(url, pool_size=10):
+    return registry.get_session(url, pool_size)
+
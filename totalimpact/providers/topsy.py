@@ -109,6 +109,11 @@ class Topsy(Provider):
         return metrics_and_drilldown 
 
 
+    metrics_extractor = provider.JsonExtractor({
+        'topsy:tweets' : ['response', 'all'],
+        'topsy:influential_tweets' : ['response', 'influential']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -125,11 +130,7 @@ class Topsy(Provider):
                 sum_of_hits = sum(hits)
                 metrics_dict["topsy:tweets"] = sum_of_hits
         else:
-            dict_of_keylists = {
-                'topsy:tweets' : ['response', 'all'],
-                'topsy:influential_tweets' : ['response', 'influential']
-            }
-            metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+            metrics_dict = self.metrics_extractor.extract(page)
 
         return metrics_dict
 
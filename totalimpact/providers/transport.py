@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import logging
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from totalimpact.providers import sessions
+from totalimpact import provider_stats
+from totalimpact.cache import canonical_url
+
+logger = logging.getLogger("ti.providers.transport")
+
+# live: send requests upstream.  record: send them and keep the responses.
+# replay: answer from recorded responses and sample pages, never touching the network.
+HTTP_TRANSPORT = os.getenv("HTTP_TRANSPORT", "live")
+HTTP_FIXTURES_DIR = os.getenv("HTTP_FIXTURES_DIR",
+    os.path.join(os.path.dirname(__file__), "../../extras/recorded_provider_pages"))
+SAMPLE_PAGES_DIR = os.getenv("HTTP_SAMPLE_PAGES_DIR",
+    os.path.join(os.path.dirname(__file__), "../../extras/sample_provider_pages"))
+# simulated upstream behaviour in replay mode
+HTTP_REPLAY_LATENCY_SECONDS = float(os.getenv("HTTP_REPLAY_LATENCY_SECONDS", 0))
+HTTP_REPLAY_ERROR_RATE = float(os.getenv("HTTP_REPLAY_ERROR_RATE", 0))
+HTTP_REPLAY_TIMEOUT_RATE = float(os.getenv("HTTP_REPLAY_TIMEOUT_RATE", 0))
+HTTP_REPLAY_SEED = os.getenv("HTTP_REPLAY_SEED", None)
+
+MODES = ["live", "record", "replay"]
+
+
+def fixture_name(url):
+    # canonical, so recordings hold no credentials and match across key rotations
+    return hashlib.md5(canonical_url(url)).hexdigest()
+
+
+def build_response(url, status_code, content, headers={}, encoding="utf-8"):
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = encoding
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+class FixtureStore(object):
+    """ Recorded responses, one json file per canonical url """
+
+    def __init__(self, fixtures_dir=HTTP_FIXTURES_DIR, sample_pages_dir=SAMPLE_PAGES_DIR):
+        self.fixtures_dir = fixtures_dir
+        self.sample_pages_dir = sample_pages_dir
+
+    def _path(self, provider_name, url):
+        return os.path.join(self.fixtures_dir, provider_name, fixture_name(url))
+
+    def save(self, provider_name, url, response):
+        path = self._path(provider_name, url)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fixture = {
+            "url": canonical_url(response.url or url),
+            "status_code": response.status_code,
+            "headers": dict(response.headers or {}),
+            "encoding": response.encoding,
+            "content": base64.b64encode(response.content or "")
+            }
+        with open(path, "w") as f:
+            json.dump(fixture, f)
+
+    def load(self, provider_name, url):
+        """ Returns the recorded response for url, else the provider's sample
+            page for the method being run, else None """
+        try:
+            with open(self._path(provider_name, url)) as f:
+                fixture = json.load(f)
+            return build_response(url,
+                fixture["status_code"],
+                base64.b64decode(fixture["content"]),
+                fixture["headers"],
+                fixture["encoding"])
+        except IOError:
+            pass
+
+        sample_page_path = os.path.join(self.sample_pages_dir,
+            provider_name,
+            provider_stats.get_method_name())
+        try:
+            with open(sample_page_path) as f:
+                return build_response(url, 200, f.read())
+        except IOError:
+            return None
+
+
+class RecordingSession(object):
+    """ Sends requests through a live session and saves what comes back """
+
+    def __init__(self, session, store, provider_name):
+        self.session = session
+        self.store = store
+        self.provider_name = provider_name
+
+    def get(self, url, **kwargs):
+        response = self.session.get(url, **kwargs)
+        try:
+            self.store.save(self.provider_name, url, response)
+        except (IOError, OSError, TypeError, ValueError):
+            logger.warning(u"Unable to record response for {url}".format(url=url))
+        return response
+
+
+class ReplaySession(object):
+    """ Serves saved responses, with injected latency, errors and timeouts """
+
+    def __init__(self, store, provider_name, latency_seconds, error_rate, timeout_rate, rand):
+        self.store = store
+        self.provider_name = provider_name
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.rand = rand
+
+    def get(self, url, **kwargs):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        roll = self.rand.random()
+        if roll < self.timeout_rate:
+            raise requests.exceptions.Timeout("Replayed timeout on " + url)
+        if roll < (self.timeout_rate + self.error_rate):
+            return build_response(url, 500, "")
+
+        response = self.store.load(self.provider_name, url)
+        if response is None:
+            logger.info(u"No recorded response for {url}, replaying 404".format(url=url))
+            return build_response(url, 404, "")
+        return response
+
+
+class Transport(object):
+    """ Decides where Provider.http_get sends its requests """
+
+    def __init__(self,
+            mode=HTTP_TRANSPORT,
+            store=None,
+            latency_seconds=HTTP_REPLAY_LATENCY_SECONDS,
+            error_rate=HTTP_REPLAY_ERROR_RATE,
+            timeout_rate=HTTP_REPLAY_TIMEOUT_RATE,
+            seed=HTTP_REPLAY_SEED):
+        if mode not in MODES:
+            raise ValueError("unknown http transport " + mode)
+        self.mode = mode
+        self.store = store or FixtureStore()
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        # seeded so a replayed refresh fails in the same places every run
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get_session(self, provider_name, url, pool_size=10):
+        if self.mode == "replay":
+            return ReplaySession(self.store, provider_name,
+                self.latency_seconds, self.error_rate, self.timeout_rate,
+                _LockedRandom(self._rand, self._lock))
+        session = sessions.get_session(url, pool_size)
+        if self.mode == "record":
+            return RecordingSession(session, self.store, provider_name)
+        return session
+
+
+class _LockedRandom(object):
+    def __init__(self, rand, lock):
+        self.rand = rand
+        self.lock = lock
+
+    def random(self):
+        with self.lock:
+            return self.rand.random()
+
+
+transport = Transport()
+
+def get_session(provider_name, url, pool_size=10):
+    return transport.get_session(provider_name, url, pool_size)
+
@@ -64,19 +64,19 @@ class Vimeo(Provider):
         url = template % (nid_as_video_id)
         return(url)
 
+    biblio_extractor = provider.JsonExtractor({
+        'title':        ['title'],
+        'authors':      ['user_name'],
+        'published_date': ['upload_date'],
+        'url':          ['url']
+    })
+
     def _extract_biblio(self, page, id=None):
 
         json_response = provider._load_json(page)
         this_video_json = json_response[0]
 
-        dict_of_keylists = {
-            'title':        ['title'],
-            'authors':      ['user_name'],
-            'published_date': ['upload_date'],
-            'url':          ['url']
-        }
-
-        biblio_dict = provider._extract_from_data_dict(this_video_json, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract_from_data(this_video_json)
 
         try:
             biblio_dict["year"] = biblio_dict["published_date"][0:4]
@@ -88,6 +88,12 @@ class Vimeo(Provider):
         return biblio_dict    
 
 
+    metrics_extractor = provider.JsonExtractor({
+        'vimeo:plays' : ['stats_number_of_plays'],
+        'vimeo:likes' : ['stats_number_of_likes'],
+        'vimeo:comments' : ['stats_number_of_comments']
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):        
         if status_code != 200:
             if status_code == 404:
@@ -101,12 +107,6 @@ class Vimeo(Provider):
         json_response = provider._load_json(page)
         this_video_json = json_response[0]
 
-        dict_of_keylists = {
-            'vimeo:plays' : ['stats_number_of_plays'],
-            'vimeo:likes' : ['stats_number_of_likes'],
-            'vimeo:comments' : ['stats_number_of_comments']
-        }
-
-        metrics_dict = provider._extract_from_data_dict(this_video_json, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract_from_data(this_video_json)
 
         return metrics_dict
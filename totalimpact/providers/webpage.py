@@ -28,6 +28,11 @@ class Webpage(Provider):
 
     def __init__(self):
         super(Webpage, self).__init__()
+        # biblio only needs the title and first h1, don't download whole pdfs and huge pages.
+        # Pages without an h1 are read up to the cap, and what was read is still parsed.
+        self.max_response_bytes = 2*1000*1000
+        self.truncate_large_responses = True
+        self.stop_reading_at = "</h1>"
 
     def is_relevant_alias(self, alias):
         (namespace, nid) = alias
@@ -1,7 +1,5 @@
 from totalimpact.providers import provider
 from totalimpact.providers.provider import Provider, ProviderContentMalformedError
-from xml.dom import minidom
-from xml.parsers.expat import ExpatError
 
 import logging
 logger = logging.getLogger('ti.providers.wikipedia')
@@ -51,8 +49,8 @@ class Wikipedia(Provider):
         (doc, lookup_function) = provider._get_doc_from_xml(page)
 
         try:
-            searchinfo = doc.getElementsByTagName('searchinfo')
-            totalhits = int(searchinfo[0].attributes['totalhits'].value)
+            searchinfo = provider._xml_elements_named(doc, 'searchinfo')
+            totalhits = int(searchinfo[0].get('totalhits'))
         except (TypeError, IndexError):
             raise ProviderContentMalformedError("No searchinfo in response document")
 
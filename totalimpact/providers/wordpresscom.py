@@ -133,6 +133,10 @@ class Wordpresscom(Provider):
         return (members)
   
 
+    aliases_extractor = provider.JsonExtractor({
+        'wordpress_blog_id' : ['ID']
+    })
+
     # overriding
     def aliases(self, 
             aliases, 
@@ -156,10 +160,7 @@ class Wordpresscom(Provider):
                 response = self.http_get(url, cache_enabled=cache_enabled)
 
                 if (response.status_code == 200) and ("ID" in response.text):
-                    dict_of_keylists = {
-                            'wordpress_blog_id' : ['ID']
-                        }
-                    aliases_dict = provider._extract_from_json(response.text, dict_of_keylists)
+                    aliases_dict = self.aliases_extractor.extract(response.text)
                     new_alias = ("wordpress_blog_id", str(aliases_dict["wordpress_blog_id"]))
                     if new_alias not in aliases:
                         new_aliases += [new_alias]
@@ -211,12 +212,13 @@ class Wordpresscom(Provider):
         return biblio_dict
 
 
+    biblio_extractor = provider.JsonExtractor({
+        'title' : ['name'],
+        'description' : ['description']
+    })
+
     def _extract_biblio(self, page, id=None):
-        dict_of_keylists = {
-            'title' : ['name'],
-            'description' : ['description']
-        }
-        biblio_dict = provider._extract_from_json(page, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract(page)
         return biblio_dict   
 
 
@@ -319,6 +321,10 @@ class Wordpresscom(Provider):
 
 
 
+    metrics_subscribers_extractor = provider.JsonExtractor({
+        'wordpresscom:subscribers' : ['subscribers_count']
+    })
+
     def _extract_metrics_subscribers(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -329,14 +335,14 @@ class Wordpresscom(Provider):
         if not "is_private" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'wordpresscom:subscribers' : ['subscribers_count']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)
+        metrics_dict = self.metrics_subscribers_extractor.extract(page)
         return metrics_dict
 
 
+    metrics_blog_views_extractor = provider.JsonExtractor({
+        'wordpresscom:views' : ['views']
+    })
+
     def _extract_metrics_blog_views(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -347,14 +353,14 @@ class Wordpresscom(Provider):
         if not "views" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'wordpresscom:views' : ['views']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)        
+        metrics_dict = self.metrics_blog_views_extractor.extract(page)        
         return metrics_dict
 
 
+    metrics_blog_comments_extractor = provider.JsonExtractor({
+        'wordpresscom:comments' : ['found']
+    })
+
     def _extract_metrics_blog_comments(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -365,14 +371,14 @@ class Wordpresscom(Provider):
         if not "found" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'wordpresscom:comments' : ['found']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)        
+        metrics_dict = self.metrics_blog_comments_extractor.extract(page)        
         return metrics_dict
 
 
+    metrics_post_comments_extractor = provider.JsonExtractor({
+        'wordpresscom:comments' : ['comment_count']
+    })
+
     def _extract_metrics_post_comments(self, page, status_code=200, id=None):
         if status_code != 200:
             if status_code == 404:
@@ -383,10 +389,6 @@ class Wordpresscom(Provider):
         if not "comment_count" in page:
             raise ProviderContentMalformedError
 
-        dict_of_keylists = {
-            'wordpresscom:comments' : ['comment_count']
-        }
-
-        metrics_dict = provider._extract_from_json(page, dict_of_keylists)        
+        metrics_dict = self.metrics_post_comments_extractor.extract(page)        
         return metrics_dict
 
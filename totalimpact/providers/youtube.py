@@ -84,6 +84,12 @@ class Youtube(Provider):
         url = template % (nid_as_video_id)
         return(url)
 
+    biblio_extractor = provider.JsonExtractor({
+        'title': ['snippet', 'title'],
+        'channel_title': ['snippet', 'channelTitle'],
+        'published_date': ['snippet', 'publishedAt']
+    })
+
     def _extract_biblio(self, page, id=None):
 
         if not "snippet" in page:
@@ -92,13 +98,7 @@ class Youtube(Provider):
         json_response = provider._load_json(page)
         this_video_json = json_response["items"][0]
 
-        dict_of_keylists = {
-            'title': ['snippet', 'title'],
-            'channel_title': ['snippet', 'channelTitle'],
-            'published_date': ['snippet', 'publishedAt']
-        }
-
-        biblio_dict = provider._extract_from_data_dict(this_video_json, dict_of_keylists)
+        biblio_dict = self.biblio_extractor.extract_from_data(this_video_json)
 
         try:
             biblio_dict["year"] = biblio_dict["published_date"][0:4]
@@ -111,6 +111,14 @@ class Youtube(Provider):
         return biblio_dict    
 
 
+    metrics_extractor = provider.JsonExtractor({
+        'youtube:views' : ['statistics', 'viewCount'],
+        'youtube:likes' : ['statistics', 'likeCount'],
+        'youtube:dislikes' : ['statistics', 'dislikeCount'],
+        'youtube:favorites' : ['statistics', 'favoriteCount'],
+        'youtube:comments' : ['statistics', 'commentCount'],
+    })
+
     def _extract_metrics(self, page, status_code=200, id=None):        
         if status_code != 200:
             if status_code == 404:
@@ -124,15 +132,7 @@ class Youtube(Provider):
         json_response = provider._load_json(page)
         this_video_json = json_response["items"][0]
 
-        dict_of_keylists = {
-            'youtube:views' : ['statistics', 'viewCount'],
-            'youtube:likes' : ['statistics', 'likeCount'],
-            'youtube:dislikes' : ['statistics', 'dislikeCount'],
-            'youtube:favorites' : ['statistics', 'favoriteCount'],
-            'youtube:comments' : ['statistics', 'commentCount'],
-        }
-
-        metrics_dict = provider._extract_from_data_dict(this_video_json, dict_of_keylists)
+        metrics_dict = self.metrics_extractor.extract_from_data(this_video_json)
 
         metrics_dict = provider._metrics_dict_as_ints(metrics_dict)
 
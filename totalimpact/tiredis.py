@@ -2,6 +2,7 @@ import redis, logging, json, datetime, os, iso8601
 from collections import defaultdict
 
 from totalimpact.providers.provider import ProviderFactory
+from totalimpact import json_codec
 
 
 logger = logging.getLogger("ti.tiredis")
@@ -13,7 +14,7 @@ def from_url(url, db=0):
 def set_hash_value(self, key, hash_key, value, expire, pipe=None):
     if not pipe:
         pipe = self
-    json_value = json.dumps(value)
+    json_value = json_codec.dumps_for_redis(value)
     pipe.hset(key, hash_key, json_value)
     pipe.expire(key, expire)
     if pipe==self:
@@ -22,8 +23,8 @@ def set_hash_value(self, key, hash_key, value, expire, pipe=None):
 def get_hash_value(self, key, hash_key):
     try:
         json_value = self.hget(key, hash_key)
-        value = json.loads(json_value)
-    except TypeError:
+        value = json_codec.loads_from_redis(json_value)
+    except (TypeError, ValueError):  # missing, or written with a codec we can't read
         value = None
     return value
 
@@ -62,7 +63,7 @@ def set_value(self, key, value, expire, pipe=None):
     if not pipe:
         pipe = self
 
-    json_value = json.dumps(value)
+    json_value = json_codec.dumps_for_redis(value)
     pipe.set(key, json_value)
     pipe.expire(key, expire)
 
@@ -74,8 +75,8 @@ def get_value(self, key, pipe=None):
     value = None
     try:
         json_value = pipe.get(key)
-        value = json.loads(json_value)
-    except TypeError:
+        value = json_codec.loads_from_redis(json_value)
+    except (TypeError, ValueError):
         pass
             
     return value
@@ -1,5 +1,6 @@
 import unicodedata
 import logging
+import re
 
 logger = logging.getLogger('ti.unicode_helpers')
 
@@ -21,7 +22,24 @@ def printing_character_or_space(c):
     return is_printing_character_or_space
 
 
+# the only nonprinting ascii characters are the control characters
+ascii_nonprinting_pattern = re.compile(u"[\x00-\x1f\x7f]")
+
+def _is_ascii(input):
+    try:
+        if isinstance(input, unicode):
+            input.encode("ascii")
+        else:
+            input.decode("ascii")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return False
+    return True
+
 def remove_nonprinting_characters(input, encoding='utf-8'):
+    if isinstance(input, basestring) and _is_ascii(input):
+        # same answer as below without looking up every character
+        return ascii_nonprinting_pattern.sub("", input)
+
     input_was_unicode = True
     if isinstance(input, basestring):
         if not isinstance(input, unicode):
@@ -15,6 +15,7 @@ from totalimpact.providers import provider as provider_module
 from totalimpact.providers.provider import ProviderFactory, ProviderItemNotFoundError, ProviderError, ProviderServerError, ProviderTimeout
 from totalimpact import unicode_helpers
 from totalimpact import default_settings
+from totalimpact import provider_stats
 from totalimpact import REDIS_MAIN_DATABASE_NUMBER
 import logging
 
@@ -64,12 +65,14 @@ def check_key():
     return # if success don't return any content
 
 
-def abort_custom(status_code, msg):
+def abort_custom(status_code, msg, extra=None):
     body_dict = {
         "HTTP_status_code": status_code,
         "message": msg,
         "error": True
     }
+    if extra:
+        body_dict.update(extra)
     if request.args.get("callback"):
         status_code = 200  # JSONP can't deal with actual errors, it needs something back
         resp_string = "{callback_name}( {resp} )".format(
@@ -199,6 +202,15 @@ def provider():
     return resp
 
 
+@app.route('/v1/provider/stats', methods=['GET'])
+def provider_stats_get():
+    # cache, bandwidth and latency counters per provider and method, summed over all processes
+    provider_stats.stats.flush()
+    ret = provider_stats.get_aggregated_stats()
+    resp = make_response(json.dumps(ret, sort_keys=True, indent=4), 200)
+    return resp
+
+
 
 def format_into_products_dict(tiids_aliases_map):
     products_dict = {}
@@ -207,6 +219,12 @@ def format_into_products_dict(tiids_aliases_map):
         products_dict[tiid] = {"aliases": {ns: [nid]}}
     return products_dict
 
+def importer_response_dict(tiids_aliases_map, import_errors):
+    response_dict = {"products": format_into_products_dict(tiids_aliases_map)}
+    if import_errors:
+        response_dict["errors"] = import_errors
+    return response_dict
+
 
 
 @app.route("/v1/importer/<provider_name>", methods=['POST'])
@@ -230,28 +248,27 @@ def importer_post(provider_name):
     except KeyError:
         existing_tiids = []
 
+    # filled in as items are made, so an error partway through still reports them
+    tiids_aliases_map = {}
+    import_errors = []
     try:
-        retrieved_aliases = provider_module.import_products(provider_name, request.json)
+        alias_chunks = provider_module.import_product_chunks(provider_name, request.json, import_errors)
+        item_module.create_tiids_from_alias_chunks(profile_id, alias_chunks, existing_tiids, analytics_credentials, myredis, 
+            provider_name, tiids_aliases_map)
     except ImportError:
         abort_custom(404, "an importer for provider '{provider_name}' is not found".format(
             provider_name=provider_name))        
     except ProviderItemNotFoundError:
-        abort_custom(404, "item not found")
-    except ProviderItemNotFoundError:
-        abort_custom(404, "item not found")
+        abort_custom(404, "item not found", importer_response_dict(tiids_aliases_map, import_errors))
     except (ProviderTimeout, ProviderServerError):
-        abort_custom(503, "timeout error, might be transient")
+        abort_custom(503, "timeout error, might be transient", importer_response_dict(tiids_aliases_map, import_errors))
     except ProviderError:
-        abort(500, "internal error from provider")
+        abort_custom(500, "internal error from provider", importer_response_dict(tiids_aliases_map, import_errors))
 
-    new_aliases = item_module.aliases_not_in_existing_tiids(retrieved_aliases, existing_tiids)
-    tiids_aliases_map = item_module.create_tiids_from_aliases(profile_id, new_aliases, analytics_credentials, myredis, provider_name)
     # logger.debug(u"in provider_importer_get with {tiids_aliases_map}".format(
     #     tiids_aliases_map=tiids_aliases_map))
 
-    products_dict = format_into_products_dict(tiids_aliases_map)
-
-    resp = make_response(json.dumps({"products": products_dict}, sort_keys=True, indent=4), 200)
+    resp = make_response(json.dumps(importer_response_dict(tiids_aliases_map, import_errors), sort_keys=True, indent=4), 200)
     return resp
 
 